@@ -1,104 +1,207 @@
 # main.py
+import logging
+import os
 import pygame
 import sys
+import time
 from pygame.locals import *
 
-# Modular systems (must exist in the same folder)
-from bullet_system import BulletSystem
-from enemy_system import EnemySystem
-from menu_system import MenuSystem
-from collision_system import circle_rect_collision, HITBOX_RADIUS, check_collision
-from WaveSystem import WaveSystem
-from boss_system import Rumia
-
-bossSystem = Rumia(screen_width=800)
-
-waveSystem = WaveSystem()
+from resource_manager import resources, StartupTimer, UI_FONT
 
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+startup = StartupTimer()
 
+# Modular systems (must exist in the same folder)
+from menu_system import MenuSystem
+from game_session import GameSession, ACTIONS
+from save_state import SaveStates
+from quality_governor import QualityGovernor
+from event_log import events
+from metrics import metrics, FRAME_TIME_MS
+from gc_control import collector, AllocationBudget
+from frame_pacer import FramePacer
+from spike_profiler import SpikeProfiler
+from sprite_atlas import AtlasBulletRenderer
+try:
+    from surfarray_renderer import SurfarrayBulletRenderer
+except ImportError:  # needs numpy
+    SurfarrayBulletRenderer = None
+startup.mark("imports")
 
 # --- Pygame init ---
 pygame.init()
+startup.mark("pygame.init")
 WIDTH, HEIGHT = 800, 900
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Infinite Bullet Reverie")
-clock = pygame.time.Clock()
 
-# --- Systems ---
-menu = MenuSystem()
-playerBullets = BulletSystem(bulletSpeed=10, shootCooldown=150, screenWidth=WIDTH, screenHeight=HEIGHT)
-enemyBullets  = BulletSystem(bulletSpeed=6,  shootCooldown=500, screenWidth=WIDTH, screenHeight=HEIGHT)
-enemySystem = EnemySystem(WIDTH, HEIGHT)
+# Only the events the loop handles are queued (held keys are read with
+# key.get_pressed, which doesn't need KEYUP/mouse events)
+pygame.event.set_blocked(None)
+pygame.event.set_allowed([QUIT, KEYDOWN, WINDOWFOCUSLOST, WINDOWMINIMIZED, WINDOWEXPOSED])
 
-# --- Player hitbox ---
-HITBOX_RADIUS = 4  # Small visual hitbox for precision dodging
+# Menus, pause and game over don't animate: the loop sleeps in
+# event.wait until a key is pressed (or this long passes) and only redraws
+# when something happened
+IDLE_TIMEOUT_MS = 500
 
+# Presents frames on an even 60 Hz grid and reads input as late as it can;
+# REVERIE_PACING=clock uses plain Clock.tick instead
+pacer = FramePacer(60, mode=os.environ.get("REVERIE_PACING", "precise"))
+startup.mark("display")
 
+# --- Title menu first, so the window shows something straight away ---
+# Named fonts (if UI_FONT is set) are resolved in the background meanwhile
+resources.preload_fonts([UI_FONT])
+menu = MenuSystem()
+menu.draw_menu(screen)
+pygame.display.flip()
+startup.mark("first menu frame")
+
+# --- Systems ---
+# All gameplay state (player, bullets, enemies, Rumia, waves) lives in the session.
+# REVERIE_SHARDS=<n> runs plain enemy bullets in the sharded store (needs
+# numpy), stepped by REVERIE_SHARD_WORKERS=<n> worker processes (default 0:
+# in this process; workers only pay off with free cores)
+session = GameSession(WIDTH, HEIGHT, shards=int(os.environ.get("REVERIE_SHARDS", "0")),
+                      shardWorkers=int(os.environ.get("REVERIE_SHARD_WORKERS", "0")))
+
+# Save-states: F5 quicksave, F9 quickload, F7/F8 rewind/forward 5 seconds
+saveStates = SaveStates(session)
+saveStates.reset()
+SEEK_TICKS = 300
+
+# Drops visual quality (and finally caps enemy bullets) when frames run long
+governor = QualityGovernor()
+
+# Gameplay events (hits, kills, patterns...) go to a log file from a
+# background thread instead of being printed mid-frame
+events.start()
+
+# Runtime metrics for soak runs: off unless REVERIE_METRICS is set. Written as
+# OpenMetrics text to the cache folder, and served on
+# http://127.0.0.1:<port>/metrics if REVERIE_METRICS_PORT is set too
+if os.environ.get("REVERIE_METRICS"):
+    liveBullets = metrics.gauge("bullets_live", "Live bullets per BulletSystem.", "system")
+    liveBullets.set_function(lambda: len(session.enemyBullets.bullets), "enemy")
+    liveBullets.set_function(lambda: len(session.playerBullets.bullets), "player")
+    liveBullets.set_function(lambda: len(session.playerBullets.chase_bullets), "chase")
+    if session.massBullets is not None:
+        liveBullets.set_function(lambda: len(session.massBullets), "sharded")
+    metrics.gauge("enemies_alive", "Enemies alive.").set_function(
+        lambda: len(session.enemySystem.enemies))
+    metrics.gauge("tick", "Simulation tick.").set_function(lambda: session.tick)
+    port = os.environ.get("REVERIE_METRICS_PORT")
+    metrics.start(port=int(port) if port else None)
 
 # --- Paused State ---
 gamePaused = False
 
-# --- Player state (resettable) ---
-def reset_player_state():
-    return {
-        "x": WIDTH // 2,
-        "y": HEIGHT // 2,
-        "size": 32,
-        "normalSpeed": 5,
-        "focusSpeed": 2,
-        "lives": 3,
-        "invulnerable": False,
-        "invulnTimer": 0,
-        "powerValue": 1,
-        "powerLevel": 1,
-        "fireCooldown": 0,
-        "fireRate": 6,
-        "chaseCooldown": 0,
-        "chaseRate": 30,  # will change by power level
-
-    }
-
-player = reset_player_state()
-
-# --- Fonts (create once) ---
-title_font = pygame.font.SysFont(None, 64)
-ui_font = pygame.font.SysFont(None, 28)
-
-def update_power_level(player):
-    pv = player["powerValue"]
-
-    if pv >= 60:
-        player["powerLevel"] = 5
-    elif pv >= 35:
-        player["powerLevel"] = 4
-    elif pv >= 20:
-        player["powerLevel"] = 3
-    elif pv >= 10:
-        player["powerLevel"] = 2
-    else:
-        player["powerLevel"] = 1
+# F3 shows per-system update timings from the session's scheduler
+showSystemStats = False
+
+# F4 cycles how bullets are drawn: atlas sprites (default), writing pixels
+# with surfarray (needs numpy), or one pygame.draw call each.
+# REVERIE_RENDERER=<name> picks the starting one
+BULLET_RENDERERS = [("sprites", AtlasBulletRenderer(session.atlas))]
+if SurfarrayBulletRenderer:
+    BULLET_RENDERERS.append(("surfarray", SurfarrayBulletRenderer()))
+BULLET_RENDERERS.append(("pygame.draw", None))
+bulletRendererIndex = 0
+for i, (name, _) in enumerate(BULLET_RENDERERS):
+    if name == os.environ.get("REVERIE_RENDERER"):
+        bulletRendererIndex = i
+session.bulletRenderer = BULLET_RENDERERS[bulletRendererIndex][1]
+startup.mark("game systems")
+
+# --- Garbage collection ---
+# No automatic GC during gameplay frames; collections run at safe points
+# (wave barriers, boss entry, pause) after the frame is flipped.
+# REVERIE_GC=0 leaves Python's default behaviour alone.
+collector.enabled = os.environ.get("REVERIE_GC", "1") != "0"
+# Debug: REVERIE_ALLOC_BUDGET=<KB> logs systems allocating more than that per frame
+allocBudget = None
+if os.environ.get("REVERIE_ALLOC_BUDGET"):
+    allocBudget = AllocationBudget(int(os.environ["REVERIE_ALLOC_BUDGET"]) * 1024)
+    allocBudget.start()
+    session.scheduler.allocBudget = allocBudget
+collector.freeze()
+
+# Debug: REVERIE_SPIKES=<ms> profiles every gameplay frame and writes the
+# profile of any frame slower than that (plus the frames before it) to the
+# cache folder's spikes/ directory
+spikes = None
+if os.environ.get("REVERIE_SPIKES"):
+    spikes = SpikeProfiler(float(os.environ["REVERIE_SPIKES"]))
+
+def spike_info():
+    info = session.describe()
+    info["quality"] = governor.tierName
+    info["gcLastMs"] = round(collector.lastMs, 2)
+    return info
+
+# --- Fonts (loaded on first use, then cached) ---
+def title_font():
+    return resources.font(UI_FONT, 64)
+
+def ui_font():
+    return resources.font(UI_FONT, 28)
+
+def pause_font():
+    return resources.font(None, 72)
+
+def wait_events(timeoutMs):
+    """Block until there's at least one event (or timeoutMs). Returns them all."""
+    event = pygame.event.wait(timeoutMs)
+    if event.type == NOEVENT:
+        return []
+    return [event] + pygame.event.get()
 
 # --- Utility: restart entire game state ---
 def restart_game():
-    global player, playerBullets, enemyBullets, enemySystem
-    player = reset_player_state()
-    playerBullets = BulletSystem(bulletSpeed=10, shootCooldown=150)
-    enemyBullets = BulletSystem(bulletSpeed=6, shootCooldown=500)
-    enemySystem = EnemySystem(WIDTH, HEIGHT)
+    session.reset()
+    session.scheduler.allocBudget = allocBudget
+    saveStates.reset()
     menu.state = "game"
 
 # --- Main loop ---
 running = True
+bombPressed = False
+redraw = True
 while running:
+    if menu.state != "game" or gamePaused:
+        # Nothing moves until there's input
+        frameEvents = wait_events(IDLE_TIMEOUT_MS)
+        frameStart = pacer.idle()
+    else:
+        # Sleep until it's time to read input for the next frame
+        frameStart = pacer.wait()
+        frameEvents = pygame.event.get()
+    if frameEvents:
+        redraw = True
+
     # Process events first (menu may handle some events)
-    for event in pygame.event.get():
+    for event in frameEvents:
         if event.type == QUIT:
             running = False
             break
 
+        # Losing the window pauses the game, so a background or minimised
+        # game costs nothing and nobody gets hit while away
+        if event.type in (WINDOWFOCUSLOST, WINDOWMINIMIZED):
+            if menu.state == "game":
+                gamePaused = True
+            continue
+        if event.type == WINDOWEXPOSED:
+            continue
+
         # Route events to menu when appropriate
         if menu.state == "menu":
             menu.handle_menu_input(event)
+            governor.set_max_render_scale(menu.renderScale)
+            if menu.state == "game" and session.endless != menu.endless:
+                session.endless = menu.endless
+                restart_game()
             continue
         elif menu.state == "controls":
             menu.handle_controls_input(event)
@@ -119,17 +222,45 @@ while running:
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     gamePaused = not gamePaused
+                # Bomb fires on key press (not hold) so one press uses one bomb
+                elif event.key == menu.controls["bomb"] and not gamePaused:
+                    bombPressed = True
+                elif event.key == pygame.K_F5:
+                    saveStates.quick_save()
+                elif event.key == pygame.K_F9:
+                    saveStates.quick_load()
+                elif event.key == pygame.K_F7:
+                    saveStates.seek(session.tick - SEEK_TICKS)
+                elif event.key == pygame.K_F8:
+                    saveStates.seek(session.tick + SEEK_TICKS)
+                elif event.key == pygame.K_F3:
+                    showSystemStats = not showSystemStats
+                elif event.key == pygame.K_F4:
+                    bulletRendererIndex = (bulletRendererIndex + 1) % len(BULLET_RENDERERS)
+                    session.bulletRenderer = BULLET_RENDERERS[bulletRendererIndex][1]
+
+    collector.set_gameplay(menu.state == "game" and not gamePaused)
+
+    # Idle and nothing happened: the screen is already up to date
+    if menu.state != "game" or gamePaused:
+        if not redraw:
+            collector.run_pending()
+            saveStates.write_pending()
+            continue
+    redraw = False
 
     # If menu is active, draw menu and skip game update
     if menu.state == "menu":
         menu.draw_menu(screen)
+        pacer.ready()
         pygame.display.flip()
-        clock.tick(60)
+        pacer.presented()
         continue
     if menu.state == "controls":
         menu.draw_controls(screen)
+        pacer.ready()
         pygame.display.flip()
-        clock.tick(60)
+        pacer.presented()
         continue
 
     # --- GAME STATE UPDATES (menu.state == "game") ---
@@ -138,270 +269,80 @@ while running:
     controls = menu.controls
     keys = pygame.key.get_pressed()
 
-    if not gamePaused:
-        bossSystem.update(enemyBullets,player)
-
-        waveSystem.update(enemySystem, gamePaused,bossSystem)
-
-        # Movement input (continuous)
-        move_left = keys[controls["left"]]
-        move_right = keys[controls["right"]]
-        move_up = keys[controls["up"]]
-        move_down = keys[controls["down"]]
-        is_focus = keys[controls["slow"]]
-        is_shooting = keys[controls["shoot"]]
-
-        # --- Fire cooldown tick-down ---
-        if player["fireCooldown"] > 0:
-            player["fireCooldown"] -= 1
-
-        # --- Chase cooldown tick-down ---
-        if player["chaseCooldown"] > 0:
-            player["chaseCooldown"] -= 1
-
-        # Movement logic with diagonal normalisation
-        speed = player["focusSpeed"] if is_focus else player["normalSpeed"]
-        moveX = 0
-        moveY = 0
-        if move_left:
-            moveX -= 1
-        if move_right:
-            moveX += 1
-        if move_up:
-            moveY -= 1
-        if move_down:
-            moveY += 1
-        if moveX != 0 and moveY != 0:
-            # normalize so diagonal speed equals straight speed
-            moveX *= 0.7071
-            moveY *= 0.7071
-        player["x"] += moveX * speed
-        player["y"] += moveY * speed
-
-        # Boundary clamp
-        player["x"] = max(0, min(WIDTH - player["size"], player["x"]))
-        player["y"] = max(0, min(HEIGHT - player["size"], player["y"]))
-
-        # Shooting (player)
-        if is_shooting and player["fireCooldown"] == 0:
-
-            px = player["x"] + player["size"] // 2
-            py = player["y"]
-            size = player["size"]
-
-            if player["powerLevel"] == 1:
-                # Single forward shot
-                playerBullets.shoot(player["x"], player["y"], player["size"])
-
-            elif player["powerLevel"] == 2:
-                # Single + slight side shot
-                playerBullets.shoot(player["x"], player["y"], player["size"])
-                playerBullets.spawn_custom(px - 8, py, 0, -8)
-
-            elif player["powerLevel"] == 3:
-                # Dual parallel
-                playerBullets.spawn_custom(px - 6, py, 0, -8)
-                playerBullets.spawn_custom(px + 6, py, 0, -8)
-
-            elif player["powerLevel"] == 4:
-                # 3-way spread
-                playerBullets.spawn_custom(px, py, 0, -8)
-                playerBullets.spawn_custom(px, py, -2, -8)
-                playerBullets.spawn_custom(px, py, 2, -8)
-
-            elif player["powerLevel"] >= 5:
-                # 5-way spread
-                for angle in [-4, -2, 0, 2, 4]:
-                    playerBullets.spawn_custom(px, py, angle, -8)
-
-            player["fireCooldown"] = player["fireRate"]
-
-        # Enemy spawn/update/draw calls
-        enemySystem.updateEnemies(
-            enemyBullets,
-            player["x"],
-            player["y"],
-            player["size"],
+    if spikes and not gamePaused and menu.state == "game":
+        spikes.begin()
 
-        )
-        bossSystem.update(enemyBullets,player)
-        playerBullets.updateBullets()
-
-        enemyBullets.updateBullets()
-
-        # --- COLLISIONS ---
-
-        # 1) Enemy bullets hitting player
-        for eb in enemyBullets.bullets[:]:
-            # Calculate player hitbox centre
-            hitbox_x = player["x"] + player["size"] // 2
-            hitbox_y = player["y"] + player["size"] // 2
-
-            # Use circular hitbox collision,
-            if circle_rect_collision(
-                    hitbox_x,
-                    hitbox_y,
-                    HITBOX_RADIUS,
-                    eb.x,
-                    eb.y,
-                    eb.width,
-                    eb.height
-            ):
-
-                # only apply if not invulnerable
-                if not player["invulnerable"]:
-                    player["lives"] -= 1
-                    player["invulnerable"] = True
-                    player["invulnTimer"] = pygame.time.get_ticks()
-                    # remove bullet that hit
-                    try:
-                        enemyBullets.bullets.remove(eb)
-                    except ValueError:
-                        pass
-                    print("HIT BY ENEMY BULLET")
-
-        # invulnerability timeout (300ms)
-        if player["invulnerable"]:
-            if pygame.time.get_ticks() - player["invulnTimer"] > 300:
-                player["invulnerable"] = False
-
-        # 2) Player bullets hitting enemies
-        # iterate copies to allow removal during loops
-        for pb in playerBullets.bullets[:]:
-            for enemy in enemySystem.enemies[:]:
-                if check_collision(pb.x, pb.y, pb.width, pb.height,
-                                   enemy.x, enemy.y, enemy.width, enemy.height):
-                    enemy.health -= 1
-                    # remove the bullet that hit
-                    try:
-                        playerBullets.bullets.remove(pb)
-                    except ValueError:
-                        pass
-                    # if enemy died, remove it
-                    if enemy.health <= 0:
-                        try:
-                            player["powerValue"] += 2  # Gain 2 power per kill
-                            update_power_level(player)
-                            enemySystem.enemies.remove(enemy)
-                        except ValueError:
-                            pass
-                    break  # bullet can only hit one enemy
-
-            # 2B) Player bullets hitting Boss (Rumia)
-            if bossSystem.spawned and not bossSystem.dead:
-                for pb in playerBullets.bullets[:]:
-                    if check_collision(
-                            pb.x, pb.y, pb.width, pb.height,
-                            bossSystem.x - bossSystem.width // 2,
-                            bossSystem.y,
-                            bossSystem.width,
-                            bossSystem.height
-                    ):
-                        bossSystem.hp -= 1  # Reduce boss HP
-
-                        try:
-                            playerBullets.bullets.remove(pb)
-                        except ValueError:
-                            pass
-
-                        # Check if boss dies
-                        if bossSystem.hp <= 0:
-                            bossSystem.dead = True
-
-        # 3) Enemy colliding with player (instant death for testing)
-        for enemy in enemySystem.enemies[:]:
-            # Calculate player hitbox centre
-            hitbox_x = player["x"] + player["size"] // 2
-            hitbox_y = player["y"] + player["size"] // 2
-
-            # Use circular hitbox collision for enemy body
-            if circle_rect_collision(
-                    hitbox_x,
-                    hitbox_y,
-                    HITBOX_RADIUS,
-                    enemy.x,
-                    enemy.y,
-                    enemy.width,
-                    enemy.height
-
-            ):
-                player["lives"] = 0
-                print("HIT BY ENEMY BODY ")
-                break
-        # 3B) Player colliding with Boss body
-        if bossSystem.spawned and not bossSystem.dead:
-
-            hitbox_x = player["x"] + player["size"] // 2
-            hitbox_y = player["y"] + player["size"] // 2
-
-            if circle_rect_collision(
-                    hitbox_x,
-                    hitbox_y,
-                    HITBOX_RADIUS,
-                    bossSystem.x - bossSystem.width // 2,
-                    bossSystem.y,
-                    bossSystem.width,
-                    bossSystem.height
-            ):
-                if not player["invulnerable"]:
-                    player["lives"] -= 1
-                    player["invulnerable"] = True
-                    player["invulnTimer"] = pygame.time.get_ticks()
+    if not gamePaused and menu.state == "game":
+        inputs = {action: keys[controls[action]] for action in ACTIONS if action != "bomb"}
+        inputs["bomb"] = bombPressed
+        bombPressed = False
+        inputs["load"] = governor.load_level()
+
+        session.step(inputs)
+        saveStates.on_step()
+        session.enemyBullets.maxBullets = governor.settings["bulletCap"]
 
         # Check game over
-        if player["lives"] <= 0:
+        if session.gameOver:
             menu.state = "gameover"
 
-        # --- DRAW ---
-        screen.fill((10, 10, 30))  # dark background
-
-        # Draw bullets and enemies then player (simple layering)
-        playerBullets.drawBullets(screen)
-        enemySystem.drawEnemies(screen)
-        enemyBullets.drawBullets(screen)
-
-        #bossDrawing
-        if bossSystem.spawned and not bossSystem.dead:
-            bossSystem.draw(screen)
-
-        # Player draw - flash while invulnerable
-        player_color = (0, 255, 255) if not player["invulnerable"] or (pygame.time.get_ticks() % 300 < 150) else (100, 100, 100)
-        pygame.draw.rect(screen, player_color, (player["x"], player["y"], player["size"], player["size"]))
-
-
-
-    # Draw visible hitbox only when in focus mode (Touhou-style)
-    if is_focus:
-        hitbox_x = player["x"] + player["size"] // 2
-        hitbox_y = player["y"] + player["size"] // 2
-
-        pygame.draw.circle(
-            screen,
-            (255, 255, 255),  # white for high contrast
-            (hitbox_x, hitbox_y),
-            HITBOX_RADIUS,
-            1  # outline only
-        )
-
-    # I draw a small visual hitbox when the player is in focus mode.
-    # This represents the true collision area of the player and is intentionally
-    # smaller than the player sprite to allow precise dodging.
-    # The hitbox is only visible in focus mode to reduce screen clutter,
+        # Under heavy load only every other frame is drawn; the simulation
+        # above still ran
+        if menu.state == "game" and not governor.should_render(session.tick):
+            frameMs = (time.perf_counter() - frameStart) * 1000
+            if spikes:
+                spikes.end(session.tick, spike_info)
+            governor.record(frameMs)
+            FRAME_TIME_MS.observe(frameMs)
+            pacer.skipped()
+            collector.run_pending()
+            continue
 
+    # --- DRAW ---
+    # Still drawn while paused so a rewind (F7/F8) shows the frame it reached
+    if menu.state == "game":
+        session.draw(screen, governor.settings)
 
+    player = session.player
 
     # HUD
-    score_text = ui_font.render(f"Lives: {player['lives']}", True, (255, 255, 255))
-    power_text = ui_font.render(
+    score_text = ui_font().render(f"Lives: {player['lives']}", True, (255, 255, 255))
+    power_text = ui_font().render(
         f"Power: {player['powerValue']} (Lv {player['powerLevel']})",
         True,
         (255, 255, 0)
     )
     screen.blit(power_text, (10, 70))
     screen.blit(score_text, (10, 10))
-    ztext = ui_font.render(f"Shoot: {pygame.key.name(controls['shoot'])}", True, (200, 200, 200))
+    ztext = ui_font().render(f"Shoot: {pygame.key.name(controls['shoot'])}", True, (200, 200, 200))
     screen.blit(ztext, (10, 40))
-
+    bomb_text = ui_font().render(
+        f"Bombs: {player['bombs']}  Score: {player['score']}  Graze: {player['graze']}",
+        True,
+        (180, 220, 255)
+    )
+    screen.blit(bomb_text, (10, 100))
+    if session.endless:
+        wave_text = ui_font().render(f"Endless wave {session.waveSystem.phase}", True, (200, 200, 200))
+        screen.blit(wave_text, (600, 10))
+    if governor.tier > 0:
+        quality_text = ui_font().render(f"Quality: {governor.tierName}", True, (255, 150, 150))
+        screen.blit(quality_text, (10, 130))
+
+    if showSystemStats:
+        y = 170
+        for name, hz, calls, lastMs, avgMs, maxMs in session.scheduler.stats():
+            line = f"{name:<11} {hz:>4.0f} Hz  last {lastMs:5.2f}  avg {avgMs:5.2f}  max {maxMs:5.2f} ms"
+            screen.blit(ui_font().render(line, True, (160, 255, 160)), (10, y))
+            y += 24
+
+        jitterAvg, jitterMax, latencyAvg, latencyMax = pacer.stats()
+        line = f"pacing ({pacer.mode}): jitter avg {jitterAvg:4.2f} max {jitterMax:4.2f} ms"
+        screen.blit(ui_font().render(line, True, (160, 220, 255)), (10, y))
+        line = f"input to flip: avg {latencyAvg:5.2f} max {latencyMax:5.2f} ms"
+        screen.blit(ui_font().render(line, True, (160, 220, 255)), (10, y + 24))
+        line = f"bullets drawn with {BULLET_RENDERERS[bulletRendererIndex][0]} (F4)"
+        screen.blit(ui_font().render(line, True, (160, 220, 255)), (10, y + 48))
 
     # I implemented a pause system that freezes all gameplay updates when activated.
     # This prevents unfair deaths, allows players to take breaks, and improves accessibility.
@@ -413,14 +354,13 @@ while running:
         overlay.set_alpha(200)
         overlay.fill((0, 0, 0))
         screen.blit(overlay, (0, 0))
-        go_text = title_font.render("GAME OVER", True, (220, 50, 50))
-        info = ui_font.render("Press R to restart or Q to quit", True, (255, 255, 255))
+        go_text = title_font().render("GAME OVER", True, (220, 50, 50))
+        info = ui_font().render("Press R to restart or Q to quit", True, (255, 255, 255))
         screen.blit(go_text, (WIDTH//2 - go_text.get_width()//2, HEIGHT//2 - 50))
         screen.blit(info, (WIDTH//2 - info.get_width()//2, HEIGHT//2 + 20))
 
     if gamePaused:
-        pause_font = pygame.font.Font(None, 72)
-        pause_text = pause_font.render("PAUSED", True, (255, 255, 255))
+        pause_text = pause_font().render("PAUSED", True, (255, 255, 255))
         screen.blit(
             pause_text,
             (
@@ -429,14 +369,26 @@ while running:
             )
         )
 
+    if spikes:
+        spikes.end(session.tick, spike_info)
+
+    # Work time excludes the wait for the present deadline
+    frameMs = pacer.ready()
     pygame.display.flip()
-    clock.tick(60)
+    pacer.presented()
+    if menu.state == "game" and not gamePaused:
+        governor.record(frameMs)
+        FRAME_TIME_MS.observe(frameMs)
+    # Requested collections and quicksave writes run here, in the time the
+    # frame would sleep
+    collector.run_pending()
+    saveStates.write_pending()
 
 
 # Clean exit
+saveStates.write_pending()
+events.stop()
+metrics.stop()
+session.close()
 pygame.quit()
 sys.exit()
-
-
-
-
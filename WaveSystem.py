@@ -1,99 +1,187 @@
-import pygame
-class WaveSystem:
-    def __init__(self):
-
-        # Wave Counter
-        self.currentWave = 1
+import heapq
+import json
+import os
+
+from enemy_script import SCRIPTS
+from enemy_system import ENEMY_PROFILES
+from event_log import events
+from gc_control import collector
+
+STAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stages")
+DEFAULT_STAGE = os.path.join(STAGE_DIR, "stage1.json")
+
+EVENT_TYPES = ("spawn", "group", "clear", "boss", "phase", "loop")
+
+
+def load_stage(path):
+    """Read a stage file (.json or .toml) into a dict."""
+    if path.endswith(".toml"):
+        import tomllib  # Python 3.11+
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compile_stage(stage, source="<stage>"):
+    """
+    Turn stage data into a list of (tick, seq, event) sorted by tick.
+    "group" entries are expanded into one "spawn" per enemy here, so the
+    per-frame code only ever sees single events.
+    """
+    lanes = stage.get("lanes", [90, 150, 210])
+    events = []
+
+    def add(tick, event):
+        events.append((tick, len(events), event))
+
+    for index, raw in enumerate(stage.get("events", [])):
+        kind = raw.get("type")
+        if kind not in EVENT_TYPES:
+            raise ValueError(f"{source}: event {index} has unknown type {kind!r}")
+        if "tick" not in raw:
+            raise ValueError(f"{source}: event {index} ({kind}) has no tick")
+        tick = int(raw["tick"])
+
+        if kind in ("spawn", "group"):
+            enemy = raw.get("enemy", "BlueFairy")
+            if enemy not in ENEMY_PROFILES:
+                raise ValueError(f"{source}: event {index} uses unknown enemy {enemy!r}")
+            script = raw.get("script", "fairy")
+            if script is not None and script not in SCRIPTS:
+                raise ValueError(f"{source}: event {index} uses unknown script {script!r}")
+
+        if kind == "spawn":
+            lane = raw.get("lane", 0)
+            add(tick, {
+                "type": "spawn",
+                "enemy": enemy,
+                "pattern": raw.get("pattern"),
+                "targetY": raw.get("targetY", lanes[lane % len(lanes)]),
+                "x": raw.get("x"),
+                "script": script,
+            })
+
+        elif kind == "group":
+            # count enemies, one every interval ticks, cycling through the lanes
+            count = int(raw.get("count", 1))
+            interval = int(raw.get("interval", 24))
+            firstLane = raw.get("lane", 0)
+            for i in range(count):
+                add(tick + i * interval, {
+                    "type": "spawn",
+                    "enemy": enemy,
+                    "pattern": raw.get("pattern"),
+                    "targetY": lanes[(firstLane + i) % len(lanes)],
+                    "x": None,
+                    "script": script,
+                })
+
+        elif kind == "loop":
+            to = int(raw.get("to", 0))
+            if to >= tick:
+                raise ValueError(f"{source}: loop at tick {tick} must jump back (to < tick)")
+            # "at" keeps the loop's own stage tick; its queue tick moves on every lap
+            add(tick, {"type": "loop", "to": to, "at": tick})
+
+        else:
+            event = dict(raw)
+            del event["tick"]
+            add(tick, event)
+
+    events.sort()
+    return events
 
-        #Enemies Per Wave
-        self.enemiesPerWave = 6
-        self.enemiesSpawned = 0
 
-        self.spawnDelay = 400  # ms between enemy spawns
-        self.lastSpawnTime = 0
+class WaveSystem:
+    def __init__(self, stagePath=DEFAULT_STAGE):
 
-        self.waveCooldown = False
-        self.waveCooldownStart = 0
-        self.WAVE_COOLDOWN_TIME = 2000  # ms between waves
+        self.stagePath = stagePath
+        self.stage = load_stage(stagePath)
+        self.stageName = self.stage.get("name", os.path.basename(stagePath))
 
-        self.waveActive = True
+        # Compiled once; the heap is refilled from it when a loop event fires
+        self.compiled = compile_stage(self.stage, stagePath)
 
-        self.groupIndex = 0
-        self.groupsPerPhase = 3  # Touhou-style: multiple groups per phase
-        self.groupCooldown = False
-        self.groupCooldownStart = 0
-        GROUP_COOLDOWN_TIME = 1200  # ms between groups
+        # Stage clock (frames). It stops while a "clear" or "boss" event is waiting
+        self.tick = 0
+        self.waitingFor = None  # None, "clear" or "boss"
 
-        #Phase Timing
+        # Phase label, set by "phase" events
         self.phase = 0
-        self.phaseStartTime = pygame.time.get_ticks()
-        self.PHASE_DURATION = 10000 #10 seconds
 
-    def update(self, enemySystem, gamePaused,bossSystem):
-            if gamePaused:
-                return
+        # Nothing after the first loop is ever reached: the loop jumps back first
+        loops = [t for t, _, e in self.compiled if e["type"] == "loop"]
+        self.queue = [c for c in self.compiled if not loops or c[0] <= loops[0]]
+        heapq.heapify(self.queue)
+        self.seq = len(self.compiled)
 
-             # If boss is active or dead logic is running, stop waves
+    def update(self, enemySystem, gamePaused, bossSystem, ticks=1):
+        """Advance the stage clock by `ticks` frames and run the events due."""
+        if gamePaused:
+            return
+
+        # ---------------- WAITING ON THE FIELD ----------------
+        if self.waitingFor == "boss":
             if bossSystem.spawned and not bossSystem.dead:
                 return
-
-            currentTime = pygame.time.get_ticks()
-            if self.phase >= 3 and not bossSystem.spawned:
-                bossSystem.spawn()
+            self.waitingFor = None
+        elif self.waitingFor == "clear":
+            if enemySystem.enemies:
                 return
+            self.waitingFor = None
+            collector.request("clear")  # field just emptied: quiet moment
+
+        # ---------------- DUE EVENTS ----------------
+        queue = self.queue
+        last = self.tick + ticks - 1
+        while queue and queue[0][0] <= last:
+            tick, _, event = heapq.heappop(queue)
+            self.run_event(tick, event, enemySystem, bossSystem)
+            if self.waitingFor:
+                # Clock stops here; the rest of the timeline resumes once the
+                # field condition is met
+                self.tick = max(self.tick, tick)
+                return
+
+        self.tick += ticks
+
+    def run_event(self, tick, event, enemySystem, bossSystem):
+        kind = event["type"]
 
-            # ---------------- PHASE TIMER ----------------
-            if currentTime - self.phaseStartTime >= self.PHASE_DURATION:
-                self.phase += 1
-                self.phaseStartTime = currentTime
-                self.groupIndex = 0
-                self.waveActive = True
-                self.enemiesSpawned = 0
-                self.groupCooldown = False
-
-            # ---------------- SPAWNING GROUP ----------------
-            if self.waveActive:
-                if currentTime - self.lastSpawnTime >= self.spawnDelay:
-                    if self.enemiesSpawned < self.enemiesPerWave:
-
-                        if self.phase == 0:
-                            enemyType = "BlueFairy"
-                        elif self.phase == 1:
-                            enemyType = "PinkFairy"
-                        else:
-                            enemyType = "PinkFairyGood"
-
-                        lane_targets = [90, 150, 210]
-                        targetY = lane_targets[self.enemiesSpawned % len(lane_targets)]
-
-                        enemySystem.spawnEnemy(
-                            enemy_type=enemyType,
-                            targetY=targetY
-                        )
-
-                        self.enemiesSpawned += 1
-                        self.lastSpawnTime = currentTime
-                    else:
-                        # Group finished spawning
-                        self.waveActive = False
-
-            # ---------------- GROUP COMPLETION ----------------
-            if not self.waveActive and len(enemySystem.enemies) == 0:
-                if not self.groupCooldown:
-                    self.groupCooldown = True
-                    self.groupCooldownStart = currentTime
-
-            # ---------------- START NEXT GROUP ----------------
-            if self.groupCooldown:
-                if currentTime - self.groupCooldownStart >= 1200:
-                    self.groupIndex += 1
-                    self.groupCooldown = False
-
-                    if self.groupIndex < self.groupsPerPhase:
-                        # Start next group in same phase
-                        self.enemiesSpawned = 0
-                        self.enemiesPerWave = 4 + self.groupIndex * 2
-                        self.waveActive = True
-                    else:
-                        # Phase continues but no more groups
-                        self.waveActive = False
+        if kind == "spawn":
+            enemySystem.spawnEnemy(
+                enemy_type=event["enemy"],
+                targetY=event["targetY"],
+                bullet_pattern=event["pattern"],
+                x=event["x"],
+                script=event["script"],
+            )
+
+        elif kind == "clear":
+            if enemySystem.enemies:
+                self.waitingFor = "clear"
+            else:
+                collector.request("clear")
+
+        elif kind == "boss":
+            if not bossSystem.spawned:
+                bossSystem.spawn()
+                events.emit("boss_spawn")
+                collector.request("boss")
+            self.waitingFor = "boss"
+
+        elif kind == "phase":
+            self.phase = event.get("phase", self.phase + 1)
+            events.emit("phase", self.phase)
+            collector.request("phase")
+
+        elif kind == "loop":
+            # Replay [to, at) of the stage so it starts again now; pushed
+            # lazily so endless stages never hold more than one lap of events
+            offset = tick - event["to"]
+            for t, _, e in self.compiled:
+                if event["to"] <= t < event["at"] or e is event:
+                    heapq.heappush(self.queue, (t + offset, self.seq, e))
+                    self.seq += 1
@@ -0,0 +1,102 @@
+# bomb_system.py
+import math
+import pygame
+
+
+class BombSystem:
+    """Player bomb: an expanding ring that cancels enemy bullets.
+
+    The radius grows over `duration` frames, so the bullets are cancelled a
+    band at a time instead of all in one frame. With fullScreen=True every
+    enemy bullet is cleared on each frame of the bomb instead.
+    """
+
+    def __init__(self, screenWidth=800, screenHeight=900, duration=30, fullScreen=False):
+        self.screenWidth = screenWidth
+        self.screenHeight = screenHeight
+        self.duration = duration  # frames
+        self.fullScreen = fullScreen
+
+        # Far enough to reach every corner from anywhere on screen
+        self.maxRadius = math.hypot(screenWidth, screenHeight)
+
+        self.active = False
+        self.timer = 0
+        self.radius = 0
+        self.x = 0
+        self.y = 0
+
+        self.flashSurface = None  # created on first full-screen bomb
+
+    def __getstate__(self):
+        # Surfaces can't be pickled (save-states); the flash is rebuilt on demand
+        state = self.__dict__.copy()
+        state["flashSurface"] = None
+        return state
+
+    def trigger(self, player):
+        """Start a bomb from the player's centre. Returns True if one was used."""
+        if self.active or player["bombs"] <= 0:
+            return False
+
+        player["bombs"] -= 1
+        self.active = True
+        self.timer = 0
+        self.radius = 0
+        self.x = player["x"] + player["size"] / 2
+        self.y = player["y"] + player["size"] / 2
+        return True
+
+    def update(self, bullet_system, item_system, mass=None):
+        """Advance the ring and cancel bullets inside it.
+
+        mass is the session's ShardedBulletStore, if it has one; its bullets
+        are cancelled the same way. Returns (score, power) paid out directly
+        for bullets that could not become items this frame.
+        """
+        if not self.active:
+            return 0, 0
+
+        self.timer += 1
+
+        # Ease out so most of the screen is covered early in the bomb
+        progress = self.timer / self.duration
+        self.radius = self.maxRadius * (1 - (1 - progress) ** 2)
+
+        if self.fullScreen:
+            cancelled = bullet_system.cancel_all()
+            if mass is not None:
+                cancelled = cancelled + mass.cancel_all()
+        else:
+            cancelled = bullet_system.cancel_in_radius(self.x, self.y, self.radius)
+            if mass is not None:
+                cancelled += mass.cancel_in_radius(self.x, self.y, self.radius)
+
+        if self.timer >= self.duration:
+            self.active = False
+
+        if not cancelled:
+            return 0, 0
+        return item_system.spawn_cancel_items(cancelled)
+
+    def draw(self, screen, effects=True, scale=1.0):
+        if not self.active:
+            return
+
+        if self.fullScreen:
+            if not effects:
+                return
+            # Short white flash fading out
+            if self.flashSurface is None or self.flashSurface.get_size() != screen.get_size():
+                self.flashSurface = pygame.Surface(screen.get_size())
+                self.flashSurface.fill((255, 255, 255))
+            self.flashSurface.set_alpha(int(120 * (1 - self.timer / self.duration)))
+            screen.blit(self.flashSurface, (0, 0))
+        else:
+            pygame.draw.circle(
+                screen,
+                (180, 220, 255),
+                (int(self.x * scale), int(self.y * scale)),
+                int(self.radius * scale),
+                max(1, int(3 * scale))  # outline only
+            )
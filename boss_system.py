@@ -3,6 +3,9 @@ import pygame
 import random
 import math
 import bullet_system
+from bullet_system import MotionProgram
+from event_log import events
+from metrics import BULLETS_SPAWNED
 class Pattern:
     def __init__(self):
         self.active = False
@@ -48,6 +51,7 @@ class RumiaPatternA(Pattern):
                     )
 
             self.waveCount += 1
+            BULLETS_SPAWNED.inc(3 * 36, "RumiaPatternA")
 
         if self.waveCount >= 2:
             self.active = False
@@ -86,6 +90,7 @@ class RumiaPatternB(Pattern):
                 )
 
             self.wave += 1
+            BULLETS_SPAWNED.inc(18, "RumiaPatternB")
 
         # End after 16 waves
         if self.wave >= 16:
@@ -122,11 +127,13 @@ class RumiaPatternC(Pattern):
                     cx,
                     cy,
                     math.cos(angle) * 5,
-                    math.sin(angle) * 5
+                    math.sin(angle) * 5,
+                    shape="rice"
                 )
 
             self.rotation += 5
             self.fired += 4
+            BULLETS_SPAWNED.inc(4, "RumiaPatternC")
 
         if self.fired >= 256:
             self.active = False
@@ -136,14 +143,10 @@ class RumiaPatternD(Pattern):
     def __init__(self):
         super().__init__()
         self.wave = 0
-        self.storedBullets = []
-        self.redirected = False
 
     def reset(self):
         super().reset()
         self.wave = 0
-        self.storedBullets = []
-        self.redirected = False
 
     def update(self, boss, bullet_system):
         if not self.active:
@@ -154,45 +157,40 @@ class RumiaPatternD(Pattern):
         cx = boss.x
         cy = boss.y
 
-        # Spawn 2 waves of 37 bullets
+        # Spawn 2 waves of 37 bullets. Every bullet stops at frame 120 and is
+        # redirected at the player at frame 150; the bullet system does both
         if self.timer % 60 == 0 and self.wave < 2:
+            program = MotionProgram(
+                stopAt=120 - self.timer,
+                aimAt=150 - self.timer,
+                aimSpeed=6,
+            )
             for i in range(37):
                 angle = math.radians(i * (360 / 37))
 
-                bullet = bullet_system.spawn_custom(
+                bullet_system.spawn_custom(
                     cx,
                     cy,
                     math.cos(angle) * 3,
-                    math.sin(angle) * 3
+                    math.sin(angle) * 3,
+                    program=program,
+                    shape="kunai"
                 )
 
-                self.storedBullets.append(bullet)
-
             self.wave += 1
-
-        # Stop bullets at frame 120
-        if self.timer == 120:
-            for bullet in self.storedBullets:
-                bullet.vx = 0
-                bullet.vy = 0
-
-        # Redirect at frame 150
-        if self.timer == 150 and not self.redirected:
-            for bullet in self.storedBullets:
-                dx = boss.player_x - bullet.x
-                dy = boss.player_y - bullet.y
-                length = math.hypot(dx, dy)
-                if length != 0:
-                    bullet.vx = (dx / length) * 6
-                    bullet.vy = (dy / length) * 6
-            self.redirected = True
+            BULLETS_SPAWNED.inc(37, "RumiaPatternD")
 
         if self.timer > 200:
             self.active = False
 
 
 class Rumia:
-    def __init__(self, screen_width):
+    # Indices of the patterns Rumia may pick from (None = all). The endless
+    # director narrows this to the cheaper patterns when the budget is tight
+    patternPool = None
+
+    def __init__(self, screen_width, rng=random):
+        self.rng = rng  # random.Random owned by the game session (for replays)
         self.active = None
         self.x = screen_width // 2
         self.y = -80                  # start off-screen
@@ -229,6 +227,19 @@ class Rumia:
         self.active = True
         self.x = screen_width // 2
 
+    def respawn(self, max_hp=3000, patternPool=None, screen_width=800):
+        """Bring Rumia back for another fight (endless mode)."""
+        self.max_hp = max_hp
+        self.hp = max_hp
+        self.dead = False
+        self.phase = 1
+        self.patternPool = patternPool
+        self.currentPattern = None
+        self.skillDelay = self.skillCD
+        for p in self.patterns:
+            p.active = False
+        self.spawn(screen_width)
+
     def update(self, bullet_system,player):
 
 
@@ -244,8 +255,9 @@ class Rumia:
             return
 
         # Phase switch
-        if self.hp <= self.max_hp // 2:
+        if self.hp <= self.max_hp // 2 and self.phase != 2:
             self.phase = 2
+            events.emit("boss_phase", 2)
 
         #In order to stop cooldown overlap
         if self.currentPattern and self.currentPattern.onGoing():
@@ -258,10 +270,13 @@ class Rumia:
         if self.skillDelay <= 0:
             self.skillDelay = self.skillCD
 
-            available = [p for p in self.patterns if not p.onGoing()]
+            available = [p for i, p in enumerate(self.patterns)
+                         if not p.onGoing()
+                         and (self.patternPool is None or i in self.patternPool)]
             if available:
-                self.currentPattern = random.choice(available)
+                self.currentPattern = self.rng.choice(available)
                 self.currentPattern.reset()
+                events.emit("pattern", self.patterns.index(self.currentPattern))
 
         if self.currentPattern:
             self.currentPattern.update(self, bullet_system)
@@ -279,21 +294,27 @@ class Rumia:
         self.move_timer += 1
         if self.move_timer >= self.move_cooldown:
             self.move_timer = 0
-            self.x = random.randint(100, 700)
+            self.x = self.rng.randint(100, 700)
 
-    def draw(self, screen):
+    def draw(self, screen, scale=1.0, atlas=None):
         if not self.spawned:
             return
 
-        pygame.draw.rect(
-            screen,
-            (200, 50, 200),
-            (self.x - self.width//2, self.y, self.width, self.height)
-        )
+        if atlas is not None:
+            sprite = atlas.get("block", self.width, self.height, (200, 50, 200), (120, 20, 140), scale=scale)
+            screen.blit(sprite, ((self.x - self.width//2) * scale, self.y * scale))
+        else:
+            pygame.draw.rect(
+                screen,
+                (200, 50, 200),
+                ((self.x - self.width//2) * scale, self.y * scale,
+                 self.width * scale, self.height * scale)
+            )
 
         # HP bar
         hp_ratio = self.hp / self.max_hp
-        pygame.draw.rect(screen, (255, 0, 0), (100, 20, 600 * hp_ratio, 8))
+        pygame.draw.rect(screen, (255, 0, 0),
+                         (100 * scale, 20 * scale, 600 * hp_ratio * scale, max(1, 8 * scale)))
 
 def update(self, bullet_system, player):
 
@@ -1,7 +1,47 @@
 import pygame
 import math
 
+import sim_clock
+from collision_system import capsule_circle_collision, polyline_circle_collision
+from metrics import BULLETS_SPAWNED
+from collections import deque
+from itertools import compress, repeat
+from operator import attrgetter
+
+# Bullet handles are ints: generation << HANDLE_BITS | slot
+HANDLE_BITS = 20
+SLOT_MASK = (1 << HANDLE_BITS) - 1
+
+# Dead handles/program bullets are dropped every this many updates
+PRUNE_INTERVAL = 30
+
+# Shaped bullets (rice, kunai, arrow...) face their direction of travel,
+# drawn from this many pre-rotated frames (see sprite_atlas)
+ANGLE_STEPS = 32
+ANGLE_STEP = math.tau / ANGLE_STEPS
+
+
+def angle_index(vx, vy):
+    """Frame index of the direction (vx, vy): 0 = right, counting clockwise on screen."""
+    return round(math.atan2(vy, vx) / ANGLE_STEP) % ANGLE_STEPS
+
+
+def face(bullets):
+    """Update the facing of the shaped bullets after their velocity changed."""
+    atan2 = math.atan2
+    for b in bullets:
+        if b.shape is not None and (b.vx or b.vy):
+            b.facing = round(atan2(b.vy, b.vx) / ANGLE_STEP) % ANGLE_STEPS
+
 class Bullet:
+    speed = 0.0  # only ChaseBullet uses its own speed
+    bounces = 0  # wall bounces left (set by a MotionProgram)
+    slot = -1    # handle slot in its BulletSystem, -1 if it has none
+    shape = None  # sprite shape facing the way it flies (None = plain bullet)
+    facing = 0    # angle_index of the velocity, kept up to date for shaped bullets
+    checkAt = 0   # tick of the next hitbox test (see collision_system.bullet_hits)
+    grazed = False  # already counted as a graze
+
     def __init__(self, x, y, vx, vy, width=8, height=8, color=(255, 255, 0)):
         self.x = float(x)
         self.y = float(y)
@@ -23,6 +63,15 @@ class Bullet:
         )
 
 class EnemyBullet:
+    color = (255, 0, 0)
+    speed = 0.0
+    bounces = 0
+    slot = -1
+    shape = None
+    facing = 0
+    checkAt = 0  # tick of the next hitbox test (see collision_system.bullet_hits)
+    grazed = False
+
     def __init__(self, x, y, vx, vy):
         self.x = x
         self.y = y
@@ -36,10 +85,133 @@ class EnemyBullet:
         self.y += self.vy
 
     def draw(self, screen):
-        pygame.draw.rect(screen, (255, 0, 0),
+        pygame.draw.rect(screen, self.color,
                          (self.x, self.y, self.width, self.height))
 
 
+PLAIN_TYPES = (Bullet, EnemyBullet)
+
+
+class MotionProgram:
+    """
+    Scripted motion shared by a volley of bullets (spawn_custom(..., program=)).
+
+    All bullets of a program were spawned on the same tick, so one age counter
+    covers them all and the timed steps (stop, re-aim) are a single pass over
+    the volley on that tick. Continuous steps (acceleration, turning, speed
+    limits, wall bounce) are one tight loop per program with the constants
+    worked out once, instead of a Python loop per pattern.
+
+    accel       change of speed per tick
+    angularVel  turn per tick, radians (positive turns clockwise on screen)
+    minSpeed / maxSpeed   limits for accel
+    stopAt      age (ticks after spawn) at which the bullets stop dead
+    aimAt       age at which they turn towards the target at aimSpeed
+    bounce      how many times each bullet bounces off the side/top walls
+    """
+
+    def __init__(self, accel=0.0, angularVel=0.0, minSpeed=0.0, maxSpeed=None,
+                 stopAt=None, aimAt=None, aimSpeed=6.0, bounce=0):
+        self.accel = accel
+        self.angularVel = angularVel
+        self.minSpeed = minSpeed
+        self.maxSpeed = maxSpeed
+        self.stopAt = stopAt
+        self.aimAt = aimAt
+        self.aimSpeed = aimSpeed
+        self.bounce = bounce
+
+        self.age = 0
+        self.stopped = False
+        self.bullets = []
+
+    def __getstate__(self):
+        # The bullets are saved by BulletSystem.get_state as indices
+        state = self.__dict__.copy()
+        state["bullets"] = []
+        return state
+
+    def continuous(self):
+        return bool(self.accel or self.angularVel or self.bounce)
+
+    def finished(self):
+        """Nothing left to do: the bullets just fly straight from here on."""
+        if self.continuous() and not self.stopped:
+            return False
+        return all(t is None or t < self.age for t in (self.stopAt, self.aimAt))
+
+    def run(self, targetX, targetY, screenWidth):
+        age = self.age
+        bullets = self.bullets
+
+        if age == self.stopAt:
+            for b in bullets:
+                b.vx = 0.0
+                b.vy = 0.0
+            self.stopped = True
+
+        if age == self.aimAt:
+            speed = self.aimSpeed
+            hypot = math.hypot
+            for b in bullets:
+                dx = targetX - b.x
+                dy = targetY - b.y
+                length = hypot(dx, dy)
+                if length != 0:
+                    b.vx = dx / length * speed
+                    b.vy = dy / length * speed
+                b.checkAt = 0
+            self.stopped = False
+            face(bullets)
+
+        if not self.stopped and (self.accel or self.angularVel):
+            turn = self.angularVel
+            c = math.cos(turn)
+            s = math.sin(turn)
+            accel = self.accel
+            lo = self.minSpeed
+            hi = self.maxSpeed if self.maxSpeed is not None else math.inf
+            hypot = math.hypot
+            for b in bullets:
+                vx = b.vx
+                vy = b.vy
+                if turn:
+                    vx, vy = vx * c - vy * s, vx * s + vy * c
+                if accel:
+                    speed = hypot(vx, vy)
+                    if speed:
+                        k = min(hi, max(lo, speed + accel)) / speed
+                        vx *= k
+                        vy *= k
+                b.vx = vx
+                b.vy = vy
+            if accel > 0:
+                # Speeding up: the safe frames worked out at the old speed are void
+                for b in bullets:
+                    b.checkAt = 0
+            if turn:
+                face(bullets)
+
+        if self.bounce:
+            # Reflect before the move so bullets never leave through a wall
+            for b in bullets:
+                if not b.bounces:
+                    continue
+                x = b.x + b.vx
+                if x < 0 or x > screenWidth - b.width:
+                    b.vx = -b.vx
+                    b.bounces -= 1
+                elif b.y + b.vy < 0:
+                    b.vy = -b.vy
+                    b.bounces -= 1
+                else:
+                    continue
+                if b.shape is not None:
+                    b.facing = angle_index(b.vx, b.vy)
+
+        self.age = age + 1
+
+
 class BulletSystem:
     def __init__(self, bulletSpeed=10, shootCooldown=150, screenWidth=800, screenHeight=600):
         self.bullets = []
@@ -53,11 +225,29 @@ class BulletSystem:
         # used for spiral patterns (each BulletSystem instance has its own)
         self.spiral_angle = 0.0
 
+        # Hard cap set by the quality governor under heavy load (None = no cap)
+        self.maxBullets = None
+
+        # Straight and curvy lasers (few objects, each drawn as one line)
+        self.lasers = []
+
+        # Active MotionPrograms (see spawn_custom)
+        self.programs = []
+        self.updates = 0
+
+        # Generational handles (see handle()). Only bullets that were given
+        # a handle, a group or a program take a slot.
+        self.slots = []
+        self.generations = []
+        self.freeSlots = []
+        self.slotsInUse = 0
+        self.groups = {}  # name -> handles
+
     # ---------- PLAYER SHOOTING (keeps old API .shoot) ----------
 
     def shoot(self, playerX, playerY, playerSize):
         """Fire a single bullet straight up from player centre."""
-        currentTime = pygame.time.get_ticks()
+        currentTime = sim_clock.get_ticks()
         if currentTime - self.lastShotTime < self.shootCooldown:
             return
 
@@ -106,6 +296,7 @@ class BulletSystem:
         vx = dx / dist * speed
         vy = dy / dist * speed
         self.bullets.append(Bullet(x, y, vx, vy, color=color))
+        BULLETS_SPAWNED.inc(1, "shoot_aimed")
 
     def shoot_radial(self, x, y, count=16, speed=None, color=(255, 120, 120)):
         """Perfect circle of bullets (classic Touhou 'flower' burst)."""
@@ -117,6 +308,7 @@ class BulletSystem:
             vx = math.cos(angle) * speed
             vy = math.sin(angle) * speed
             self.bullets.append(Bullet(x, y, vx, vy, color=color))
+        BULLETS_SPAWNED.inc(count, "shoot_radial")
 
     def shoot_spread(self, x, y, base_angle, spread_angle, count=7,
                      speed=None, color=(255, 180, 80)):
@@ -136,6 +328,7 @@ class BulletSystem:
             vx = math.cos(angle) * speed
             vy = math.sin(angle) * speed
             self.bullets.append(Bullet(x, y, vx, vy, color=color))
+        BULLETS_SPAWNED.inc(len(angles), "shoot_spread")
 
     def shoot_spiral(self, x, y, count=8, step=0.2, speed=None,
                      color=(200, 120, 255)):
@@ -148,13 +341,22 @@ class BulletSystem:
             vx = math.cos(angle) * speed
             vy = math.sin(angle) * speed
             self.bullets.append(Bullet(x, y, vx, vy, color=color))
+        BULLETS_SPAWNED.inc(count, "shoot_spiral")
 
         # slowly rotate the spiral over time
         self.spiral_angle += step
 
     # ---------- UPDATE / DRAW ----------
 
-    def updateBullets(self):
+    def updateBullets(self, targetX=0.0, targetY=0.0):
+        """Move and cull bullets; target is where re-aiming programs aim."""
+        self.updates += 1
+        if self.updates % PRUNE_INTERVAL == 0 and (self.programs or self.groups):
+            self.prune()
+
+        for program in self.programs:
+            program.run(targetX, targetY, self.screenWidth)
+
         for bullet in self.bullets:
             bullet.update()
 
@@ -165,16 +367,247 @@ class BulletSystem:
             if -margin <= b.x <= self.screenWidth + margin
             and -margin <= b.y <= self.screenHeight + margin
         ]
+        if self.slotsInUse:
+            self.release_offscreen(margin)
+
+        if self.maxBullets is not None:
+            self.cap(self.maxBullets)
+
+        if self.lasers:
+            for laser in self.lasers:
+                laser.update()
+            self.lasers = [
+                l for l in self.lasers
+                if not l.expired(self.screenWidth, self.screenHeight, margin)
+            ]
 
-        #For custom bullets for Rumia
-
-    def spawn_custom(self, x, y, vx, vy):
+    def cap(self, maxBullets):
+        """Drop the oldest bullets down to maxBullets. Lasers don't count."""
+        # Bullets are appended as they spawn, so the front of the list is
+        # the oldest
+        excess = len(self.bullets) - maxBullets
+        if excess > 0:
+            if self.slotsInUse:
+                self.release(self.bullets[:excess])
+            del self.bullets[:excess]
+
+    def prune(self):
+        """Drop dead bullets from programs and stale handles from groups."""
+        for program in self.programs:
+            program.bullets = [b for b in program.bullets if b.slot >= 0]
+        self.programs = [
+            p for p in self.programs if p.bullets and not p.finished()
+        ]
+        for name in list(self.groups):
+            self.group(name)
+
+    # ---------- HANDLES / GROUPS ----------
+    # A handle stays valid only while its bullet is in the store: when the
+    # bullet leaves (culled, hit, cancelled, capped) its slot's generation is
+    # bumped, so old handles to it just resolve to None.
+
+    def handle(self, bullet):
+        slot = bullet.slot
+        if slot < 0:
+            if self.freeSlots:
+                slot = self.freeSlots.pop()
+            else:
+                slot = len(self.slots)
+                self.slots.append(None)
+                self.generations.append(0)
+            self.slots[slot] = bullet
+            bullet.slot = slot
+            self.slotsInUse += 1
+        return self.generations[slot] << HANDLE_BITS | slot
+
+    def get(self, handle):
+        """The bullet for a handle, or None if it's gone."""
+        slot = handle & SLOT_MASK
+        if slot < len(self.slots) and self.generations[slot] == handle >> HANDLE_BITS:
+            return self.slots[slot]
+        return None
+
+    def release(self, bullets):
+        """Free the slots of bullets leaving the store."""
+        slots = self.slots
+        generations = self.generations
+        for b in bullets:
+            slot = b.slot
+            if slot >= 0:
+                slots[slot] = None
+                generations[slot] += 1
+                self.freeSlots.append(slot)
+                self.slotsInUse -= 1
+                b.slot = -1
+
+    def release_offscreen(self, margin):
+        # Only slotted bullets are checked, not the whole store
+        w = self.screenWidth + margin
+        h = self.screenHeight + margin
+        self.release([
+            b for b in self.slots
+            if b is not None and not (-margin <= b.x <= w and -margin <= b.y <= h)
+        ])
+
+    def remove(self, bullet):
+        """Remove one bullet (e.g. it hit something)."""
+        try:
+            self.bullets.remove(bullet)
+        except ValueError:
+            return
+        if bullet.slot >= 0:
+            self.release((bullet,))
+
+    def group(self, name):
+        """Live bullets of a group; its stale handles are dropped on the way."""
+        handles = self.groups.get(name)
+        if not handles:
+            return []
+        generations = self.generations
+        live = [h for h in handles if generations[h & SLOT_MASK] == h >> HANDLE_BITS]
+        if not live:
+            del self.groups[name]
+            return []
+        self.groups[name] = live
+        slots = self.slots
+        return [slots[h & SLOT_MASK] for h in live]
+
+    def group_stop(self, name):
+        for b in self.group(name):
+            b.vx = 0.0
+            b.vy = 0.0
+
+    def group_redirect(self, name, targetX, targetY, speed):
+        """Aim every bullet of the group at the target."""
+        hypot = math.hypot
+        bullets = self.group(name)
+        for b in bullets:
+            dx = targetX - b.x
+            dy = targetY - b.y
+            length = hypot(dx, dy)
+            if length != 0:
+                b.vx = dx / length * speed
+                b.vy = dy / length * speed
+            b.checkAt = 0
+        face(bullets)
+
+    def group_cancel(self, name):
+        """Remove the whole group from the store. Returns the cancelled bullets."""
+        cancelled = self.group(name)
+        self.groups.pop(name, None)
+        if cancelled:
+            dead = set(map(id, cancelled))
+            self.bullets = [b for b in self.bullets if id(b) not in dead]
+            self.release(cancelled)
+        return cancelled
+
+    # ---------- BULK CANCELLATION (bombs, boss phase clears) ----------
+
+    def cancel_in_radius(self, cx, cy, radius):
+        """Remove every bullet whose centre is inside the circle in one masked pass.
+
+        Lasers the circle reaches go too, warming up or live, as in
+        cancel_all. Returns the list of cancelled bullets (lasers aren't in
+        it) so the caller can turn them into items.
+        """
+        if self.lasers:
+            self.lasers = [
+                l for l in self.lasers
+                if not polyline_circle_collision(*zip(*l.points()), l.width / 2, cx, cy, radius)
+            ]
+        r2 = radius * radius
+        bullets = self.bullets
+        mask = [
+            (b.x + b.width / 2 - cx) ** 2 + (b.y + b.height / 2 - cy) ** 2 <= r2
+            for b in bullets
+        ]
+        cancelled = list(compress(bullets, mask))
+        if cancelled:
+            self.bullets = list(compress(bullets, [not m for m in mask]))
+            if self.slotsInUse:
+                self.release(cancelled)
+        return cancelled
+
+    def take_plain(self):
+        """
+        Remove and return the plain bullets: Bullets and EnemyBullets with no
+        handle (so no program or group) and no shape. GameSession's sharded
+        mode hands them to its ShardedBulletStore.
+        """
+        bullets = self.bullets
+        plain = [type(b) in PLAIN_TYPES and b.slot < 0 and b.shape is None for b in bullets]
+        taken = list(compress(bullets, plain))
+        if taken:
+            self.bullets = list(compress(bullets, [not p for p in plain]))
+        return taken
+
+    def cancel_all(self):
+        """Remove every bullet at once (full-screen clear). Lasers go too."""
+        cancelled = self.bullets
+        self.bullets = []
+        self.lasers = []
+        if self.slotsInUse:
+            self.release(cancelled)
+        return cancelled
+
+    # For custom bullets for Rumia
+    def spawn_custom(self, x, y, vx, vy, program=None, group=None, shape=None):
+        """
+        Spawn an enemy bullet, optionally with a MotionProgram and/or in a
+        named group. shape gives it a sprite that faces its direction.
+        """
         bullet = EnemyBullet(x, y, vx, vy)
+        if shape is not None:
+            bullet.shape = shape
+            bullet.facing = angle_index(vx, vy)
         self.bullets.append(bullet)
+        if program is not None:
+            if not program.bullets:
+                self.programs.append(program)
+            program.bullets.append(bullet)
+            self.handle(bullet)  # the slot tells the program when it's gone
+            if program.bounce:
+                bullet.bounces = program.bounce
+        if group is not None:
+            self.groups.setdefault(group, []).append(self.handle(bullet))
         return bullet
 
+    def spawn_laser(self, x, y, angle, length, **kwargs):
+        laser = Laser(x, y, angle, length, **kwargs)
+        self.lasers.append(laser)
+        return laser
+
+    def spawn_curvy_laser(self, x, y, vx, vy, **kwargs):
+        laser = CurvyLaser(x, y, vx, vy, **kwargs)
+        self.lasers.append(laser)
+        return laser
+
+    def lasers_hit(self, cx, cy, radius):
+        """First laser touching the circle, or None."""
+        for laser in self.lasers:
+            if laser.hits(cx, cy, radius):
+                return laser
+        return None
+
+
+    def drawBullets(self, screen, simple=False, scale=1.0, renderer=None):
+        # Optional whole-list renderer (see surfarray_renderer); it returns
+        # False when it can't draw to this surface, or has no simple look
+        if renderer is not None and renderer.draw(screen, self.bullets, scale, simple):
+            return
+
+        if simple:
+            draw_simple(screen, self.bullets, scale)
+            return
+
+        if scale != 1.0:
+            # Low-resolution playfield: every bullet is one scaled filled rect
+            # (fill truncates the floats itself, cheaper than int() here)
+            fill = screen.fill
+            for b in self.bullets:
+                fill(b.color, (b.x * scale, b.y * scale, b.width * scale, b.height * scale))
+            return
 
-    def drawBullets(self, screen)   :
         for bullet in self.bullets:
             bullet.draw(screen)
 
@@ -195,12 +628,83 @@ class BulletSystem:
                and -margin <= b.y <= self.screenHeight + margin
         ]
 
-    def drawChaseBullets(self, screen):
+    def drawLasers(self, screen, scale=1.0):
+        # One polyline call per laser; the bright core only while it can hit
+        lines = pygame.draw.lines
+        for laser in self.lasers:
+            points = laser.points()
+            if scale != 1.0:
+                points = [(x * scale, y * scale) for x, y in points]
+            if type(laser) is Laser and not laser.live:
+                lines(screen, laser.color, False, points, 1)  # warning line
+                continue
+            width = max(1, int(laser.width * scale))
+            lines(screen, laser.color, False, points, width)
+            lines(screen, (255, 255, 255), False, points, max(1, width // 3))
+
+    def drawChaseBullets(self, screen, scale=1.0, renderer=None, simple=False):
+        if renderer is not None and renderer.draw(screen, self.chase_bullets, scale, simple):
+            return
+        if simple:
+            draw_simple(screen, self.chase_bullets, scale)
+            return
         for b in self.chase_bullets:
             b.draw(screen)
 
+    # ---------- SAVE-STATES ----------
+
+    def get_state(self):
+        """Snapshot of this system; bullets are copied with capture_bullets."""
+        programs = []
+        if self.programs:
+            # Programs refer to their bullets by index into the packed list;
+            # bullets already culled or hit are dropped here
+            index = {id(b): i for i, b in enumerate(self.bullets)}
+            programs = [
+                (p, [index[id(b)] for b in p.bullets if id(b) in index])
+                for p in self.programs
+            ]
+        return {
+            "bullets": capture_bullets(self.bullets),
+            "chase_bullets": capture_bullets(self.chase_bullets),
+            "lastShotTime": self.lastShotTime,
+            "spiral_angle": self.spiral_angle,
+            "programs": programs,
+            "updates": self.updates,
+            "lasers": self.lasers,
+            "generations": self.generations,
+            "freeSlots": self.freeSlots,
+            "groups": self.groups,
+        }
+
+    def set_state(self, state):
+        self.bullets = rebuild_bullets(state["bullets"])
+        self.chase_bullets = rebuild_bullets(state["chase_bullets"])
+        self.lastShotTime = state["lastShotTime"]
+        self.spiral_angle = state["spiral_angle"]
+        self.updates = state["updates"]
+        self.lasers = state["lasers"]
+
+        # Slots are rebuilt from the bullets, which were saved with theirs
+        self.generations = list(state["generations"])
+        self.freeSlots = list(state["freeSlots"])
+        self.groups = {name: list(h) for name, h in state["groups"].items()}
+        self.slots = [None] * len(self.generations)
+        self.slotsInUse = 0
+        for b in self.bullets:
+            if b.slot >= 0:
+                self.slots[b.slot] = b
+                self.slotsInUse += 1
+        self.programs = []
+        for program, indices in state["programs"]:
+            program.bullets = [self.bullets[i] for i in indices]
+            self.programs.append(program)
+
 
 class ChaseBullet(Bullet):
+    shape = "arrow"
+    facing = 3 * ANGLE_STEPS // 4  # straight up, as fired
+
     def __init__(self, x, y, speed=6):
         super().__init__(x, y, 0, -speed, width=6, height=6, color=(255, 255, 180))
         self.speed = speed
@@ -213,4 +717,179 @@ class ChaseBullet(Bullet):
             return
         self.vx = (dx / dist) * self.speed
         self.vy = (dy / dist) * self.speed
+        self.facing = angle_index(self.vx, self.vy)
+
+
+# ---------- LASERS ----------
+# One entity per beam instead of a line of small bullets: one capsule test
+# and one line draw each, whatever the length.
+
+class Laser:
+    """
+    Straight laser from (x, y) at angle (radians), length pixels long.
+
+    Shows a thin warning line for `warmup` ticks, then the beam is live
+    (hits the player) for `duration` ticks. angularVel sweeps it around its
+    origin.
+    """
+
+    def __init__(self, x, y, angle, length, width=10, warmup=40, duration=90,
+                 angularVel=0.0, color=(255, 80, 200)):
+        self.x = x
+        self.y = y
+        self.angle = angle
+        self.length = length
+        self.width = width
+        self.warmup = warmup
+        self.duration = duration
+        self.angularVel = angularVel
+        self.color = color
+        self.age = 0
+
+    @property
+    def live(self):
+        return self.warmup <= self.age < self.warmup + self.duration
+
+    def expired(self, width, height, margin):
+        return self.age >= self.warmup + self.duration
+
+    def end(self):
+        return (self.x + math.cos(self.angle) * self.length,
+                self.y + math.sin(self.angle) * self.length)
+
+    def update(self):
+        self.age += 1
+        self.angle += self.angularVel
+
+    def hits(self, cx, cy, radius):
+        if not self.live:
+            return False
+        ex, ey = self.end()
+        return capsule_circle_collision(self.x, self.y, ex, ey,
+                                        self.width / 2, cx, cy, radius)
+
+    def points(self):
+        return [(self.x, self.y), self.end()]
+
+
+class CurvyLaser:
+    """
+    Laser whose body is the path of a moving head (a polyline).
+
+    The head moves like a bullet (vx, vy, turning by angularVel each tick).
+    Every `spacing` ticks its position is added to the body, which keeps the
+    last `segments` points, so a long laser is only a handful of segments.
+    Always live; expires once the whole body has left the screen.
+    """
+
+    def __init__(self, x, y, vx, vy, segments=16, spacing=3, width=6,
+                 angularVel=0.0, color=(120, 200, 255)):
+        self.vx = vx
+        self.vy = vy
+        self.spacing = spacing
+        self.width = width
+        self.angularVel = angularVel
+        self.color = color
+        self.age = 0
+
+        # Body points, oldest first; the last one is the head
+        self.xs = deque([x, x], maxlen=segments + 1)
+        self.ys = deque([y, y], maxlen=segments + 1)
+
+    def update(self):
+        if self.angularVel:
+            c = math.cos(self.angularVel)
+            s = math.sin(self.angularVel)
+            self.vx, self.vy = self.vx * c - self.vy * s, self.vx * s + self.vy * c
+
+        self.age += 1
+        x = self.xs[-1] + self.vx
+        y = self.ys[-1] + self.vy
+        if self.age % self.spacing == 0:
+            # Fix the head where it is and start a new segment
+            self.xs.append(x)
+            self.ys.append(y)
+        else:
+            self.xs[-1] = x
+            self.ys[-1] = y
+
+    def expired(self, width, height, margin):
+        return (max(self.xs) < -margin or min(self.xs) > width + margin
+                or max(self.ys) < -margin or min(self.ys) > height + margin)
+
+    def hits(self, cx, cy, radius):
+        return polyline_circle_collision(self.xs, self.ys, self.width / 2,
+                                         cx, cy, radius)
+
+    def points(self):
+        return list(zip(self.xs, self.ys))
+
+
+# ---------- SIMPLE LOOK ----------
+# Low quality tier (QualityGovernor "simple bullets"): every bullet is a
+# small square of its colour, blitted from one cached surface per colour.
+# The surfaces and positions are fed to a single blits call straight from
+# map(), so no Python code runs per bullet.
+
+SIMPLE_SIZE = 4
+
+getColor = attrgetter("color")
+getXY = attrgetter("x", "y")
+getX = attrgetter("x")
+getY = attrgetter("y")
+
+
+class DotSprites(dict):
+    """colour -> size x size filled surface in the target's format, made on first use."""
+
+    def __init__(self, size, target):
+        super().__init__()
+        self.size = size
+        self.target = target
+
+    def __missing__(self, color):
+        dot = self[color] = pygame.Surface((self.size, self.size)).convert(self.target)
+        dot.fill(color)
+        return dot
+
+
+dotSprites = {}  # size -> DotSprites
+
+
+def draw_simple(screen, bullets, scale=1.0):
+    """Draw bullets as SIMPLE_SIZE squares; scale as in BulletSystem.drawBullets."""
+    size = max(1, int(SIMPLE_SIZE * scale))
+    dots = dotSprites.get(size)
+    if dots is None:
+        dots = dotSprites[size] = DotSprites(size, screen)
+    sprites = map(dots.__getitem__, map(getColor, bullets))
+    if scale == 1.0:
+        screen.blits(zip(sprites, map(getXY, bullets)), False)
+    else:
+        screen.blits(zip(sprites, zip(map(scale.__mul__, map(getX, bullets)),
+                                      map(scale.__mul__, map(getY, bullets)))), False)
+
+
+# ---------- SAVE-STATE CAPTURE ----------
+# Bullets are plain objects whose fields all live in their __dict__ (the
+# class only holds defaults), so a copy of each __dict__ is a full copy of
+# the bullet. Copying dicts is several times cheaper than gathering fields
+# into arrays or pickling the objects, and the capture can sit in memory
+# as a keyframe without being serialised at all.
+
+getDict = attrgetter("__dict__")
+
+
+def capture_bullets(bullets):
+    """(classes, field dicts) copy of a bullet list; see rebuild_bullets."""
+    return list(map(type, bullets)), list(map(dict.copy, map(getDict, bullets)))
+
 
+def rebuild_bullets(captured):
+    """New bullet objects from capture_bullets; the capture can be rebuilt again."""
+    classes, fields = captured
+    bullets = list(map(object.__new__, classes))
+    # Handing each bullet a fresh copy as its __dict__ is about twice as
+    # fast as filling its own dict in a loop
+    deque(map(setattr, bullets, repeat("__dict__"), map(dict.copy, fields)), 0)
+    return bullets
@@ -13,6 +13,7 @@ def check_collision(obj1_x, obj1_y, obj1_w, obj1_h, obj2_x, obj2_y, obj2_w, obj2
 
 # --- Player hitbox ---
 HITBOX_RADIUS = 4  # Small visual hitbox for precision dodging
+GRAZE_RADIUS = 20  # Bullets passing this close (without hitting) count as a graze
 
 import math
 
@@ -30,3 +31,92 @@ def circle_rect_collision(cx, cy, radius, rx, ry, rw, rh):
     dy = cy - closest_y
 
     return (dx * dx + dy * dy) <= (radius * radius)
+
+
+# --- Far-away bullets ---
+
+def due_bullets(bullets, tick):
+    """Bullets whose safe frames (see bullet_hits) have run out by this tick."""
+    return [b for b in bullets if b.checkAt <= tick]
+
+
+def bullet_hits(bullets, tick, cx, cy, radius, playerSpeed, grazeRadius=GRAZE_RADIUS):
+    """
+    Bullets touching the player hitbox, and bullets grazing it, tested with
+    temporal coherence. Returns (hits, grazes).
+
+    A graze is a bullet coming within grazeRadius without hitting. Each
+    bullet grazes once: its grazed bit is set the first time.
+
+    A bullet at distance d from the hitbox, moving at v, can't reach it for
+    (d - radius) / (v + playerSpeed) frames, whatever either of them does
+    (grazeRadius instead of radius while it can still graze). A miss stores
+    the tick that runs out on the bullet (checkAt) and the bullet isn't
+    tested again before then; pass the bullets from due_bullets(). Code that
+    speeds a bullet up must set checkAt = 0.
+    """
+    hits = []
+    grazes = []
+    r2 = radius * radius
+    g2 = grazeRadius * grazeRadius
+    sqrt = math.sqrt
+    hypot = math.hypot
+    for b in bullets:
+        rx = b.x
+        ry = b.y
+        dx = cx - max(rx, min(cx, rx + b.width))
+        dy = cy - max(ry, min(cy, ry + b.height))
+        d2 = dx * dx + dy * dy
+        if d2 <= r2:  # same test as circle_rect_collision
+            hits.append(b)
+            continue
+        near = radius
+        if not b.grazed:
+            if d2 <= g2:
+                b.grazed = True
+                grazes.append(b)
+            else:
+                near = grazeRadius
+        frames = int((sqrt(d2) - near) / (hypot(b.vx, b.vy) + playerSpeed))
+        b.checkAt = tick + (frames if frames > 1 else 1)
+    return hits, grazes
+
+
+# --- Lasers ---
+
+def capsule_circle_collision(ax, ay, bx, by, halfWidth, cx, cy, radius):
+    """
+    Checks collision between a circle (player hitbox) and a capsule: the
+    segment a-b grown by halfWidth on every side (a laser beam).
+    """
+    dx = bx - ax
+    dy = by - ay
+    length2 = dx * dx + dy * dy
+
+    # Closest point on the segment to the circle centre
+    t = 0.0
+    if length2:
+        t = ((cx - ax) * dx + (cy - ay) * dy) / length2
+        t = 0.0 if t < 0 else 1.0 if t > 1 else t
+    px = ax + t * dx - cx
+    py = ay + t * dy - cy
+
+    r = halfWidth + radius
+    return px * px + py * py <= r * r
+
+
+def polyline_circle_collision(xs, ys, halfWidth, cx, cy, radius):
+    """
+    Circle against a chain of capsules through the points (xs[i], ys[i]),
+    e.g. a curvy laser. Whole chain is rejected by its bounding box first.
+    """
+    r = halfWidth + radius
+    if (cx + r < min(xs) or cx - r > max(xs)
+            or cy + r < min(ys) or cy - r > max(ys)):
+        return False
+
+    for i in range(1, len(xs)):
+        if capsule_circle_collision(xs[i - 1], ys[i - 1], xs[i], ys[i],
+                                    halfWidth, cx, cy, radius):
+            return True
+    return False
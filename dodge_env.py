@@ -0,0 +1,319 @@
+# dodge_env.py
+# Reset/step environment around GameSession for training and evaluating
+# dodging agents. Needs numpy (the game itself doesn't).
+import multiprocessing
+import numbers
+from array import array
+from operator import attrgetter
+
+import numpy as np
+
+import sim_clock
+from game_session import GameSession, ACTIONS, decode_inputs
+
+# An action is the same bit mask the input log uses: bit i set = ACTIONS[i]
+# held this tick (bomb = pressed). So there are 2 ** len(ACTIONS) of them.
+N_ACTIONS = 1 << len(ACTIONS)
+
+getX = attrgetter("x")
+getY = attrgetter("y")
+getVX = attrgetter("vx")
+getVY = attrgetter("vy")
+
+
+def observation_spec(width=800, height=900, maxBullets=2048, maxEnemies=32, cellSize=20):
+    """(name, shape, dtype) of each observation array for one environment."""
+    return [
+        # x, y, lives, bombs, powerValue, invulnerable
+        ("player", (6,), np.float32),
+        # x, y, vx, vy per enemy bullet; rows past counts[0] are zero
+        ("bullets", (maxBullets, 4), np.float32),
+        # x, y, health per enemy; rows past counts[1] are zero
+        ("enemies", (maxEnemies, 3), np.float32),
+        # x, y, hp / max hp, 1 if fighting
+        ("boss", (4,), np.float32),
+        # live enemy bullets, enemies (may be more than the arrays hold)
+        ("counts", (2,), np.int32),
+        # enemy bullets (and live laser samples) per cell, capped at 255
+        ("danger", (-(-height // cellSize), -(-width // cellSize)), np.uint8),
+    ]
+
+
+def buffer_size(spec, n=1):
+    size = 0
+    for _, shape, dtype in spec:
+        size += -(-n * int(np.prod(shape)) * np.dtype(dtype).itemsize // 8) * 8
+    return size
+
+
+def carve_buffers(spec, n, buffer):
+    """Lay out spec's arrays for n environments in one buffer. Returns {name: (n, ...) array}."""
+    arrays = {}
+    offset = 0
+    for name, shape, dtype in spec:
+        count = n * int(np.prod(shape))
+        arrays[name] = np.frombuffer(buffer, dtype, count, offset).reshape((n,) + shape)
+        offset += -(-count * np.dtype(dtype).itemsize // 8) * 8  # keep 8-byte alignment
+    return arrays
+
+
+class DodgeEnv:
+    """
+    One game as a reset/step environment.
+
+    step(action) runs frameSkip ticks with the action held (a bomb only goes
+    off on the first) and returns (obs, reward, terminated, truncated, info).
+    Reward: +0.01 per tick survived, +score / 1000, -1 per life lost.
+
+    obs is a dict of NumPy arrays that the environment owns and overwrites
+    in place every step: the same arrays each time, never copied on the way
+    out, so copy them if they need to outlive the next step. A vector
+    environment passes in views into its batch arrays (buffers), so filling
+    one environment's observation fills its row of the batch directly.
+
+    Bullets are Python objects in the simulation, so their columns are
+    gathered into these arrays once per step; that is the only copy.
+    """
+
+    def __init__(self, seed=None, endless=False, maxTicks=60 * 120, frameSkip=1,
+                 width=800, height=900, maxBullets=2048, maxEnemies=32, cellSize=20,
+                 buffers=None):
+        self.seed = seed
+        self.maxTicks = maxTicks
+        self.frameSkip = frameSkip
+        self.cellSize = cellSize
+
+        spec = observation_spec(width, height, maxBullets, maxEnemies, cellSize)
+        if buffers is None:
+            batch = carve_buffers(spec, 1, bytearray(buffer_size(spec)))
+            buffers = {name: a[0] for name, a in batch.items()}
+        self.obs = buffers
+
+        self.session = GameSession(width, height, seed=seed, endless=endless)
+        self.episode = 0
+        self.bulletRows = 0
+        self.enemyRows = 0
+
+    def reset(self, seed=None):
+        """Start a new episode. Without a seed, episode k of an env seeded s is seeded "s:k"."""
+        if seed is not None:
+            self.seed = seed
+            self.episode = 0
+        episodeSeed = None if self.seed is None else f"{self.seed}:{self.episode}"
+        self.episode += 1
+
+        sim_clock.set_tick(0)
+        self.session.reset(episodeSeed)
+        self.observe()
+        return self.obs, self.session.describe()
+
+    def step(self, action):
+        session = self.session
+        # np.int64 and friends count as Integral too (agents often pick with argmax)
+        inputs = decode_inputs(int(action)) if isinstance(action, numbers.Integral) else dict(action)
+        player = session.player
+        lives = player["lives"]
+        score = player["score"]
+
+        ticks = 0
+        for _ in range(self.frameSkip):
+            session.step(inputs, record=False)  # no input log: agents don't rewind
+            inputs["bomb"] = False
+            ticks += 1
+            if session.gameOver:
+                break
+
+        reward = 0.01 * ticks + (player["score"] - score) / 1000 - (lives - player["lives"])
+        terminated = session.gameOver
+        truncated = not terminated and session.tick >= self.maxTicks
+        self.observe()
+        return self.obs, reward, terminated, truncated, {}
+
+    # ---------- OBSERVATIONS ----------
+
+    def observe(self):
+        session = self.session
+        obs = self.obs
+        player = session.player
+
+        p = obs["player"]
+        p[0] = player["x"]
+        p[1] = player["y"]
+        p[2] = player["lives"]
+        p[3] = player["bombs"]
+        p[4] = player["powerValue"]
+        p[5] = player["invulnerable"]
+
+        bullets = session.enemyBullets.bullets
+        b = obs["bullets"]
+        n = min(len(bullets), len(b))
+        if n < len(bullets):
+            bullets = bullets[:n]
+        if n:
+            b[:n, 0] = array("d", map(getX, bullets))
+            b[:n, 1] = array("d", map(getY, bullets))
+            b[:n, 2] = array("d", map(getVX, bullets))
+            b[:n, 3] = array("d", map(getVY, bullets))
+        if self.bulletRows > n:
+            b[n:self.bulletRows] = 0
+        self.bulletRows = n
+
+        enemies = session.enemySystem.enemies
+        e = obs["enemies"]
+        m = min(len(enemies), len(e))
+        for i in range(m):
+            enemy = enemies[i]
+            e[i] = (enemy.x, enemy.y, enemy.health)
+        if self.enemyRows > m:
+            e[m:self.enemyRows] = 0
+        self.enemyRows = m
+
+        boss = session.bossSystem
+        fighting = boss.spawned and not boss.dead
+        obs["boss"][:] = (boss.x, boss.y, boss.hp / boss.max_hp if fighting else 0, fighting)
+
+        c = obs["counts"]
+        c[0] = len(session.enemyBullets.bullets)
+        c[1] = len(enemies)
+
+        self.rasterize(b[:n, 0], b[:n, 1])
+
+    def rasterize(self, xs, ys):
+        grid = self.obs["danger"]
+        rows, cols = grid.shape
+        cell = self.cellSize
+
+        # Straight lasers are sampled every cell along their length
+        lx, ly = [], []
+        for laser in self.session.enemyBullets.lasers:
+            if not getattr(laser, "live", True):
+                continue
+            points = laser.points()
+            for (x0, y0), (x1, y1) in zip(points, points[1:]):
+                steps = max(1, int(max(abs(x1 - x0), abs(y1 - y0)) // cell))
+                for k in range(steps + 1):
+                    lx.append(x0 + (x1 - x0) * k / steps)
+                    ly.append(y0 + (y1 - y0) * k / steps)
+        if lx:
+            xs = np.concatenate((xs, lx))
+            ys = np.concatenate((ys, ly))
+
+        ix = (xs // cell).astype(np.intp)
+        iy = (ys // cell).astype(np.intp)
+        inside = (ix >= 0) & (ix < cols) & (iy >= 0) & (iy < rows)
+        counts = np.bincount(iy[inside] * cols + ix[inside], minlength=rows * cols)
+        np.minimum(counts, 255, out=counts)
+        grid.reshape(-1)[:] = counts
+
+
+# ---------- VECTOR ENVIRONMENTS ----------
+
+class VectorDodgeEnv:
+    """
+    n DodgeEnvs stepped together. Observations are batch arrays of shape
+    (n, ...) with one row per environment, and every environment writes
+    straight into its own row.
+
+    workers=0 steps them all in this process. With workers > 0 the
+    environments are split across that many processes, and the batch arrays
+    (plus actions and rewards) live in one shared memory block, so nothing
+    is pickled per step but the command. Finished environments are reset
+    automatically; their row then holds the first observation of the new
+    episode.
+    """
+
+    def __init__(self, n, seed=0, workers=0, **envKwargs):
+        self.n = n
+        self.workers = []
+
+        obsKwargs = {k: envKwargs[k] for k in ("width", "height", "maxBullets", "maxEnemies", "cellSize")
+                     if k in envKwargs}
+        spec = observation_spec(**obsKwargs) + [
+            ("actions", (), np.int32),
+            ("rewards", (), np.float32),
+            ("terminated", (), np.bool_),
+            ("truncated", (), np.bool_),
+        ]
+        size = buffer_size(spec, n)
+
+        ctx = multiprocessing.get_context("spawn")
+        buffer = ctx.RawArray("b", size) if workers else bytearray(size)
+        self.arrays = carve_buffers(spec, n, buffer)
+        self.obs = {name: self.arrays[name] for name, _, _ in spec[:-4]}
+
+        if not workers:
+            self.envs = [DodgeEnv(seed + i, buffers=row_views(self.obs, i), **envKwargs)
+                         for i in range(n)]
+            return
+
+        self.envs = None
+        chunks = [range(n)[w::workers] for w in range(workers)]
+        for chunk in chunks:
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=run_worker, daemon=True,
+                               args=(child, buffer, spec, n, list(chunk), seed, envKwargs))
+            proc.start()
+            self.workers.append((proc, parent))
+
+    def reset(self):
+        if self.envs is not None:
+            for env in self.envs:
+                env.reset()
+        else:
+            self.command("reset")
+        return self.obs
+
+    def step(self, actions):
+        """actions: n action masks. Returns (obs, rewards, terminated, truncated)."""
+        a = self.arrays
+        a["actions"][:] = actions
+        if self.envs is not None:
+            step_envs(self.envs, range(self.n), a)
+        else:
+            self.command("step")
+        return self.obs, a["rewards"], a["terminated"], a["truncated"]
+
+    def command(self, cmd):
+        for _, pipe in self.workers:
+            pipe.send(cmd)
+        for _, pipe in self.workers:
+            pipe.recv()
+
+    def close(self):
+        for proc, pipe in self.workers:
+            pipe.send("close")
+            proc.join()
+        self.workers = []
+
+
+def row_views(batch, i):
+    return {name: a[i] for name, a in batch.items()}
+
+
+def step_envs(envs, rows, a):
+    actions, rewards = a["actions"], a["rewards"]
+    terminated, truncated = a["terminated"], a["truncated"]
+    for env, i in zip(envs, rows):
+        _, reward, term, trunc, _ = env.step(int(actions[i]))
+        rewards[i] = reward
+        terminated[i] = term
+        truncated[i] = trunc
+        if term or trunc:
+            env.reset()
+
+
+def run_worker(pipe, buffer, spec, n, rows, seed, envKwargs):
+    a = carve_buffers(spec, n, buffer)
+    obsNames = [name for name, _, _ in spec[:-4]]
+    envs = [DodgeEnv(seed + i, buffers={name: a[name][i] for name in obsNames}, **envKwargs)
+            for i in rows]
+    while True:
+        cmd = pipe.recv()
+        if cmd == "step":
+            step_envs(envs, rows, a)
+        elif cmd == "reset":
+            for env in envs:
+                env.reset()
+        else:
+            break
+        pipe.send(True)
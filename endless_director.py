@@ -0,0 +1,149 @@
+# endless_director.py
+from enemy_system import ENEMY_PROFILES
+from event_log import events
+from gc_control import collector
+
+LANES = (90, 150, 210)
+
+# Rough number of bullets alive per enemy for each bullet pattern, used to
+# check a wave fits the budget before it's spawned. Cheapest first; a pattern
+# only shows up once difficulty reaches its unlock level.
+PATTERNS = [
+    # name,        cost, unlock
+    ("aimed",         3, 1.0),
+    ("laser",         4, 2.0),
+    ("curvy_laser",   6, 3.0),
+    ("spiral",       18, 1.5),
+    ("spread",       20, 1.0),
+    ("radial",       30, 2.5),
+]
+PATTERN_COST = {name: cost for name, cost, _ in PATTERNS}
+
+# Bullets fired by each Rumia pattern (A, B, C, D) in one use
+BOSS_PATTERN_COST = (216, 288, 256, 74)
+
+# Share of the bullet/enemy budget kept at each frame-cost load level
+LOAD_SCALE = (1.0, 0.8, 0.6, 0.4)
+
+
+class EndlessDirector:
+    """
+    Procedural waves for endless mode. Drop-in for WaveSystem.
+
+    Difficulty rises with time. Each wave draws an enemy type, a bullet
+    pattern and a size from the session rng, then is shrunk (and finally
+    cheapened to aimed shots) until its estimated bullets fit in what's left
+    of the budget. Every few waves Rumia comes back with more HP, limited to
+    the patterns the budget allows.
+
+    The budget shrinks when the main loop reports expensive frames. That
+    report (the "load" input) is recorded with the key presses, so a replay
+    makes the same choices.
+    """
+
+    def __init__(self, rng, screenWidth=800, maxBullets=1200, maxEnemies=14, bossEvery=6):
+        self.rng = rng
+        self.screenWidth = screenWidth
+        self.maxBullets = maxBullets
+        self.maxEnemies = maxEnemies
+        self.bossEvery = bossEvery
+        self.stageName = "Endless"
+
+        self.tick = 0
+        self.phase = 0  # waves started so far
+        self.waitingFor = None  # None or "boss"
+        self.nextWave = 120
+        self.pending = []  # (tick, enemy, pattern, lane) left to spawn in this wave
+
+        # Fed by observe() every update
+        self.bulletCount = 0
+        self.load = 0
+        self.budgetScale = 1.0
+
+    @property
+    def difficulty(self):
+        return 1.0 + self.tick / 3600  # +1 per minute of play
+
+    @property
+    def bulletBudget(self):
+        return self.maxBullets * self.budgetScale
+
+    @property
+    def enemyBudget(self):
+        return max(2, int(self.maxEnemies * self.budgetScale))
+
+    def observe(self, bulletCount, load):
+        self.bulletCount = bulletCount
+        self.load = load
+
+    def update(self, enemySystem, gamePaused, bossSystem, ticks=1):
+        if gamePaused:
+            return
+
+        # Ease the budget towards the load level (about a second at 10 Hz)
+        self.budgetScale += (LOAD_SCALE[self.load] - self.budgetScale) * 0.1
+
+        if self.waitingFor == "boss":
+            if bossSystem.spawned and not bossSystem.dead:
+                bossSystem.patternPool = self.boss_patterns()
+                return
+            self.waitingFor = None
+            self.nextWave = self.tick + 120
+
+        self.tick += ticks
+
+        while self.pending and self.pending[0][0] <= self.tick:
+            _, enemy, pattern, lane = self.pending.pop(0)
+            enemySystem.spawnEnemy(enemy_type=enemy, targetY=LANES[lane], bullet_pattern=pattern)
+
+        if self.pending or self.tick < self.nextWave:
+            return
+
+        # Let the field calm down before the next wave
+        if (self.bulletCount > self.bulletBudget * 0.6
+                or len(enemySystem.enemies) >= self.enemyBudget):
+            self.nextWave = self.tick + 30
+            return
+
+        self.phase += 1
+        events.emit("phase", self.phase)
+        collector.request("phase")
+
+        if self.phase % self.bossEvery == 0:
+            self.start_boss(bossSystem)
+        else:
+            self.start_wave(len(enemySystem.enemies))
+
+    def start_wave(self, enemiesAlive):
+        rng = self.rng
+        d = self.difficulty
+
+        names = list(ENEMY_PROFILES)
+        enemy = rng.choices(names, weights=[3, d, d * d / 4][:len(names)])[0]
+        unlocked = [name for name, _, unlock in PATTERNS if unlock <= d]
+        pattern = rng.choice(unlocked)
+
+        count = 3 + int(d * 1.5) + rng.randint(0, 2)
+        count = max(1, min(count, self.enemyBudget - enemiesAlive))
+
+        room = self.bulletBudget - self.bulletCount
+        while count > 1 and count * PATTERN_COST[pattern] > room:
+            count -= 1
+        if count * PATTERN_COST[pattern] > room:
+            pattern = PATTERNS[0][0]
+
+        interval = max(10, 30 - int(d * 3))
+        for i in range(count):
+            self.pending.append((self.tick + i * interval, enemy, pattern, i % len(LANES)))
+        self.nextWave = self.tick + count * interval + max(60, 240 - int(d * 20))
+
+    def boss_patterns(self):
+        # Patterns that fit in half the budget; D is the cheapest, always allowed
+        pool = [i for i, cost in enumerate(BOSS_PATTERN_COST) if cost <= self.bulletBudget / 2]
+        return pool or [BOSS_PATTERN_COST.index(min(BOSS_PATTERN_COST))]
+
+    def start_boss(self, bossSystem):
+        bossSystem.respawn(int(1500 + 500 * self.difficulty), self.boss_patterns(), self.screenWidth)
+        self.waitingFor = "boss"
+        events.emit("boss_spawn")
+        collector.request("boss")
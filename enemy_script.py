@@ -0,0 +1,224 @@
+# enemy_script.py
+# Enemy behaviour written as generator scripts, run off a timer heap.
+import heapq
+import math
+
+import sim_clock
+
+# Scripts a stage file can name ("script": "fairy"); filled by @enemy_script
+SCRIPTS = {}
+
+
+def enemy_script(func):
+    SCRIPTS[func.__name__] = func
+    return func
+
+
+# ---------- COMMANDS ----------
+# A script yields these. Only wait() (or a bare int) gives the tick away;
+# everything else runs immediately and the script carries on.
+
+def wait(ticks):
+    return ("wait", ticks)
+
+
+def move(vx, vy, ticks, bounce=False):
+    """Move by (vx, vy) per tick for ticks ticks; bounce turns round at the side walls."""
+    return ("move", vx, vy, ticks, bounce)
+
+
+def move_to(x=None, y=None, over=30):
+    """Glide to (x, y) over that many ticks. None keeps the current coordinate."""
+    return ("move_to", x, y, over)
+
+
+def fire(pattern):
+    """Fire one of Enemy.fire's patterns; aimed ones aim at the player as of now."""
+    return ("fire", pattern)
+
+
+def task(func, *args):
+    """Start func(*args) as a second script for the same enemy, running alongside."""
+    return ("task", func, args)
+
+
+def leave():
+    """Remove the enemy (no kill, no drop)."""
+    return ("leave",)
+
+
+# ---------- SCRIPTS ----------
+# Scripts get the spawn parameters (plain values, see EnemySystem.spawnEnemy)
+# and must not look at anything else: no enemy fields, no shared rng. A
+# script is saved as its arguments plus how far it got, and restoring a
+# save-state re-runs it to that point (see Script), so anything it computes
+# has to come out the same the second time. For randomness, seed a
+# random.Random from p["seed"].
+
+def fire_every(pattern, first, every):
+    yield first
+    while True:
+        yield fire(pattern)
+        yield every
+
+
+@enemy_script
+def fairy(p):
+    """Enter from the top, strafe across the lane, fly back out; firing throughout."""
+    yield task(fire_every, p["pattern"], p["cooldown"], p["cooldown"])
+
+    enter = max(1, math.ceil((p["targetY"] - p["y"]) / p["speed"]))
+    yield move_to(y=p["targetY"], over=enter)
+    yield enter
+
+    yield move(p["strafeSpeed"], 0, p["strafeTicks"], bounce=True)
+    yield p["strafeTicks"]
+
+    exitSpeed = p["speed"] + 1.0
+    out = math.ceil((p["targetY"] + p["height"]) / exitSpeed) + 1
+    yield move(0, -exitSpeed, out)
+    yield out
+    yield leave()
+
+
+@enemy_script
+def dive(p):
+    """Drop to the lane, stop for one radial burst, then dive off the bottom."""
+    yield move_to(y=p["targetY"], over=40)
+    yield 50
+    yield fire("radial")
+    yield 30
+    yield fire(p["pattern"])
+    yield move(0, p["speed"] * 2, 600)
+
+
+# ---------- RUNTIME ----------
+
+class Script:
+    """
+    One running generator. It's pickled as (func, args, steps) and rebuilt on
+    load by running a fresh generator steps commands forward, throwing the
+    commands away; the enemy's own state was saved with it.
+    """
+
+    def __init__(self, enemy, func, args):
+        self.enemy = enemy
+        self.func = func
+        self.args = args
+        self.steps = 0
+        self.gen = func(*args)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["gen"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.gen = self.func(*self.args)
+        for _ in range(self.steps):
+            next(self.gen)
+
+
+class ScriptRunner:
+    """
+    Resumes enemy scripts when their wait is over.
+
+    Sleeping scripts sit in a heap keyed by the tick they wake on, so a tick
+    only touches the scripts that are due (popped off the top) and the
+    enemies that are mid-move. Hundreds of fairies waiting to fire cost
+    nothing until their tick comes round.
+    """
+
+    def __init__(self, screenWidth=800):
+        self.screenWidth = screenWidth
+        self.heap = []    # (wake tick, seq, script)
+        self.seq = 0
+        self.movers = []  # enemies with a move in progress
+
+    def start(self, enemy, func, *args):
+        self.schedule(sim_clock.tick, Script(enemy, func, args))
+
+    def schedule(self, tick, script):
+        heapq.heappush(self.heap, (tick, self.seq, script))
+        self.seq += 1
+
+    def run(self, tick, bullet_system, player_x, player_y, player_size):
+        heap = self.heap
+        while heap and heap[0][0] <= tick:
+            _, _, script = heapq.heappop(heap)
+            if script.enemy.alive:
+                self.resume(script, tick, bullet_system, player_x, player_y, player_size)
+
+        if self.movers:
+            self.move_enemies()
+
+    def resume(self, script, tick, bullet_system, player_x, player_y, player_size):
+        enemy = script.enemy
+        gen = script.gen
+        while True:
+            try:
+                command = next(gen)
+            except StopIteration:
+                return
+            script.steps += 1
+
+            if type(command) is int:
+                ticks = command
+            elif command[0] == "wait":
+                ticks = command[1]
+            else:
+                self.execute(enemy, command, bullet_system, player_x, player_y, player_size)
+                if not enemy.alive:
+                    return
+                continue
+
+            self.schedule(tick + max(1, ticks), script)
+            return
+
+    def execute(self, enemy, command, bullet_system, player_x, player_y, player_size):
+        kind = command[0]
+
+        if kind == "fire":
+            if bullet_system is not None and player_x is not None:
+                enemy.fire(bullet_system, command[1], player_x + player_size / 2, player_y + player_size / 2)
+
+        elif kind == "move":
+            _, vx, vy, ticks, bounce = command
+            self.set_move(enemy, vx, vy, ticks, bounce, None)
+
+        elif kind == "move_to":
+            _, x, y, over = command
+            x = enemy.x if x is None else x
+            y = enemy.y if y is None else y
+            self.set_move(enemy, (x - enemy.x) / over, (y - enemy.y) / over, over, False, (x, y))
+
+        elif kind == "task":
+            self.schedule(sim_clock.tick, Script(enemy, command[1], command[2]))
+
+        elif kind == "leave":
+            enemy.alive = False
+
+        else:
+            raise ValueError(f"unknown enemy script command {command!r}")
+
+    def set_move(self, enemy, vx, vy, ticks, bounce, end):
+        if enemy.moveTicks <= 0:
+            self.movers.append(enemy)
+        enemy.vx = vx
+        enemy.vy = vy
+        enemy.moveTicks = ticks
+        enemy.bounce = bounce
+        enemy.moveEnd = end
+
+    def move_enemies(self):
+        right = self.screenWidth
+        for e in self.movers:
+            e.x += e.vx
+            e.y += e.vy
+            if e.bounce and (e.x <= 0 or e.x + e.width >= right):
+                e.vx = -e.vx
+            e.moveTicks -= 1
+            if e.moveTicks <= 0 and e.moveEnd is not None:
+                e.x, e.y = e.moveEnd  # no float drift at the end of a glide
+        self.movers = [e for e in self.movers if e.moveTicks > 0 and e.alive]
@@ -3,6 +3,10 @@ import pygame
 import random
 import math
 
+import sim_clock
+from enemy_script import SCRIPTS, ScriptRunner
+from sprite_atlas import SpriteLayer
+
 
 
 
@@ -37,6 +41,7 @@ class Enemy:
         movement_pattern="straight",
         bullet_pattern="aimed",
         screen_width=800,
+        rng=random,
     ):
         # position / size
         self.x = float(x)
@@ -51,7 +56,7 @@ class Enemy:
         self.screen_width = screen_width
 
         # movement scripting
-        self.spawnTime = pygame.time.get_ticks()
+        self.spawnTime = sim_clock.get_ticks()
 
         # Movement scripting
         self.pattern = "enter_strafe_exit"  # default
@@ -66,6 +71,15 @@ class Enemy:
 
         self.strafeDuration = 1500  # ms
 
+        # Scripted enemies (see enemy_script) skip update_position/try_shoot;
+        # the ScriptRunner moves them while moveTicks > 0
+        self.scripted = False
+        self.vx = 0.0
+        self.vy = 0.0
+        self.moveTicks = 0
+        self.bounce = False
+        self.moveEnd = None
+
         # enemy health
         self.health = health
 
@@ -74,8 +88,8 @@ class Enemy:
 
         # shooting
         self.bullet_pattern = bullet_pattern
-        self.shoot_cooldown = random.randint(800, 1600)  # ms
-        self.last_shot_time = pygame.time.get_ticks()
+        self.shoot_cooldown = rng.randint(800, 1600)  # ms
+        self.last_shot_time = sim_clock.get_ticks()
 
         # enemy death feedback
 
@@ -85,7 +99,7 @@ class Enemy:
 
     # ---------- MOVEMENT ----------
     def update_position(self):
-        now = pygame.time.get_ticks()
+        now = sim_clock.get_ticks()
 
         # Phase 0: Enter from top
         if self.phase == 0:
@@ -116,21 +130,21 @@ class Enemy:
 
     def try_shoot(self, bullet_system: "BulletSystem", player_x, player_y, player_size):
         """Attempt to shoot based on cooldown and chosen bullet pattern."""
-        now = pygame.time.get_ticks()
+        now = sim_clock.get_ticks()
         if now - self.last_shot_time < self.shoot_cooldown:
             return
 
         self.last_shot_time = now
 
-        # Enemy centre
-        cx = self.x + self.width / 2
-        cy = self.y + self.height / 2
-
         # Player centre
         px = player_x + player_size / 2
         py = player_y + player_size / 2
+        self.fire(bullet_system, self.bullet_pattern, px, py)
 
-        pattern = self.bullet_pattern
+    def fire(self, bullet_system, pattern, px, py):
+        """Fire one pattern from the enemy's centre; px, py is the player's centre."""
+        cx = self.x + self.width / 2
+        cy = self.y + self.height / 2
 
         if pattern == "aimed":
             # sniper shot at player
@@ -153,18 +167,32 @@ class Enemy:
             # rotating spiral that evolves over time
             bullet_system.shoot_spiral(cx, cy, count=8, step=0.25)
 
+        elif pattern == "laser":
+            # warning line locked onto the player, then the beam
+            angle = math.atan2(py - cy, px - cx)
+            bullet_system.spawn_laser(cx, cy, angle, 1000, warmup=40, duration=40)
+
+        elif pattern == "curvy_laser":
+            # snake that starts at the player and slowly bends away
+            angle = math.atan2(py - cy, px - cx)
+            bullet_system.spawn_curvy_laser(
+                cx, cy, math.cos(angle) * 4, math.sin(angle) * 4,
+                angularVel=0.015
+            )
+
         else:
             # default: aimed
             bullet_system.shoot_aimed(cx, cy, px, py)
 
     # ---------- DRAW ----------
 
-    def draw(self, screen):
+    def draw(self, screen, scale=1.0):
+        """scale < 1 draws into a low-resolution playfield (see GameSession.draw)."""
         if self.dying:
-            elapsed = pygame.time.get_ticks() - self.death_start_time
+            elapsed = sim_clock.get_ticks() - self.death_start_time
             progress = min(elapsed / self.death_duration, 1)
 
-            max_radius = self.width
+            max_radius = max(1, int(self.width * scale))
             radius = int(max_radius * progress)
 
             # Semi-transparent blue expanding circle
@@ -179,44 +207,53 @@ class Enemy:
             screen.blit(
                 surface,
                 (
-                    self.x + self.width // 2 - max_radius,
-                    self.y + self.height // 2 - max_radius
+                    (self.x + self.width // 2) * scale - max_radius,
+                    (self.y + self.height // 2) * scale - max_radius
                 )
             )
         else:
             pygame.draw.rect(
                 screen,
                 (255, 0, 0),
-                pygame.Rect(int(self.x), int(self.y), self.width, self.height)
+                pygame.Rect(int(self.x * scale), int(self.y * scale),
+                            int(self.width * scale), int(self.height * scale))
             )
 
 
 class EnemySystem:
-    def __init__(self, screenWidth, screenHeight):
+    def __init__(self, screenWidth, screenHeight, rng=random):
         self.enemies = []
+        self.rng = rng  # random.Random owned by the game session (for replays)
         self.enemySpeed = 2.0  # base speed for enemies
         self.screenWidth = screenWidth
         self.screenHeight = screenHeight
         self.spawnCooldown = 1000  # ms between spawns
-        self.lastSpawnTime = pygame.time.get_ticks()
+        self.lastSpawnTime = sim_clock.get_ticks()
+        self.scripts = ScriptRunner(screenWidth)
 
 
         # Patterns to randomly choose from
 
         self.bullet_patterns = ["aimed", "radial", "spread", "spiral"]
 
-    def spawnEnemy(self, enemy_type="BlueFairy", targetY=120, bullet_pattern=None):
+    def spawnEnemy(self, enemy_type="BlueFairy", targetY=120, bullet_pattern=None, x=None,
+                   script="fairy"):
         """
         Spawns an enemy based on a named profile (BlueFairy / PinkFairy / PinkFairyGood).
         This matches WaveSystem calling spawnEnemy(enemy_type=..., targetY=...).
+        x is random unless the stage file pins it.
+
+        script names one of enemy_script.SCRIPTS (or is a script function) to
+        drive the enemy; None uses the old enter/strafe/exit state machine.
         """
-        now = pygame.time.get_ticks()
+        now = sim_clock.get_ticks()
 
         # Choose profile safely (fallback to BlueFairy if typo)
         profile = ENEMY_PROFILES.get(enemy_type, ENEMY_PROFILES["BlueFairy"])
 
         # Random X spawn, spawn just above screen
-        x = random.randint(0, self.screenWidth - 32)
+        if x is None:
+            x = self.rng.randint(0, self.screenWidth - 32)
         y = -32
 
         # Decide bullet pattern per enemy type (simple + deterministic)
@@ -237,6 +274,7 @@ class EnemySystem:
             health=profile["hp"],
             bullet_pattern=bullet_pattern,
             screen_width=self.screenWidth,
+            rng=self.rng,
         )
 
         # Apply profile movement settings
@@ -256,21 +294,58 @@ class EnemySystem:
         self.enemies.append(enemy)
         self.lastSpawnTime = now
 
+        if script is not None:
+            if isinstance(script, str):
+                script = SCRIPTS[script]
+            enemy.scripted = True
+            self.scripts.start(enemy, script, {
+                "x": x,
+                "y": y,
+                "targetY": targetY,
+                "width": enemy.width,
+                "height": enemy.height,
+                "speed": enemy.speed,
+                "strafeSpeed": enemy.strafeSpeed,
+                "strafeTicks": round(enemy.strafeDuration / sim_clock.FRAME_MS),
+                "pattern": bullet_pattern,
+                "cooldown": round(enemy.shoot_cooldown / sim_clock.FRAME_MS),
+                "seed": self.rng.getrandbits(32),
+            })
+
     def updateEnemies(self, bullet_system: "BulletSystem" = None,
                       player_x=None, player_y=None, player_size=32):
         """Update positions and optionally have them fire bullets."""
         for enemy in self.enemies:
+            if enemy.scripted:
+                continue
             enemy.update_position()
             if bullet_system is not None and player_x is not None and player_y is not None:
                 enemy.try_shoot(bullet_system, player_x, player_y, player_size)
 
+        # Scripted enemies: only the scripts due this tick and the ones mid-move
+        self.scripts.run(sim_clock.tick, bullet_system, player_x, player_y, player_size)
+
         # Remove enemies that move off the bottom of the screen
-        self.enemies = [
-            e for e in self.enemies
-            if getattr(e, "alive", True) and e.y < self.screenHeight + e.height
-        ]
+        bottom = self.screenHeight
+        for e in self.enemies:
+            if e.y >= bottom + e.height:
+                e.alive = False  # stops its scripts too
+        self.enemies = [e for e in self.enemies if e.alive]
+
+    def drawEnemies(self, screen, scale=1.0, atlas=None):
+        if atlas is None:
+            for enemy in self.enemies:
+                enemy.draw(screen, scale)
+            return
 
-    def drawEnemies(self, screen):
+        # Living enemies are atlas sprites in one blits call; death effects
+        # are still drawn one by one
+        layer = SpriteLayer()
         for enemy in self.enemies:
-            enemy.draw(screen)
+            if enemy.dying:
+                enemy.draw(screen, scale)
+            else:
+                sprite = atlas.get("block", enemy.width, enemy.height, (255, 0, 0), (140, 0, 0), scale=scale)
+                layer.add(sprite, enemy.x * scale, enemy.y * scale)
+        layer.draw(screen)
 
@@ -0,0 +1,118 @@
+# event_log.py
+import logging
+import os
+import threading
+import time
+
+import sim_clock
+from resource_manager import cache_dir
+
+log = logging.getLogger(__name__)
+
+LOG_DIR = os.path.join(cache_dir(), "logs")
+
+
+class EventLog:
+    """
+    Gameplay event bus (hits, kills, power, patterns, phases).
+
+    emit() only writes into preallocated slots of a ring buffer, so it never
+    allocates or touches a file. A background thread drains the buffer to the
+    log file a few times a second. If the writer falls behind and the buffer
+    is full, new events are counted as dropped rather than blocking the frame.
+    """
+
+    def __init__(self, capacity=4096, flushInterval=0.25):
+        self.capacity = capacity
+        self.flushInterval = flushInterval
+
+        # One slot per event: tick, kind, and two numbers (meaning depends on kind)
+        self.ticks = [0] * capacity
+        self.kinds = [""] * capacity
+        self.a = [0] * capacity
+        self.b = [0] * capacity
+
+        # Total events written / read. Only the game thread moves head and
+        # only the writer thread moves tail.
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.droppedLogged = 0  # writer thread's copy, so dropped is never reset
+
+        self.enabled = False
+        self.path = None
+        self.writer = None
+        self.stopping = threading.Event()
+
+    def emit(self, kind, a=0, b=0):
+        if not self.enabled:
+            return
+        if self.head - self.tail >= self.capacity:
+            self.dropped += 1
+            return
+
+        i = self.head % self.capacity
+        self.ticks[i] = sim_clock.tick
+        self.kinds[i] = kind
+        self.a[i] = a
+        self.b[i] = b
+        # Publish only after the slot is filled
+        self.head += 1
+
+    # ---------- WRITER THREAD ----------
+
+    def start(self, path=None):
+        if self.writer is not None:
+            return
+        if path is None:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            path = os.path.join(LOG_DIR, time.strftime("events-%Y%m%d-%H%M%S.log"))
+
+        self.path = path
+        self.stopping.clear()
+        self.enabled = True
+        self.writer = threading.Thread(target=self.run_writer, name="event-log", daemon=True)
+        self.writer.start()
+        log.info("event log: %s", path)
+
+    def stop(self):
+        """Stop the writer after a final flush."""
+        if self.writer is None:
+            return
+        self.enabled = False
+        self.stopping.set()
+        self.writer.join()
+        self.writer = None
+
+    def run_writer(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("# tick kind a b\n")
+            while True:
+                stopping = self.stopping.wait(self.flushInterval)
+                self.drain(f)
+                if stopping:
+                    break
+
+    def drain(self, f):
+        head = self.head
+        dropped = self.dropped
+        if head == self.tail and dropped == self.droppedLogged:
+            return
+
+        lines = []
+        for n in range(self.tail, head):
+            i = n % self.capacity
+            lines.append(f"{self.ticks[i]} {self.kinds[i]} {self.a[i]:g} {self.b[i]:g}\n")
+        self.tail = head
+
+        if dropped != self.droppedLogged:
+            lines.append(f"# dropped {dropped - self.droppedLogged} events (buffer full)\n")
+            self.droppedLogged = dropped
+
+        f.writelines(lines)
+        f.flush()
+
+
+# Shared bus. Stays disabled (emit is a no-op) until start() is called,
+# e.g. for headless sessions.
+events = EventLog()
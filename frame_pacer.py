@@ -0,0 +1,115 @@
+# frame_pacer.py
+import time
+
+import pygame
+
+from quality_governor import FrameTimes
+
+
+class FramePacer:
+    """
+    Frame limiter that presents frames on an even 60 Hz grid with input read
+    as late as it can be.
+
+    Call wait() at the top of the loop, before reading events/keys, then
+    ready() just before display.flip() and presented() right after it.
+    wait() works out when this frame must start so its work (predicted from
+    the last few frames) ends just before the next present deadline; ready()
+    holds the flip until that deadline. Both sleep most of the way and spin
+    the last couple of ms, because OS sleeps can overshoot by a millisecond
+    or more.
+
+    mode "clock" falls back to pygame's Clock.tick for comparison.
+
+    Stats (ms): jitter is how far each present lands from its ideal interval,
+    latency is the time from reading input to the frame being flipped.
+    """
+
+    def __init__(self, fps=60, mode="precise", spinMs=2.0, margin=0.5, window=120):
+        self.period = 1 / fps
+        self.fps = fps
+        self.mode = mode
+        self.spin = spinMs / 1000
+        self.margin = margin / 1000  # extra headroom on the work prediction
+
+        self.clock = pygame.time.Clock()
+        self.deadline = None  # next present time (perf_counter)
+        self.workTimes = FrameTimes(30)
+        self.jitter = FrameTimes(window)
+        self.latency = FrameTimes(window)
+
+        self.inputTime = 0.0
+        self.lastPresent = None
+
+    def predicted_work(self):
+        return min(self.workTimes.maximum() / 1000 + self.margin, self.period)
+
+    def wait(self):
+        """Block until it's time to start the next frame. Returns that time."""
+        if self.mode == "clock":
+            self.clock.tick(self.fps)
+            self.inputTime = time.perf_counter()
+            return self.inputTime
+
+        clock = time.perf_counter
+        now = clock()
+        if self.deadline is None or now > self.deadline:
+            # First frame, or the last one ran long: start a new grid from here
+            self.deadline = now + self.period
+
+        self.sleep_until(self.deadline - self.predicted_work())
+        self.inputTime = clock()
+        return self.inputTime
+
+    def sleep_until(self, target):
+        clock = time.perf_counter
+        remaining = target - clock()
+        if remaining > self.spin:
+            time.sleep(remaining - self.spin)
+        while clock() < target:
+            pass
+
+    def ready(self):
+        """
+        Call just before display.flip(): waits for the present deadline.
+        Returns the frame's work time in ms (input read to now, no waiting).
+        """
+        workMs = (time.perf_counter() - self.inputTime) * 1000
+        self.workTimes.add(workMs)
+        if self.mode != "clock" and self.deadline is not None:
+            self.sleep_until(self.deadline)
+        return workMs
+
+    def presented(self):
+        """Call right after display.flip()."""
+        now = time.perf_counter()
+        self.latency.add((now - self.inputTime) * 1000)
+
+        if self.lastPresent is not None:
+            self.jitter.add(abs(now - self.lastPresent - self.period) * 1000)
+        self.lastPresent = now
+
+        if self.deadline is not None:
+            self.deadline += self.period
+
+    def skipped(self):
+        """Call instead of presented() on frames that weren't drawn."""
+        self.workTimes.add((time.perf_counter() - self.inputTime) * 1000)
+        if self.deadline is not None:
+            self.deadline += self.period
+        self.lastPresent = None  # the next interval isn't a frame interval
+
+    def idle(self):
+        """
+        Call instead of wait() on frames that blocked on input (menus, pause).
+        The next wait() starts a new grid. Returns the time input arrived.
+        """
+        self.deadline = None
+        self.lastPresent = None
+        self.inputTime = time.perf_counter()
+        return self.inputTime
+
+    def stats(self):
+        """(jitter avg, jitter max, latency avg, latency max) in ms."""
+        return (self.jitter.average(), self.jitter.maximum(),
+                self.latency.average(), self.latency.maximum())
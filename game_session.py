@@ -0,0 +1,582 @@
+# game_session.py
+import multiprocessing
+import random
+from array import array
+
+import pygame
+
+import sim_clock
+from event_log import events
+from metrics import metrics, COLLISION_TESTS, COLLISION_TESTS_FRAME
+from bullet_system import BulletSystem
+from enemy_system import EnemySystem
+from collision_system import (circle_rect_collision, HITBOX_RADIUS, check_collision,
+                              due_bullets, bullet_hits, GRAZE_RADIUS)
+from WaveSystem import WaveSystem, DEFAULT_STAGE
+from endless_director import EndlessDirector
+from boss_system import Rumia
+from bomb_system import BombSystem
+from power_system import ItemSystem
+from scheduler import SystemScheduler
+from sprite_atlas import atlas, AtlasBulletRenderer
+try:
+    from sharded_bullets import ShardedBulletStore
+except ImportError:  # needs numpy; only the sharded bullet mode uses it
+    ShardedBulletStore = None
+
+# Gameplay actions, in the bit order used for recorded inputs.
+# "bomb" means the bomb key was pressed this frame (not held).
+ACTIONS = ("left", "right", "up", "down", "slow", "shoot", "bomb")
+
+# Besides the actions, inputs carry "load": how expensive recent frames were
+# (0-3, see QualityGovernor.load_level). The endless director reacts to it,
+# so it's recorded in the two bits above the actions to keep replays exact.
+LOAD_SHIFT = len(ACTIONS)
+
+GRAZE_SCORE = 20  # score per grazed bullet
+
+# Bullets per shard in the sharded bullet mode
+SHARD_CAPACITY = 32768
+
+
+def encode_inputs(inputs):
+    """Pack an inputs dict into one small int for the input log."""
+    mask = 0
+    for bit, action in enumerate(ACTIONS):
+        if inputs.get(action):
+            mask |= 1 << bit
+    return mask | min(inputs.get("load", 0), 3) << LOAD_SHIFT
+
+
+def decode_inputs(mask):
+    inputs = {action: bool(mask >> bit & 1) for bit, action in enumerate(ACTIONS)}
+    inputs["load"] = mask >> LOAD_SHIFT & 3
+    return inputs
+
+
+# --- Player state (resettable) ---
+def reset_player_state(width, height):
+    return {
+        "x": width // 2,
+        "y": height // 2,
+        "size": 32,
+        "normalSpeed": 5,
+        "focusSpeed": 2,
+        "lives": 3,
+        "invulnerable": False,
+        "invulnTimer": 0,
+        "powerValue": 1,
+        "powerLevel": 1,
+        "fireCooldown": 0,
+        "fireRate": 6,
+        "chaseCooldown": 0,
+        "chaseRate": 30,  # will change by power level
+        "bombs": 3,
+        "score": 0,
+        "graze": 0,
+
+    }
+
+
+def update_power_level(player):
+    pv = player["powerValue"]
+    oldLevel = player["powerLevel"]
+
+    if pv >= 60:
+        player["powerLevel"] = 5
+    elif pv >= 35:
+        player["powerLevel"] = 4
+    elif pv >= 20:
+        player["powerLevel"] = 3
+    elif pv >= 10:
+        player["powerLevel"] = 2
+    else:
+        player["powerLevel"] = 1
+
+    if player["powerLevel"] != oldLevel:
+        events.emit("power", player["powerLevel"], pv)
+
+
+class GameSession:
+    """
+    All gameplay state plus one fixed frame of simulation (step).
+
+    Keeping it out of the main loop means the same frame code can be
+    re-run from a save-state (seeking) with the recorded inputs.
+    """
+
+    def __init__(self, width=800, height=900, seed=None, stagePath=DEFAULT_STAGE, endless=False,
+                 shards=0, shardWorkers=0):
+        self.width = width
+        self.height = height
+        self.stagePath = stagePath
+        self.endless = endless  # procedural waves instead of the stage file
+
+        # Sharded bullet mode (shards > 0, needs numpy): plain enemy bullets
+        # leave enemyBullets on the tick they're fired and live in a
+        # ShardedBulletStore, stepped by shardWorkers processes (0 = in this
+        # one). Programs, groups, shapes and lasers stay in enemyBullets.
+        # Call close() when done with the session.
+        self.massBullets = None
+        if shards:
+            if ShardedBulletStore is None:
+                raise RuntimeError("the sharded bullet mode needs numpy")
+            # The game script can't be imported again by spawned workers
+            startMethod = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+            self.massBullets = ShardedBulletStore(shards, SHARD_CAPACITY, shardWorkers, width, height,
+                                                  startMethod=startMethod)
+        self.lowRes = None  # playfield surface when drawing below full resolution
+        # Sprites for bullets, enemies, items, Rumia and the player; with
+        # atlas None everything is drawn with pygame.draw calls again.
+        # bulletRenderer may also be a SurfarrayBulletRenderer
+        self.atlas = atlas
+        self.bulletRenderer = AtlasBulletRenderer(atlas)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        # Every random roll in the simulation comes from this, so it can be saved
+        self.rng = random.Random(seed)
+
+        self.tick = 0
+        self.inputLog = array("H")  # one encoded input per simulated tick
+        self.focus = False
+        self.gameOver = False
+
+        self.player = reset_player_state(self.width, self.height)
+        if self.massBullets is not None:
+            self.massBullets.clear()
+        self.playerBullets = BulletSystem(bulletSpeed=10, shootCooldown=150,
+                                          screenWidth=self.width, screenHeight=self.height)
+        self.enemyBullets = BulletSystem(bulletSpeed=6, shootCooldown=500,
+                                         screenWidth=self.width, screenHeight=self.height)
+        self.enemySystem = EnemySystem(self.width, self.height, rng=self.rng)
+        self.itemSystem = ItemSystem(self.height)
+        self.bombSystem = BombSystem(self.width, self.height)
+        self.bossSystem = Rumia(screen_width=self.width, rng=self.rng)
+        if self.endless:
+            self.waveSystem = EndlessDirector(self.rng, self.width)
+        else:
+            self.waveSystem = WaveSystem(self.stagePath)
+        self.inputs = {}
+
+        # Fixed update order; every system runs once per tick except the
+        # wave director, which only needs to check its timeline at 10 Hz
+        self.scheduler = SystemScheduler(tickRate=60)
+        self.scheduler.register("waves", self.update_waves, hz=10)
+        self.scheduler.register("player", self.update_player)
+        self.scheduler.register("enemies", self.update_enemies)
+        self.scheduler.register("boss", self.update_boss)
+        self.scheduler.register("bullets", self.update_bullets)
+        self.scheduler.register("bomb+items", self.update_bomb_and_items)
+        self.scheduler.register("collisions", self.update_collisions)
+
+    def close(self):
+        """Stop the sharded bullet mode's workers and free its shared memory."""
+        if self.massBullets is not None:
+            self.massBullets.close()
+            self.massBullets = None
+
+    def enemy_bullet_count(self):
+        count = len(self.enemyBullets.bullets)
+        if self.massBullets is not None:
+            count += len(self.massBullets)
+        return count
+
+    def step(self, inputs, record=True):
+        """Simulate one frame. inputs is {action: bool} for the ACTIONS above."""
+        if record:
+            # Playing on after a rewind replaces the rest of the old log
+            del self.inputLog[self.tick:]
+            self.inputLog.append(encode_inputs(inputs))
+        sim_clock.set_tick(self.tick)
+
+        self.inputs = inputs
+        if inputs.get("bomb"):
+            if self.bombSystem.trigger(self.player):
+                events.emit("bomb", self.player["bombs"])
+
+        self.scheduler.run(self.tick)
+        self.tick += 1
+
+    # ---------- SCHEDULED SYSTEMS ----------
+    # Each takes the number of ticks since it last ran (see SystemScheduler)
+
+    def update_waves(self, ticks):
+        if self.endless:
+            self.waveSystem.observe(self.enemy_bullet_count(), self.inputs.get("load", 0))
+        self.waveSystem.update(self.enemySystem, False, self.bossSystem, ticks)
+
+    def update_player(self, ticks):
+        player = self.player
+        playerBullets = self.playerBullets
+        inputs = self.inputs
+
+        # Movement input (continuous)
+        move_left = inputs.get("left")
+        move_right = inputs.get("right")
+        move_up = inputs.get("up")
+        move_down = inputs.get("down")
+        is_focus = inputs.get("slow")
+        is_shooting = inputs.get("shoot")
+        self.focus = is_focus
+
+        # --- Fire cooldown tick-down ---
+        if player["fireCooldown"] > 0:
+            player["fireCooldown"] -= 1
+
+        # --- Chase cooldown tick-down ---
+        if player["chaseCooldown"] > 0:
+            player["chaseCooldown"] -= 1
+
+        # Movement logic with diagonal normalisation
+        speed = player["focusSpeed"] if is_focus else player["normalSpeed"]
+        moveX = 0
+        moveY = 0
+        if move_left:
+            moveX -= 1
+        if move_right:
+            moveX += 1
+        if move_up:
+            moveY -= 1
+        if move_down:
+            moveY += 1
+        if moveX != 0 and moveY != 0:
+            # normalize so diagonal speed equals straight speed
+            moveX *= 0.7071
+            moveY *= 0.7071
+        player["x"] += moveX * speed
+        player["y"] += moveY * speed
+
+        # Boundary clamp
+        player["x"] = max(0, min(self.width - player["size"], player["x"]))
+        player["y"] = max(0, min(self.height - player["size"], player["y"]))
+
+        # Shooting (player)
+        if is_shooting and player["fireCooldown"] == 0:
+
+            px = player["x"] + player["size"] // 2
+            py = player["y"]
+
+            if player["powerLevel"] == 1:
+                # Single forward shot
+                playerBullets.shoot(player["x"], player["y"], player["size"])
+
+            elif player["powerLevel"] == 2:
+                # Single + slight side shot
+                playerBullets.shoot(player["x"], player["y"], player["size"])
+                playerBullets.spawn_custom(px - 8, py, 0, -8)
+
+            elif player["powerLevel"] == 3:
+                # Dual parallel
+                playerBullets.spawn_custom(px - 6, py, 0, -8)
+                playerBullets.spawn_custom(px + 6, py, 0, -8)
+
+            elif player["powerLevel"] == 4:
+                # 3-way spread
+                playerBullets.spawn_custom(px, py, 0, -8)
+                playerBullets.spawn_custom(px, py, -2, -8)
+                playerBullets.spawn_custom(px, py, 2, -8)
+
+            elif player["powerLevel"] >= 5:
+                # 5-way spread
+                for angle in [-4, -2, 0, 2, 4]:
+                    playerBullets.spawn_custom(px, py, angle, -8)
+
+            player["fireCooldown"] = player["fireRate"]
+
+    def update_enemies(self, ticks):
+        player = self.player
+        # Enemy spawn/update/draw calls
+        self.enemySystem.updateEnemies(
+            self.enemyBullets,
+            player["x"],
+            player["y"],
+            player["size"],
+
+        )
+
+    def update_boss(self, ticks):
+        self.bossSystem.update(self.enemyBullets, self.player)
+
+    def update_bullets(self, ticks):
+        self.playerBullets.updateBullets()
+        enemyBullets = self.enemyBullets
+        mass = self.massBullets
+        if mass is not None:
+            # New plain bullets move over before they're moved, so they
+            # move on the same tick either way
+            mass.add_bullets(enemyBullets.take_plain())
+            maxBullets = enemyBullets.maxBullets
+            if maxBullets is not None:
+                # One cap over both stores: each keeps its share of it, in
+                # proportion to its count, and drops its oldest bullets.
+                # enemyBullets' own cap then has nothing left to drop.
+                objects = len(enemyBullets.bullets)
+                total = objects + len(mass)
+                if total > maxBullets:
+                    keep = maxBullets * objects // total
+                    enemyBullets.cap(keep)
+                    mass.cap(maxBullets - keep)
+            mass.move()
+        # Re-aiming motion programs aim at the player
+        enemyBullets.updateBullets(self.player["x"], self.player["y"])
+
+    def update_bomb_and_items(self, ticks):
+        player = self.player
+        enemyBullets = self.enemyBullets
+        itemSystem = self.itemSystem
+        bombSystem = self.bombSystem
+
+        # --- BOMB + ITEMS ---
+        # Bomb cancels enemy bullets in bulk; leftovers are paid out directly
+        bombScore, bombPower = bombSystem.update(enemyBullets, itemSystem, self.massBullets)
+        itemScore, itemPower = itemSystem.update(player)
+        player["score"] += bombScore + itemScore
+        if bombPower or itemPower:
+            player["powerValue"] += bombPower + itemPower
+            update_power_level(player)
+
+        # Player can't be hit while their bomb is going off
+        if bombSystem.active:
+            player["invulnerable"] = True
+            player["invulnTimer"] = sim_clock.get_ticks()
+
+    def update_collisions(self, ticks):
+        player = self.player
+        playerBullets = self.playerBullets
+        enemyBullets = self.enemyBullets
+        enemySystem = self.enemySystem
+        bossSystem = self.bossSystem
+
+        # --- COLLISIONS ---
+
+        # Calculate player hitbox centre
+        hitbox_x = player["x"] + player["size"] // 2
+        hitbox_y = player["y"] + player["size"] // 2
+
+        # Enemy bullets still too far away to have reached the player since
+        # their last test are skipped (see bullet_hits)
+        due = due_bullets(enemyBullets.bullets, self.tick)
+        mass = self.massBullets
+
+        if metrics.enabled:
+            # Pairs the loops below can test (early outs not subtracted)
+            boss = 1 if bossSystem.spawned and not bossSystem.dead else 0
+            enemies = len(enemySystem.enemies)
+            tests = (len(due) + len(enemyBullets.lasers) + (len(mass) if mass is not None else 0)
+                     + len(playerBullets.bullets) * (enemies + boss)
+                     + enemies + boss)
+            COLLISION_TESTS.inc(tests)
+            COLLISION_TESTS_FRAME.set(tests)
+
+        # 1) Enemy bullets hitting (or grazing) player
+        # Use circular hitbox collision,
+        playerSpeed = max(player["normalSpeed"], player["focusSpeed"])
+        hits, grazes = bullet_hits(due, self.tick, hitbox_x, hitbox_y, HITBOX_RADIUS, playerSpeed,
+                                   GRAZE_RADIUS)
+        grazeCount = len(grazes)
+        massHit = None
+        if mass is not None:
+            # The store's bullets are all tested: vectorised, that's
+            # cheaper than skipping the far ones
+            _, massGrazes, massHit = mass.collide(hitbox_x, hitbox_y, HITBOX_RADIUS, GRAZE_RADIUS)
+            grazeCount += massGrazes
+        if grazeCount:
+            player["graze"] += grazeCount
+            player["score"] += GRAZE_SCORE * grazeCount
+            events.emit("graze", grazeCount, player["graze"])
+        for eb in hits:
+            # only apply if not invulnerable
+            if not player["invulnerable"]:
+                player["lives"] -= 1
+                player["invulnerable"] = True
+                player["invulnTimer"] = sim_clock.get_ticks()
+                # remove bullet that hit
+                enemyBullets.remove(eb)
+                events.emit("hit_bullet", eb.x, eb.y)
+        if massHit is not None and not player["invulnerable"]:
+            shard, row, x, y = massHit
+            player["lives"] -= 1
+            player["invulnerable"] = True
+            player["invulnTimer"] = sim_clock.get_ticks()
+            mass.remove(shard, row)
+            events.emit("hit_bullet", x, y)
+
+        # 1B) Lasers hitting player (one capsule test per laser)
+        if enemyBullets.lasers and not player["invulnerable"]:
+            if enemyBullets.lasers_hit(hitbox_x, hitbox_y, HITBOX_RADIUS) is not None:
+                player["lives"] -= 1
+                player["invulnerable"] = True
+                player["invulnTimer"] = sim_clock.get_ticks()
+                events.emit("hit_laser", hitbox_x, hitbox_y)
+
+        # invulnerability timeout (300ms)
+        if player["invulnerable"]:
+            if sim_clock.get_ticks() - player["invulnTimer"] > 300:
+                player["invulnerable"] = False
+
+        # 2) Player bullets hitting enemies
+        # iterate copies to allow removal during loops
+        for pb in playerBullets.bullets[:]:
+            for enemy in enemySystem.enemies[:]:
+                if check_collision(pb.x, pb.y, pb.width, pb.height,
+                                   enemy.x, enemy.y, enemy.width, enemy.height):
+                    enemy.health -= 1
+                    # remove the bullet that hit
+                    playerBullets.remove(pb)
+                    # if enemy died, remove it
+                    if enemy.health <= 0:
+                        try:
+                            player["powerValue"] += 2  # Gain 2 power per kill
+                            update_power_level(player)
+                            enemySystem.enemies.remove(enemy)
+                            enemy.alive = False
+                            events.emit("kill", enemy.x, enemy.y)
+                        except ValueError:
+                            pass
+                    break  # bullet can only hit one enemy
+
+        # 2B) Player bullets hitting Boss (Rumia)
+        if bossSystem.spawned and not bossSystem.dead:
+            for pb in playerBullets.bullets[:]:
+                if check_collision(
+                        pb.x, pb.y, pb.width, pb.height,
+                        bossSystem.x - bossSystem.width // 2,
+                        bossSystem.y,
+                        bossSystem.width,
+                        bossSystem.height
+                ):
+                    bossSystem.hp -= 1  # Reduce boss HP
+
+                    playerBullets.remove(pb)
+
+                    # Check if boss dies
+                    if bossSystem.hp <= 0 and not bossSystem.dead:
+                        bossSystem.dead = True
+                        events.emit("boss_dead")
+
+        # 3) Enemy colliding with player (instant death for testing)
+        for enemy in enemySystem.enemies[:]:
+            # Use circular hitbox collision for enemy body
+            if circle_rect_collision(
+                    hitbox_x,
+                    hitbox_y,
+                    HITBOX_RADIUS,
+                    enemy.x,
+                    enemy.y,
+                    enemy.width,
+                    enemy.height
+
+            ):
+                player["lives"] = 0
+                events.emit("hit_body", enemy.x, enemy.y)
+                break
+        # 3B) Player colliding with Boss body
+        if bossSystem.spawned and not bossSystem.dead:
+            if circle_rect_collision(
+                    hitbox_x,
+                    hitbox_y,
+                    HITBOX_RADIUS,
+                    bossSystem.x - bossSystem.width // 2,
+                    bossSystem.y,
+                    bossSystem.width,
+                    bossSystem.height
+            ):
+                if not player["invulnerable"]:
+                    player["lives"] -= 1
+                    player["invulnerable"] = True
+                    player["invulnTimer"] = sim_clock.get_ticks()
+                    events.emit("hit_boss", bossSystem.x, bossSystem.y)
+
+        # Check game over
+        if player["lives"] <= 0:
+            self.gameOver = True
+
+    def describe(self):
+        """Entity counts and boss state, for debug reports."""
+        boss = self.bossSystem
+        pattern = None
+        if boss.spawned and not boss.dead and boss.currentPattern and boss.currentPattern.onGoing():
+            pattern = type(boss.currentPattern).__name__
+        return {
+            "tick": self.tick,
+            "enemyBullets": len(self.enemyBullets.bullets),
+            "massBullets": len(self.massBullets) if self.massBullets is not None else None,
+            "lasers": len(self.enemyBullets.lasers),
+            "playerBullets": len(self.playerBullets.bullets),
+            "chaseBullets": len(self.playerBullets.chase_bullets),
+            "enemies": len(self.enemySystem.enemies),
+            "items": len(self.itemSystem.items),
+            "bossHp": boss.hp if boss.spawned and not boss.dead else None,
+            "bossPattern": pattern,
+            "wavePhase": self.waveSystem.phase,
+        }
+
+    def draw(self, screen, quality=None):
+        """Draw the playfield. quality is QualityGovernor.settings (None = full)."""
+        player = self.player
+        effects = quality is None or quality["effects"]
+        simpleBullets = quality is not None and quality["simpleBullets"]
+        scale = 1.0 if quality is None else quality["renderScale"]
+
+        # Render scale: the playfield is drawn into a smaller surface and
+        # stretched to the window in one call. Only drawing is scaled; all
+        # positions and collisions stay in full-resolution coordinates.
+        target = screen
+        if scale != 1.0:
+            size = (int(self.width * scale), int(self.height * scale))
+            if self.lowRes is None or self.lowRes.get_size() != size:
+                self.lowRes = pygame.Surface(size).convert(screen)
+            target = self.lowRes
+
+        target.fill((10, 10, 30))  # dark background
+
+        # Draw bullets and enemies then player (simple layering)
+        self.playerBullets.drawBullets(target, simpleBullets, scale, self.bulletRenderer)
+        self.playerBullets.drawChaseBullets(target, scale, self.bulletRenderer, simpleBullets)
+        self.enemySystem.drawEnemies(target, scale, self.atlas)
+        self.enemyBullets.drawBullets(target, simpleBullets, scale, self.bulletRenderer)
+        if self.massBullets is not None:
+            self.massBullets.draw(target, scale, self.bulletRenderer, self.atlas, simpleBullets)
+        self.enemyBullets.drawLasers(target, scale)
+
+        #bossDrawing
+        if self.bossSystem.spawned and not self.bossSystem.dead:
+            self.bossSystem.draw(target, scale, self.atlas)
+
+        self.itemSystem.draw(target, scale, self.atlas)
+        self.bombSystem.draw(target, effects, scale)
+
+        # Player draw - flash while invulnerable
+        flashing = effects and player["invulnerable"]
+        player_color = (0, 255, 255) if not flashing or (sim_clock.get_ticks() % 300 < 150) else (100, 100, 100)
+        if self.atlas is not None:
+            sprite = self.atlas.get("block", player["size"], player["size"], player_color,
+                                    (255, 255, 255), scale=scale)
+            target.blit(sprite, (player["x"] * scale, player["y"] * scale))
+        else:
+            pygame.draw.rect(target, player_color,
+                             (player["x"] * scale, player["y"] * scale,
+                              player["size"] * scale, player["size"] * scale))
+
+        if target is not screen:
+            pygame.transform.scale(target, screen.get_size(), screen)
+
+        # Draw visible hitbox only when in focus mode (Touhou-style).
+        # Always at full resolution, it's what the player dodges with
+        if self.focus:
+            hitbox_x = player["x"] + player["size"] // 2
+            hitbox_y = player["y"] + player["size"] // 2
+
+            pygame.draw.circle(
+                screen,
+                (255, 255, 255),  # white for high contrast
+                (hitbox_x, hitbox_y),
+                HITBOX_RADIUS,
+                1  # outline only
+            )
+
+        # I draw a small visual hitbox when the player is in focus mode.
+        # This represents the true collision area of the player and is intentionally
+        # smaller than the player sprite to allow precise dodging.
+        # The hitbox is only visible in focus mode to reduce screen clutter,
@@ -0,0 +1,125 @@
+# gc_control.py
+import gc
+import logging
+import time
+import tracemalloc
+
+from event_log import events
+
+log = logging.getLogger(__name__)
+
+
+class GCControl:
+    """
+    Keeps the cyclic garbage collector out of gameplay frames.
+
+    Most bullet garbage is freed by reference counting straight away; the
+    cyclic collector only adds random pauses on top. So:
+      - freeze() after startup moves everything loaded so far into a
+        permanent generation that later collections skip
+      - during gameplay automatic collection is off
+      - the game requests a collection at safe points (wave barriers, phase
+        changes, boss entry, pause) and it runs after the frame is flipped,
+        in the time the frame would otherwise sleep
+    If a long stretch has no safe point, a young-generation collection is run
+    anyway once enough allocations pile up, so memory can't grow unbounded.
+    """
+
+    def __init__(self, enabled=True, youngLimit=50000):
+        self.enabled = enabled
+        self.youngLimit = youngLimit  # gen 0 count that forces a young collection
+        self.gameplay = False
+        self.pending = None  # reason of the requested collection
+
+        self.collections = 0
+        self.lastMs = 0.0
+        self.maxMs = 0.0
+
+    def freeze(self):
+        """Call once everything long-lived is loaded."""
+        if not self.enabled:
+            return
+        gc.collect()
+        gc.freeze()
+        log.info("gc: froze %d startup objects", gc.get_freeze_count())
+
+    def set_gameplay(self, active):
+        """Automatic collection is off while active is True."""
+        if not self.enabled or active == self.gameplay:
+            return
+        self.gameplay = active
+        if active:
+            gc.disable()
+        else:
+            gc.enable()
+            self.request("pause")
+
+    def request(self, reason):
+        """Ask for a full collection at the next run_pending()."""
+        if self.enabled:
+            self.pending = reason
+
+    def run_pending(self):
+        """Call after the frame is on screen."""
+        if not self.enabled:
+            return
+        if self.pending is not None:
+            generation = 2
+        elif self.gameplay and gc.get_count()[0] > self.youngLimit:
+            generation = 0
+        else:
+            return
+
+        start = time.perf_counter()
+        gc.collect(generation)
+        ms = (time.perf_counter() - start) * 1000
+
+        self.pending = None
+        self.collections += 1
+        self.lastMs = ms
+        if ms > self.maxMs:
+            self.maxMs = ms
+        events.emit("gc", generation, round(ms, 2))
+
+
+class AllocationBudget:
+    """
+    Debug option: per-system allocation sizes per frame, measured with
+    tracemalloc (slows everything down noticeably while on).
+
+    tracemalloc can't count total bytes allocated cheaply, so for each system
+    call this records the peak extra memory in use during the call, which is
+    what a burst of short-lived objects shows up as. Frames where a system
+    goes over budgetBytes are logged, at most once a second per system.
+    """
+
+    def __init__(self, budgetBytes=64 * 1024):
+        self.budgetBytes = budgetBytes
+        self.frame = {}  # system name -> peak bytes this frame
+        self.lastWarned = {}
+        self.startBytes = 0
+
+    def start(self):
+        tracemalloc.start()
+        log.info("allocation budget: %.1f KB per system per frame", self.budgetBytes / 1024)
+
+    def before(self):
+        tracemalloc.reset_peak()
+        self.startBytes = tracemalloc.get_traced_memory()[0]
+
+    def after(self, name):
+        peak = tracemalloc.get_traced_memory()[1] - self.startBytes
+        self.frame[name] = self.frame.get(name, 0) + peak
+
+    def end_frame(self, tick):
+        now = time.perf_counter()
+        for name, peak in self.frame.items():
+            if peak > self.budgetBytes and now - self.lastWarned.get(name, 0) >= 1.0:
+                self.lastWarned[name] = now
+                log.warning("tick %d: %s allocated %.1f KB (budget %.1f KB)",
+                            tick, name, peak / 1024, self.budgetBytes / 1024)
+        self.frame.clear()
+
+
+# Shared by the main loop and the systems that know about safe points
+collector = GCControl()
@@ -1,4 +1,8 @@
 import pygame
+from resource_manager import resources, UI_FONT
+
+# Playfield render scales offered in the menu (S cycles through them)
+RENDER_SCALES = [("full", 1.0), ("2/3", 2 / 3), ("1/2", 1 / 2)]
 
 class MenuSystem:
     def __init__(self):
@@ -14,7 +18,8 @@ class MenuSystem:
             "right": pygame.K_RIGHT,
             "up": pygame.K_UP,
             "down": pygame.K_DOWN,
-            "slow": pygame.K_LSHIFT
+            "slow": pygame.K_LSHIFT,
+            "bomb": pygame.K_x
         }
         # Stores the key bindings for each gameplay action.
         # Using a dictionary allows controls to be easily updated and rebound
@@ -23,47 +28,89 @@ class MenuSystem:
         # For rebinding
         self.rebinding = None  # holds which action is being rebound
 
-        self.font = pygame.font.SysFont(None, 50)
-        self.smallFont = pygame.font.SysFont(None, 30)
+        # Index into RENDER_SCALES; lower scales help slow machines
+        self.renderScaleIndex = 0
+
+        # Set when the game is started with E (procedural endless waves)
+        self.endless = False
+
+        # Rendered text by (font, text, colour). The menu only changes on
+        # input, so each label is rendered once instead of every frame
+        self.textCache = {}
+
+    @property
+    def renderScale(self):
+        return RENDER_SCALES[self.renderScaleIndex][1]
+
+    # Fonts are looked up on first draw, not when the menu is created
+    @property
+    def font(self):
+        return resources.font(UI_FONT, 50)
+
+    @property
+    def smallFont(self):
+        return resources.font(UI_FONT, 30)
+
+    def text(self, font, text, color):
+        key = (font, text, color)
+        surface = self.textCache.get(key)
+        if surface is None:
+            surface = self.textCache[key] = font.render(text, True, color)
+        return surface
 
     def draw_menu(self, screen):
         screen.fill((0, 0, 0))
-        title = self.font.render("Infinite Bullet Reverie", True, (255, 255, 255))
-        start = self.smallFont.render("Press ENTER to Start", True, (200, 200, 200))
-        controls = self.smallFont.render("Press C for Controls", True, (200, 200, 200))
+        title = self.text(self.font, "Infinite Bullet Reverie", (255, 255, 255))
+        start = self.text(self.smallFont, "Press ENTER to Start", (200, 200, 200))
+        endless = self.text(self.smallFont, "Press E for Endless Mode", (200, 200, 200))
+        controls = self.text(self.smallFont, "Press C for Controls", (200, 200, 200))
+        scale = self.text(
+            self.smallFont,
+            f"Press S for Render Scale: {RENDER_SCALES[self.renderScaleIndex][0]}",
+            (200, 200, 200)
+        )
 
         screen.blit(title, (120, 150))
         screen.blit(start, (250, 300))
-        screen.blit(controls, (250, 350))
+        screen.blit(endless, (250, 350))
+        screen.blit(controls, (250, 400))
+        screen.blit(scale, (250, 450))
 
     def draw_controls(self, screen):
         screen.fill((0, 0, 0))
 
-        header = self.font.render("Controls", True, (255, 255, 255))
+        header = self.text(self.font, "Controls", (255, 255, 255))
         screen.blit(header, (300, 80))
 
         y = 200
         for action, key in self.controls.items():
-            text = self.smallFont.render(
+            text = self.text(
+                self.smallFont,
                 f"{action.capitalize()}: {pygame.key.name(key)}",
-                True, (255, 255, 255)
+                (255, 255, 255)
             )
             screen.blit(text, (200, y))
             y += 40
 
-        msg = self.smallFont.render("Press R to Rebind Controls | ESC to return", True, (200, 200, 200))
+        msg = self.text(self.smallFont, "Press R to Rebind Controls | ESC to return", (200, 200, 200))
         screen.blit(msg, (150, 500))
 
         if self.rebinding:
-            waiting = self.smallFont.render(f"Press a key for: {self.rebinding}", True, (255, 200, 200))
+            waiting = self.text(self.smallFont, f"Press a key for: {self.rebinding}", (255, 200, 200))
             screen.blit(waiting, (200, 550))
 
     def handle_menu_input(self, event):
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_RETURN:
                 self.state = "game"
+                self.endless = False
+            if event.key == pygame.K_e:
+                self.state = "game"
+                self.endless = True
             if event.key == pygame.K_c:
                 self.state = "controls"
+            if event.key == pygame.K_s:
+                self.renderScaleIndex = (self.renderScaleIndex + 1) % len(RENDER_SCALES)
 
     def handle_controls_input(self, event):
         if event.type == pygame.KEYDOWN:
@@ -0,0 +1,225 @@
+# metrics.py
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from resource_manager import cache_dir
+
+log = logging.getLogger(__name__)
+
+PREFIX = "reverie_"
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Frame time buckets (ms) around the 16.7 ms budget
+FRAME_MS_BUCKETS = (1, 2, 4, 8, 12, 16.7, 20, 25, 33.3, 50, 100)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Counter:
+    def __init__(self, registry, name, help, labelName=None):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelName = labelName
+        self.values = {}
+
+    def inc(self, amount=1, label=None):
+        if not self.registry.enabled:
+            return
+        self.values[label] = self.values.get(label, 0) + amount
+
+    def samples(self):
+        for label, value in list(self.values.items()):
+            labels = [(self.labelName, label)] if self.labelName else []
+            yield f"{self.name}_total{format_labels(labels)} {value}"
+
+
+class Gauge:
+    """A value set by the game, or read from a callback only when exported."""
+
+    def __init__(self, registry, name, help, labelName=None):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelName = labelName
+        self.values = {}
+        self.callbacks = {}
+
+    def set(self, value, label=None):
+        if not self.registry.enabled:
+            return
+        self.values[label] = value
+
+    def set_function(self, fn, label=None):
+        self.callbacks[label] = fn
+
+    def samples(self):
+        values = dict(self.values)
+        for label, fn in list(self.callbacks.items()):
+            values[label] = fn()
+        for label, value in values.items():
+            labels = [(self.labelName, label)] if self.labelName else []
+            yield f"{self.name}{format_labels(labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, registry, name, help, buckets):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        if not self.registry.enabled:
+            return
+        i = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        counts = list(self.counts)
+        cumulative = 0
+        for bound, n in zip(self.buckets + ("+Inf",), counts):
+            cumulative += n
+            yield f'{self.name}_bucket{{le="{bound}"}} {cumulative}'
+        yield f"{self.name}_sum {self.sum}"
+        yield f"{self.name}_count {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    Runtime counters for long soak sessions.
+
+    Disabled by default: every inc/set/observe returns straight away, and
+    callback gauges are only read when exporting. start() turns it on, writes
+    an OpenMetrics text file every few seconds from a background thread and,
+    if a port is given, also serves it on http://127.0.0.1:<port>/metrics.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.metrics = []
+        self.path = None
+        self.interval = 10.0
+        self.stopping = threading.Event()
+        self.writer = None
+        self.server = None
+
+    # ---------- DEFINING METRICS ----------
+
+    def add(self, metric):
+        metric.name = PREFIX + metric.name
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelName=None):
+        return self.add(Counter(self, name, help, labelName))
+
+    def gauge(self, name, help, labelName=None):
+        return self.add(Gauge(self, name, help, labelName))
+
+    def histogram(self, name, help, buckets):
+        return self.add(Histogram(self, name, help, buckets))
+
+    # ---------- EXPORT ----------
+
+    def render(self):
+        kinds = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}
+        lines = []
+        for m in self.metrics:
+            lines.append(f"# TYPE {m.name} {kinds[type(m)]}")
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.extend(m.samples())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        text = self.render()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, self.path)  # readers never see a half-written file
+
+    def start(self, path=None, interval=10.0, port=None):
+        if self.enabled:
+            return
+        if path is None:
+            os.makedirs(cache_dir(), exist_ok=True)
+            path = os.path.join(cache_dir(), "metrics.txt")
+        self.path = path
+        self.interval = interval
+        self.enabled = True
+
+        self.stopping.clear()
+        self.writer = threading.Thread(target=self.run_writer, name="metrics-flush", daemon=True)
+        self.writer.start()
+        log.info("metrics: writing %s every %gs", path, interval)
+
+        if port is not None:
+            self.serve(port)
+
+    def run_writer(self):
+        while not self.stopping.wait(self.interval):
+            self.flush()
+
+    def serve(self, port):
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep scrapes out of the console
+
+        # Localhost only
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+        log.info("metrics: serving http://127.0.0.1:%d/metrics", port)
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.stopping.set()
+        self.writer.join()
+        self.flush()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+        self.enabled = False
+
+
+metrics = MetricsRegistry()
+
+# Metrics updated from inside the game systems
+BULLETS_SPAWNED = metrics.counter(
+    "bullets_spawned", "Bullets spawned, by pattern.", "pattern")
+COLLISION_TESTS = metrics.counter(
+    "collision_tests", "Narrow-phase collision tests (pairs checked, before early outs).")
+COLLISION_TESTS_FRAME = metrics.gauge(
+    "collision_tests_last_frame", "Narrow-phase collision tests in the last collision pass.")
+FRAME_TIME_MS = metrics.histogram(
+    "frame_time_ms", "Work time of gameplay frames in ms (before waiting for vsync/tick).",
+    FRAME_MS_BUCKETS)
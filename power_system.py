@@ -1,12 +1,30 @@
 import pygame
+import math
+
+from sprite_atlas import SpriteLayer
+
+# Items spawned from cancelled bullets (bombs). Capped so a full-screen clear
+# of thousands of bullets never floods the item list in a single frame.
+MAX_ITEMS = 600
+MAX_CANCEL_ITEMS_PER_FRAME = 120
+CANCEL_SCORE_VALUE = 10  # score per cancelled bullet
+CANCEL_POWER_EVERY = 25  # every Nth cancelled bullet drops a power item
+
 
 class PowerItem:
-    def __init__(self, x, y):
+    def __init__(self, x, y, kind="power", homing=False):
 
         # Initial spawn position
         self.x = x
         self.y = y
 
+        # "power" raises the player's power, "score" adds to score
+        self.kind = kind
+
+        # Cancel items fly straight to the player instead of arcing
+        self.homing = homing
+        self.homeSpeed = 9
+
         # Arc movement
         self.vy = -4      # initial upward force
         self.gravity = 0.2
@@ -22,30 +40,102 @@ class PowerItem:
         self.vy += self.gravity
         self.y += self.vy
 
-    def draw(self, screen):
+    def home_towards(self, tx, ty):
+        dx = tx - self.x
+        dy = ty - self.y
+        dist = math.hypot(dx, dy)
+        if dist <= self.homeSpeed:
+            self.x = tx
+            self.y = ty
+            return
+        self.x += dx / dist * self.homeSpeed
+        self.y += dy / dist * self.homeSpeed
 
-        # TEMP: simple red circle (sprite later)
-        pygame.draw.circle(
-            screen,
-            (255, 50, 50),
-            (int(self.x), int(self.y)),
-            6
-        )
+    def draw(self, screen, scale=1.0):
+
+        # TEMP: simple circles (sprite later)
+        if self.kind == "score":
+            pygame.draw.circle(screen, (80, 140, 255),
+                               (int(self.x * scale), int(self.y * scale)), max(1, int(3 * scale)))
+        else:
+            pygame.draw.circle(
+                screen,
+                (255, 50, 50),
+                (int(self.x * scale), int(self.y * scale)),
+                max(1, int(6 * scale))
+            )
 
 
 class ItemSystem:
-    def __init__(self):
+    def __init__(self, screenHeight=900):
         self.items = []
+        self.screenHeight = screenHeight
 
     def spawn_power(self, x, y):
         self.items.append(PowerItem(x, y))
 
-    def update(self):
-        for item in self.items[:]:
-            item.update()
-            if item.y > 800:  # off screen
-                self.items.remove(item)
+    def spawn_cancel_items(self, bullets):
+        """Turn cancelled bullets into homing score/power items.
+
+        Only MAX_CANCEL_ITEMS_PER_FRAME items are created per call (and never more
+        than MAX_ITEMS alive); the rest are paid out straight away.
+        Returns (score, power) for the bullets that did not become items.
+        """
+        room = min(MAX_CANCEL_ITEMS_PER_FRAME, MAX_ITEMS - len(self.items))
+        room = max(room, 0)
+        for i, b in enumerate(bullets[:room]):
+            kind = "power" if i % CANCEL_POWER_EVERY == CANCEL_POWER_EVERY - 1 else "score"
+            self.items.append(PowerItem(b.x, b.y, kind=kind, homing=True))
+
+        leftover = max(len(bullets) - room, 0)
+        return leftover * CANCEL_SCORE_VALUE, leftover // CANCEL_POWER_EVERY
+
+    def update(self, player=None):
+        """Move items and collect the ones touching the player.
+
+        Returns (score, power) collected this frame.
+        """
+        score = 0
+        power = 0
+
+        if player is not None:
+            px = player["x"] + player["size"] / 2
+            py = player["y"] + player["size"] / 2
+            reach = player["size"] / 2 + 8
+
+        for item in self.items:
+            if item.homing and player is not None:
+                item.home_towards(px, py)
+            else:
+                item.update()
+
+            if player is not None and abs(item.x - px) <= reach and abs(item.y - py) <= reach:
+                item.collected = True
+                if item.kind == "score":
+                    score += CANCEL_SCORE_VALUE
+                else:
+                    power += 1
+
+        # Drop collected and off-screen items in one pass
+        self.items = [
+            i for i in self.items
+            if not i.collected and i.y <= self.screenHeight
+        ]
+        return score, power
+
+    def draw(self, screen, scale=1.0, atlas=None):
+        if atlas is None:
+            for item in self.items:
+                item.draw(screen, scale)
+            return
 
-    def draw(self, screen):
+        # Same looks as PowerItem.draw, blitted as one layer
+        layer = SpriteLayer()
         for item in self.items:
-            item.draw(screen)
+            if item.kind == "score":
+                radius, color = 3, (80, 140, 255)
+            else:
+                radius, color = 6, (255, 50, 50)
+            sprite = atlas.get("orb", 2 * radius, 2 * radius, color, scale=scale)
+            layer.add(sprite, (item.x - radius) * scale, (item.y - radius) * scale)
+        layer.draw(screen)
@@ -0,0 +1,94 @@
+# quality_benchmark.py
+# Frame time at each QualityGovernor tier: python quality_benchmark.py [bullets] [rounds]
+# Runs headless, with the cyclic GC off as in gameplay. Exits with 1 if a
+# tier doesn't lower the frame time of the tier before it.
+import contextlib
+import gc
+import io
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from bullet_system import Bullet, EnemyBullet
+from game_session import GameSession
+from quality_governor import QualityGovernor
+from save_state import capture, restore_capture
+
+WIDTH, HEIGHT = 800, 900
+FRAMES = 60  # per tier and round; even, so "half render" draws exactly half
+
+
+def make_session(n, rng):
+    # A dense pattern: slow bullets that stay on screen for the whole run
+    session = GameSession(seed=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in range(600):
+            session.step({"shoot": True, "left": t % 60 < 30, "right": t % 60 >= 30})
+    bullets = session.enemyBullets.bullets
+    for i in range(n):
+        x, y = rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT - 200)
+        vx, vy = rng.uniform(-0.3, 0.3), rng.uniform(0, 0.5)
+        if i % 3:
+            bullets.append(EnemyBullet(x, y, vx, vy))
+        else:
+            bullets.append(Bullet(x, y, vx, vy, 8, 8, (255, 120, 120)))
+    return session
+
+
+def frame_ms(session, start, screen, settings):
+    """Mean ms of a step plus (on rendered frames) draw and flip, as the game loop does them."""
+    restore_capture(session, start)
+    session.enemyBullets.maxBullets = settings["bulletCap"]
+    total = 0.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(FRAMES):
+            begin = time.perf_counter()
+            # The player can't die mid-run, or later rounds would measure something else
+            session.player["invulnerable"] = True
+            session.player["invulnTimer"] = 1 << 40
+            session.step({"shoot": True})
+            if session.tick % settings["renderEvery"] == 0:
+                session.draw(screen, settings)
+                pygame.display.flip()
+            total += time.perf_counter() - begin
+    return total * 1000 / FRAMES
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    session = make_session(n, random.Random(1))
+    start = capture(session)
+    governor = QualityGovernor()
+    tiers = [(t["name"], governor.settings_for(i)) for i, t in enumerate(governor.tiers)]
+    gc.disable()
+
+    # Tiers take turns each round; the best round of each is kept, which
+    # filters out the other load on the machine
+    best = [float("inf")] * len(tiers)
+    for _ in range(rounds):
+        for i, (_, settings) in enumerate(tiers):
+            best[i] = min(best[i], frame_ms(session, start, screen, settings))
+        gc.collect()
+
+    print(f"{n} extra enemy bullets, best mean of {rounds} rounds of {FRAMES} frames")
+    print(f"{'tier':>16}{'ms':>8}")
+    worse = False
+    for i, (name, _) in enumerate(tiers):
+        print(f"{name:>16}{best[i]:>8.2f}")
+        worse |= i > 0 and best[i] >= best[i - 1]
+
+    pygame.quit()
+    print("a tier doesn't lower the frame time" if worse else "every tier lowers the frame time")
+    return 1 if worse else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
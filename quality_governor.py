@@ -0,0 +1,142 @@
+# quality_governor.py
+import logging
+
+log = logging.getLogger(__name__)
+
+# Degradation tiers, cheapest to give up first. Each tier keeps the
+# settings of the ones before it, and each one has to lower the frame time
+# of a bullet-heavy frame (quality_benchmark.py). Render scale isn't a tier:
+# the upscale and the scaled bullet positions cost more than the smaller
+# playfield saves, so it's only the menu's choice (maxRenderScale).
+QUALITY_TIERS = [
+    {"name": "full"},
+    {"name": "simple bullets", "effects": False, "simpleBullets": True},
+    {"name": "half render", "renderEvery": 2},
+    {"name": "bullet cap", "bulletCap": 1500},
+]
+
+DEFAULT_SETTINGS = {
+    "effects": True,        # invulnerability flashing, full-screen bomb flash
+    "simpleBullets": False,
+    "renderScale": 1.0,     # playfield drawn at this fraction of the window size
+    "renderEvery": 1,       # draw every Nth frame (simulation always runs)
+    "bulletCap": None,      # max enemy bullets, oldest removed first
+}
+
+
+class FrameTimes:
+    """Fixed-size ring buffer of recent frame times (ms)."""
+
+    def __init__(self, size=120):
+        self.times = [0.0] * size
+        self.size = size
+        self.index = 0
+        self.count = 0
+
+    def add(self, ms):
+        self.times[self.index] = ms
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def average(self, last=None):
+        n = min(last or self.count, self.count)
+        if n == 0:
+            return 0.0
+        total = 0.0
+        for i in range(1, n + 1):
+            total += self.times[(self.index - i) % self.size]
+        return total / n
+
+    def maximum(self, last=None):
+        n = min(last or self.count, self.count)
+        if n == 0:
+            return 0.0
+        return max(self.times[(self.index - i) % self.size] for i in range(1, n + 1))
+
+
+class QualityGovernor:
+    """
+    Watches frame work time and moves through QUALITY_TIERS.
+
+    It steps down one tier when the recent average is over budget, and back up
+    one tier after load has stayed well under budget for a while. A cooldown
+    between changes stops it flip-flopping around the threshold.
+    """
+
+    def __init__(self, budgetMs=1000 / 60 * 0.85, tiers=QUALITY_TIERS,
+                 window=30, cooldown=90, recoverFrames=240):
+        self.budgetMs = budgetMs
+        self.tiers = tiers
+        self.window = window
+        self.cooldown = cooldown
+        self.recoverFrames = recoverFrames
+
+        self.frameTimes = FrameTimes()
+        self.tier = 0
+        self.framesSinceChange = 0
+        self.calmFrames = 0
+        self.enabled = True
+
+        # Render scale picked in the menu
+        self.maxRenderScale = 1.0
+
+        self.settings = self.settings_for(0)
+
+    def settings_for(self, tier):
+        settings = dict(DEFAULT_SETTINGS)
+        for t in self.tiers[1:tier + 1]:
+            settings.update({k: v for k, v in t.items() if k != "name"})
+        settings["renderScale"] = min(settings["renderScale"], self.maxRenderScale)
+        return settings
+
+    def set_max_render_scale(self, scale):
+        self.maxRenderScale = scale
+        self.settings = self.settings_for(self.tier)
+
+    @property
+    def tierName(self):
+        return self.tiers[self.tier]["name"]
+
+    def set_tier(self, tier):
+        tier = max(0, min(tier, len(self.tiers) - 1))
+        if tier != self.tier:
+            log.info("quality: %s -> %s", self.tierName, self.tiers[tier]["name"])
+        self.tier = tier
+        self.settings = self.settings_for(tier)
+        self.framesSinceChange = 0
+        self.calmFrames = 0
+
+    def record(self, workMs):
+        """Feed one frame's work time (excluding the frame-limiter sleep)."""
+        self.frameTimes.add(workMs)
+        if not self.enabled:
+            return
+
+        self.framesSinceChange += 1
+        avg = self.frameTimes.average(self.window)
+
+        if avg < self.budgetMs * 0.6:
+            self.calmFrames += 1
+        else:
+            self.calmFrames = 0
+
+        if self.framesSinceChange < self.cooldown:
+            return
+
+        if avg > self.budgetMs and self.tier < len(self.tiers) - 1:
+            self.set_tier(self.tier + 1)
+        elif self.calmFrames >= self.recoverFrames and self.tier > 0:
+            self.set_tier(self.tier - 1)
+
+    def load_level(self):
+        """Recent frame cost: 0 (lots of headroom) to 3 (over budget)."""
+        ratio = self.frameTimes.average(self.window) / self.budgetMs
+        if ratio < 0.5:
+            return 0
+        if ratio < 0.75:
+            return 1
+        return 2 if ratio < 1.0 else 3
+
+    def should_render(self, frame):
+        return frame % self.settings["renderEvery"] == 0
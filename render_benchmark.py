@@ -0,0 +1,76 @@
+# render_benchmark.py
+# Compares the bullet drawing paths: python render_benchmark.py [repeats]
+# Runs headless. Needs numpy for the surfarray renderer.
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from bullet_system import BulletSystem, Bullet, EnemyBullet
+from sprite_atlas import AtlasBulletRenderer
+from surfarray_renderer import SurfarrayBulletRenderer
+
+WIDTH, HEIGHT = 800, 900
+COUNTS = (1000, 10000, 50000)
+
+
+def make_bullets(n, rng, mixed=False):
+    # Enemy bullets; mixed makes every 4th one a bigger bullet in one of two colours
+    bullets = []
+    for i in range(n):
+        x = rng.uniform(-10, WIDTH + 10)
+        y = rng.uniform(-10, HEIGHT + 10)
+        if not mixed or i % 4:
+            bullets.append(EnemyBullet(x, y, 0, 0))
+        else:
+            bullets.append(Bullet(x, y, 0, 0, 8, 12, rng.choice([(255, 255, 0), (0, 200, 255)])))
+    return bullets
+
+
+def time_ms(draw, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        draw()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    rng = random.Random(1)
+    renderer = SurfarrayBulletRenderer()
+    sprites = AtlasBulletRenderer()
+
+    paths = [
+        ("pygame.draw", lambda s: s.drawBullets(screen)),
+        ("simple dots", lambda s: s.drawBullets(screen, simple=True)),
+        ("surfarray", lambda s: s.drawBullets(screen, renderer=renderer)),
+        ("surfarray simple", lambda s: s.drawBullets(screen, simple=True, renderer=renderer)),
+        ("surfarray 1/2", lambda s: s.drawBullets(screen, scale=0.5, renderer=renderer)),
+        ("atlas blits", lambda s: s.drawBullets(screen, renderer=sprites)),
+    ]
+    # Room for the longest path name plus a space between columns
+    width = max(len(name) for name, _ in paths) + 2
+
+    for mixed in (False, True):
+        print(f"\n{'mixed looks' if mixed else 'enemy bullets'}: median of {repeats} draws, ms")
+        print(f"{'bullets':>8}" + "".join(f"{name:>{width}}" for name, _ in paths))
+        for n in COUNTS:
+            system = BulletSystem(screenWidth=WIDTH, screenHeight=HEIGHT)
+            system.bullets = make_bullets(n, rng, mixed)
+            row = [time_ms(lambda: draw(system), repeats) for _, draw in paths]
+            print(f"{n:>8}" + "".join(f"{ms:>{width}.2f}" for ms in row))
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
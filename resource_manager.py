@@ -0,0 +1,161 @@
+# resource_manager.py
+import json
+import logging
+import os
+import threading
+import time
+
+import pygame
+
+log = logging.getLogger(__name__)
+
+
+def cache_dir():
+    """Per-user cache folder (LOCALAPPDATA on Windows, XDG/~/.cache elsewhere)."""
+    base = (
+        os.environ.get("LOCALAPPDATA")
+        or os.environ.get("XDG_CACHE_HOME")
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(base, "infinite-bullet-reverie")
+
+
+class StartupTimer:
+    """Logs how long each startup phase took, and the total so far."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        log.info(
+            "startup: %-18s %7.1f ms (total %7.1f ms)",
+            phase, (now - self.last) * 1000, (now - self.start) * 1000
+        )
+        self.last = now
+
+
+class ResourceManager:
+    """
+    Loads fonts and images on first use and keeps them.
+
+    pygame.font.SysFont scans every system font folder before it does anything,
+    even for SysFont(None, ...). Here the default font (name None) never
+    touches the system list, and named fonts are resolved to a file path once
+    and remembered on disk, so later runs skip the scan completely.
+    """
+
+    def __init__(self, cachePath=None):
+        self.cachePath = cachePath or os.path.join(cache_dir(), "fonts.json")
+        self.fonts = {}
+        self.images = {}
+
+        # (name, bold, italic) -> font file path (or None if not installed)
+        self.fontPaths = {}
+        self.lock = threading.Lock()
+        self.loader = None
+        self.load_font_cache()
+
+    # ---------- FONT PATH CACHE ----------
+
+    def load_font_cache(self):
+        try:
+            with open(self.cachePath, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        for key, path in entries.items():
+            # Forget fonts that were uninstalled since the cache was written
+            if path is None or os.path.exists(path):
+                name, bold, italic = key.split("|")
+                self.fontPaths[(name, bold == "1", italic == "1")] = path
+
+    def save_font_cache(self):
+        with self.lock:
+            entries = {
+                f"{name}|{int(bold)}|{int(italic)}": path
+                for (name, bold, italic), path in self.fontPaths.items()
+            }
+        try:
+            os.makedirs(os.path.dirname(self.cachePath), exist_ok=True)
+            with open(self.cachePath, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=1)
+        except OSError as e:
+            log.warning("could not write font cache %s: %s", self.cachePath, e)
+
+    def font_path(self, name, bold=False, italic=False):
+        key = (name, bold, italic)
+        with self.lock:
+            if key in self.fontPaths:
+                return self.fontPaths[key]
+
+        # Slow path: this is the system font scan we are trying to avoid
+        path = pygame.font.match_font(name, bold, italic)
+        with self.lock:
+            self.fontPaths[key] = path
+        self.save_font_cache()
+        return path
+
+    # ---------- LOADERS ----------
+
+    def font(self, name, size, bold=False, italic=False):
+        """Cached pygame Font. name=None is pygame's built-in font."""
+        key = (name, size, bold, italic)
+        font = self.fonts.get(key)
+        if font is None:
+            if name and self.loader is not None and self.loader.is_alive():
+                with self.lock:
+                    resolving = (name, bold, italic) not in self.fontPaths
+                if resolving:
+                    # Still being looked up in the background: draw this frame
+                    # with the built-in font rather than block the menu
+                    return self.font(None, size, bold, italic)
+            path = self.font_path(name, bold, italic) if name else None
+            font = pygame.font.Font(path, size)
+            if bold:
+                font.set_bold(True)
+            if italic:
+                font.set_italic(True)
+            self.fonts[key] = font
+        return font
+
+    def image(self, path, alpha=True):
+        """Cached image, converted to the display format once a display exists."""
+        key = (path, alpha)
+        image = self.images.get(key)
+        if image is None:
+            image = pygame.image.load(path)
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha() if alpha else image.convert()
+            self.images[key] = image
+        return image
+
+    def preload_fonts(self, names):
+        """
+        Resolve named fonts on a background thread while the menu is showing.
+        Only the path lookup runs off the main thread; Font objects are still
+        built on the main thread when first used.
+        """
+        missing = [
+            (name, False, False) for name in names
+            if name and (name, False, False) not in self.fontPaths
+        ]
+        if not missing:
+            return
+
+        def work():
+            for name, bold, italic in missing:
+                self.font_path(name, bold, italic)
+
+        self.loader = threading.Thread(target=work, name="font-preload", daemon=True)
+        self.loader.start()
+
+
+# Font used by the menu and HUD. None is pygame's built-in font; set a system
+# font name (e.g. "arial") to use that instead.
+UI_FONT = None
+
+# Shared instance used by the menu and the main loop
+resources = ResourceManager()
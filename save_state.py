@@ -0,0 +1,225 @@
+# save_state.py
+import bisect
+import os
+import pickle
+import time
+from array import array
+
+from event_log import events
+from game_session import decode_inputs
+from resource_manager import cache_dir
+
+SNAPSHOT_VERSION = 7
+QUICKSAVE_PATH = os.path.join(cache_dir(), "quicksave.state")
+
+
+def capture(session):
+    """
+    In-memory copy of all simulation state of a GameSession, cheap enough to
+    take during a frame: (pickled small state, bullet captures). The bullets
+    (the bulk of it) are only copied, never serialised; everything else is a
+    few dozen objects and goes through pickle, which doubles as a deep copy.
+    """
+    bullets = {}
+    systems = {}
+    for name in ("playerBullets", "enemyBullets"):
+        state = getattr(session, name).get_state()
+        bullets[name] = (state.pop("bullets"), state.pop("chase_bullets"))
+        systems[name] = state
+    # Sharded bullet mode: copies of the store's live rows
+    bullets["massBullets"] = session.massBullets.get_state() if session.massBullets is not None else None
+
+    state = {
+        "version": SNAPSHOT_VERSION,
+        "tick": session.tick,
+        "endless": session.endless,
+        "focus": session.focus,
+        "gameOver": session.gameOver,
+        "player": session.player,
+        "playerBullets": systems["playerBullets"],
+        "enemyBullets": systems["enemyBullets"],
+        # Pickled together so the shared rng stays one object after loading
+        "rng": session.rng,
+        "enemySystem": session.enemySystem,
+        "boss": session.bossSystem,
+        "waveSystem": session.waveSystem,
+        "itemSystem": session.itemSystem,
+        "bombSystem": session.bombSystem,
+    }
+    return pickle.dumps(state, pickle.HIGHEST_PROTOCOL), bullets
+
+
+def restore_capture(session, captured):
+    """Load a capture() back into a GameSession. The capture stays usable."""
+    if not isinstance(captured, tuple):
+        raise ValueError("save-state from an older version is not supported")
+    data, bullets = captured
+    state = pickle.loads(data)
+    if state.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"save-state version {state.get('version')} is not supported")
+    for name in ("playerBullets", "enemyBullets"):
+        state[name]["bullets"], state[name]["chase_bullets"] = bullets[name]
+    if (bullets["massBullets"] is None) != (session.massBullets is None):
+        raise ValueError("save-state is from a session with a different bullet mode")
+
+    session.tick = state["tick"]
+    session.endless = state.get("endless", False)
+    session.focus = state["focus"]
+    session.gameOver = state["gameOver"]
+    session.player = state["player"]
+    session.playerBullets.set_state(state["playerBullets"])
+    session.enemyBullets.set_state(state["enemyBullets"])
+    if session.massBullets is not None:
+        session.massBullets.set_state(bullets["massBullets"])
+    session.rng = state["rng"]
+    session.enemySystem = state["enemySystem"]
+    session.bossSystem = state["boss"]
+    session.waveSystem = state["waveSystem"]
+    session.itemSystem = state["itemSystem"]
+    session.bombSystem = state["bombSystem"]
+
+
+def snapshot(session):
+    """Serialise all simulation state of a GameSession to bytes (for disk)."""
+    return pickle.dumps(capture(session), pickle.HIGHEST_PROTOCOL)
+
+
+def restore(session, data):
+    """Load bytes from snapshot() back into a GameSession."""
+    restore_capture(session, pickle.loads(data))
+
+
+class SaveStates:
+    """
+    Quick save/load plus rewind.
+
+    A keyframe is kept every keyframeInterval ticks. Seeking restores the
+    nearest keyframe at or before the target and re-simulates only the ticks
+    after it from the session's input log. Keyframes are capture()s held in
+    memory; only quicksaves are serialised.
+    """
+
+    def __init__(self, session, keyframeInterval=120, maxKeyframes=150):
+        self.session = session
+        self.keyframeInterval = keyframeInterval
+        self.maxKeyframes = maxKeyframes
+
+        self.keyframeTicks = []
+        self.keyframes = {}
+
+        # Timings of the last save/load in ms (shown in the HUD)
+        self.lastSaveMs = 0.0
+        self.lastLoadMs = 0.0
+
+        # Last quicksave as a capture(); written to quicksavePath by
+        # write_pending() after the frame instead of during it
+        self.quicksave = None
+        self.quicksavePath = QUICKSAVE_PATH
+        self.pendingWrite = False
+
+    def reset(self):
+        self.keyframeTicks = []
+        self.keyframes = {}
+        self.add_keyframe()
+
+    # ---------- SAVE / LOAD ----------
+
+    def save(self):
+        start = time.perf_counter()
+        data = snapshot(self.session)
+        self.lastSaveMs = (time.perf_counter() - start) * 1000
+        return data
+
+    def load(self, data):
+        start = time.perf_counter()
+        restore(self.session, data)
+        self.lastLoadMs = (time.perf_counter() - start) * 1000
+
+        # A loaded state may come from another run: its history is unknown,
+        # so rewinding can't go back past the point it was loaded
+        self.session.inputLog = array("H", bytes(2 * self.session.tick))
+        self.reset()
+
+    def quick_save(self, path=QUICKSAVE_PATH):
+        start = time.perf_counter()
+        self.quicksave = capture(self.session)
+        self.lastSaveMs = (time.perf_counter() - start) * 1000
+        self.quicksavePath = path
+        self.pendingWrite = True
+
+    def write_pending(self):
+        """Serialise and write the last quicksave if it isn't on disk yet. Call between frames."""
+        if not self.pendingWrite:
+            return
+        self.pendingWrite = False
+        path = self.quicksavePath
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(self.quicksave, f, pickle.HIGHEST_PROTOCOL)
+
+    def quick_load(self, path=QUICKSAVE_PATH):
+        """Load the last quicksave (from this run, or from disk). Returns False if none."""
+        if self.quicksave is None:
+            try:
+                with open(path, "rb") as f:
+                    self.quicksave = pickle.load(f)
+            except OSError:
+                return False
+        start = time.perf_counter()
+        restore_capture(self.session, self.quicksave)
+        self.lastLoadMs = (time.perf_counter() - start) * 1000
+
+        # Same as load(): the history before the quicksave is unknown here
+        self.session.inputLog = array("H", bytes(2 * self.session.tick))
+        self.reset()
+        return True
+
+    # ---------- KEYFRAMES ----------
+
+    def add_keyframe(self):
+        tick = self.session.tick
+        if tick not in self.keyframes:
+            self.keyframeTicks.append(tick)
+        start = time.perf_counter()
+        self.keyframes[tick] = capture(self.session)
+        self.lastSaveMs = (time.perf_counter() - start) * 1000
+
+        if len(self.keyframeTicks) > self.maxKeyframes:
+            del self.keyframes[self.keyframeTicks.pop(0)]
+
+    def on_step(self):
+        """Call after every session.step()."""
+        tick = self.session.tick
+
+        # Playing on after a rewind replaces the old future
+        while self.keyframeTicks and self.keyframeTicks[-1] > tick:
+            del self.keyframes[self.keyframeTicks.pop()]
+
+        if tick % self.keyframeInterval == 0:
+            self.add_keyframe()
+
+    def seek(self, tick):
+        """Jump to tick (clamped to the recorded range). Returns the tick reached."""
+        session = self.session
+        if not self.keyframeTicks:
+            return session.tick
+
+        tick = max(self.keyframeTicks[0], min(tick, len(session.inputLog)))
+        i = bisect.bisect_right(self.keyframeTicks, tick) - 1
+        keyTick = self.keyframeTicks[i]
+
+        # Restore without touching the log or keyframes, then replay forward.
+        # Replayed frames already went into the event log the first time.
+        inputLog = session.inputLog
+        start = time.perf_counter()
+        restore_capture(session, self.keyframes[keyTick])
+        self.lastLoadMs = (time.perf_counter() - start) * 1000
+        session.inputLog = inputLog
+        wasLogging = events.enabled
+        events.enabled = False
+        try:
+            while session.tick < tick:
+                session.step(decode_inputs(inputLog[session.tick]), record=False)
+        finally:
+            events.enabled = wasLogging
+        return session.tick
@@ -0,0 +1,80 @@
+# save_state_benchmark.py
+# Save-state timings against bullet count: python save_state_benchmark.py [repeats]
+# Runs headless, with the cyclic GC off as in gameplay. Exits with 1 if a
+# keyframe capture or a rewind restore doesn't fit its share of the frame.
+import contextlib
+import gc
+import io
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from bullet_system import Bullet, EnemyBullet
+from game_session import GameSession
+from save_state import capture, restore_capture, snapshot, restore
+
+WIDTH, HEIGHT = 800, 900
+COUNTS = (1000, 3000, 8000)
+
+# Keyframes are captured inside the step and rewinds restore inside it too,
+# so either may only take a quarter of a 60 FPS frame
+BUDGET_MS = 1000 / 60 / 4
+
+
+def make_session(n, rng):
+    session = GameSession(seed=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in range(600):
+            session.step({"shoot": True, "left": t % 60 < 30, "right": t % 60 >= 30})
+    bullets = session.enemyBullets.bullets
+    for i in range(n - len(bullets)):
+        x, y = rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)
+        if i % 3:
+            bullets.append(EnemyBullet(x, y, rng.uniform(-3, 3), rng.uniform(-3, 3)))
+        else:
+            bullets.append(Bullet(x, y, 1, 1, 8, 8, (255, 120, 120)))
+    return session
+
+
+def time_ms(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[-1]
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    rng = random.Random(1)
+    gc.disable()
+
+    paths = ["keyframe", "rewind", "file save", "file load"]
+    print(f"median / max of {repeats} runs, ms (budget {BUDGET_MS:.1f} ms for keyframe and rewind)")
+    print(f"{'bullets':>8}" + "".join(f"{name:>16}" for name in paths))
+    slow = False
+    for n in COUNTS:
+        session = make_session(n, rng)
+        captured = capture(session)
+        data = snapshot(session)
+        row = [
+            time_ms(lambda: capture(session), repeats),  # what add_keyframe() stores
+            time_ms(lambda: restore_capture(session, captured), repeats),
+            time_ms(lambda: snapshot(session), repeats),
+            time_ms(lambda: restore(session, data), repeats),
+        ]
+        print(f"{n:>8}" + "".join(f"{median:>9.2f} /{worst:>5.2f}" for median, worst in row))
+        slow |= any(median > BUDGET_MS for median, _ in row[:2])
+        gc.collect()
+
+    print("over budget" if slow else "within budget")
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# scheduler.py
+import time
+
+
+class ScheduledSystem:
+    def __init__(self, name, update, interval, order):
+        self.name = name
+        self.update = update
+        self.interval = interval  # run every N ticks
+        self.order = order
+
+        # timing
+        self.calls = 0
+        self.totalMs = 0.0
+        self.lastMs = 0.0
+        self.maxMs = 0.0
+
+
+class SystemScheduler:
+    """
+    Runs each gameplay system once, in a fixed order, at its own rate.
+
+    A system registers once with a name and a rate in Hz. run(tick) calls the
+    systems that are due on that tick and passes how many ticks have passed
+    since their last run, so a 10 Hz system still advances its own clock by
+    the right amount. Registering the same name or callable twice is an error,
+    so a system can't end up being updated twice per frame.
+    """
+
+    def __init__(self, tickRate=60):
+        self.tickRate = tickRate
+        self.systems = []
+        # Optional gc_control.AllocationBudget measuring each system call
+        self.allocBudget = None
+
+    def register(self, name, update, hz=None, order=None):
+        if hz is None:
+            hz = self.tickRate
+        if any(s.name == name for s in self.systems):
+            raise ValueError(f"system {name!r} is already registered")
+        if any(s.update == update for s in self.systems):
+            raise ValueError(f"{name!r}: this update function is already registered")
+        if hz <= 0 or hz > self.tickRate:
+            raise ValueError(f"{name!r}: rate must be between 0 and {self.tickRate} Hz")
+
+        if order is None:
+            order = len(self.systems)
+        interval = max(1, round(self.tickRate / hz))
+        self.systems.append(ScheduledSystem(name, update, interval, order))
+        self.systems.sort(key=lambda s: s.order)
+
+    def run(self, tick):
+        clock = time.perf_counter
+        budget = self.allocBudget
+        for system in self.systems:
+            if tick % system.interval:
+                continue
+
+            if budget is not None:
+                budget.before()
+            start = clock()
+            system.update(system.interval)
+            ms = (clock() - start) * 1000
+            if budget is not None:
+                budget.after(system.name)
+
+            system.calls += 1
+            system.totalMs += ms
+            system.lastMs = ms
+            if ms > system.maxMs:
+                system.maxMs = ms
+
+        if budget is not None:
+            budget.end_frame(tick)
+
+    def stats(self):
+        """(name, Hz, calls, last ms, average ms, max ms) per system, in run order."""
+        return [
+            (
+                s.name,
+                self.tickRate / s.interval,
+                s.calls,
+                s.lastMs,
+                s.totalMs / s.calls if s.calls else 0.0,
+                s.maxMs,
+            )
+            for s in self.systems
+        ]
@@ -0,0 +1,65 @@
+# shard_benchmark.py
+# Sharded bullet simulation, ms per tick against worker processes:
+#   python shard_benchmark.py [bullets] [ticks] [max workers]
+# Needs numpy. Speedup only shows with as many free cores as workers.
+import os
+import sys
+import time
+
+import numpy as np
+
+from sharded_bullets import ShardedBulletStore
+
+WIDTH, HEIGHT = 800, 900
+
+
+def refill(store, rng, n):
+    # Keep the count steady: bullets culled last tick come back at the top
+    missing = n - len(store)
+    if missing > 0:
+        angle = rng.uniform(0.2, np.pi - 0.2, missing)
+        speed = rng.uniform(1.0, 6.5, missing)
+        store.spawn(rng.uniform(0, WIDTH, missing), rng.uniform(-10, 60, missing),
+                    np.cos(angle) * speed, np.sin(angle) * speed)
+
+
+def run(n, ticks, workers, shards):
+    rng = np.random.default_rng(1)
+    store = ShardedBulletStore(shards=shards, capacity=-(-n // shards) + 4096, workers=workers,
+                               screenWidth=WIDTH, screenHeight=HEIGHT)
+    try:
+        store.spawn(rng.uniform(0, WIDTH, n), rng.uniform(0, HEIGHT, n),
+                    rng.uniform(-3, 3, n), rng.uniform(-3, 3, n))
+        times = []
+        for _ in range(ticks):
+            refill(store, rng, n)
+            start = time.perf_counter()
+            store.step(WIDTH / 2, HEIGHT - 100, 4, 20)
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        return times[len(times) // 2]
+    finally:
+        store.close()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    cores = os.cpu_count() or 1
+    most = int(sys.argv[3]) if len(sys.argv) > 3 else cores
+    counts = sorted({0, most} | {1 << i for i in range(8) if 1 << i <= most})
+    shards = most
+
+    print(f"{n} bullets, {shards} shards, {cores} cores: median ms per step over {ticks} ticks")
+    print(f"{'workers':>8}{'ms':>10}{'speedup':>10}")
+    base = None
+    for workers in counts:
+        ms = run(n, ticks, workers, shards)
+        if base is None:
+            base = ms
+        label = "in-proc" if workers == 0 else str(workers)
+        print(f"{label:>8}{ms:>10.2f}{base / ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
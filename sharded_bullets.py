@@ -0,0 +1,457 @@
+# sharded_bullets.py
+# Plain enemy bullets as arrays in shared memory, split into shards that a
+# pool of worker processes advances in parallel. Needs numpy. GameSession
+# uses it for its sharded bullet mode (shards=...).
+import multiprocessing
+import signal
+from itertools import repeat
+from multiprocessing import shared_memory
+from operator import attrgetter
+
+import numpy as np
+import pygame
+
+from bullet_system import EnemyBullet, SIMPLE_SIZE
+
+# look is an index into ShardedBulletStore.looks; grazed is 0 or 1
+FIELDS = ("x", "y", "vx", "vy", "width", "height", "look", "grazed")
+PARAMS = ("cx", "cy", "radius", "grazeRadius", "screenWidth", "screenHeight", "margin")
+# Per shard after a collide: bullets that hit, new grazes, row, x and y of the first hit
+RESULTS = 5
+
+getX = attrgetter("x")
+getY = attrgetter("y")
+getVX = attrgetter("vx")
+getVY = attrgetter("vy")
+
+
+def bullet_look(b):
+    """(sprite name, width, height, colour), as AtlasBulletRenderer draws the bullet."""
+    return ("enemyBullet" if type(b) is EnemyBullet else "shot", b.width, b.height, b.color)
+
+
+def shard_layout(shards, capacity):
+    """(name, shape, dtype) of each shared array."""
+    return [(field, (shards, capacity), np.float64) for field in FIELDS] + [
+        ("counts", (shards,), np.int64),
+        # player hitbox and playfield for the next phase, see PARAMS
+        ("params", (len(PARAMS),), np.float64),
+        ("hits", (shards, RESULTS), np.float64),
+    ]
+
+
+def layout_size(layout):
+    return sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for _, shape, dtype in layout)
+
+
+def carve(layout, buffer):
+    arrays = {}
+    offset = 0
+    for name, shape, dtype in layout:
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(buffer, dtype, count, offset).reshape(shape)
+        offset += count * np.dtype(dtype).itemsize  # float64/int64 only, stays aligned
+    return arrays
+
+
+class ShardedBulletStore:
+    """
+    Plain moving bullets (no programs, groups or shapes) for very large
+    counts, kept as columns in one shared memory block.
+
+    The block is split into shards of up to capacity bullets. move() moves
+    and culls every shard and collide() tests it against the player hitbox
+    and graze circle, each shard as a handful of NumPy operations (step()
+    does both). With workers > 0 the shards are shared out over that many
+    persistent processes, which attach to the same block: a phase is one
+    short command down each pipe and one reply back, and no bullet data is ever pickled. The main
+    process only sees the merged hit result and views(), the live rows of
+    each shard, ready to draw.
+
+    The main process may only spawn, remove or read between phases; while
+    one runs the workers own the arrays.
+
+    startMethod is the multiprocessing start method for the workers. Spawned
+    workers import the __main__ module again, so a script without a
+    __name__ == "__main__" guard (like the game's) has to use "fork".
+    """
+
+    def __init__(self, shards=4, capacity=32768, workers=0, screenWidth=800, screenHeight=900, margin=20,
+                 startMethod="spawn"):
+        self.shards = shards
+        self.capacity = capacity
+        self.nextShard = 0
+        self.workers = []
+
+        # Looks of the bullets (see bullet_look), indexed by the look column;
+        # look 0 is the default EnemyBullet that spawn() uses
+        self.looks = []
+        self.lookIndex = {}
+        self.look_of(EnemyBullet(0, 0, 0, 0))
+        self.sprites = {}  # (look, scale, simple, atlas?) -> surface for draw()
+
+        layout = shard_layout(shards, capacity)
+        self.shm = shared_memory.SharedMemory(create=True, size=layout_size(layout))
+        self.arrays = carve(layout, self.shm.buf)
+        self.arrays["counts"][:] = 0
+        params = self.arrays["params"]
+        params[PARAMS.index("screenWidth")] = screenWidth
+        params[PARAMS.index("screenHeight")] = screenHeight
+        params[PARAMS.index("margin")] = margin
+
+        if not workers:
+            return
+        ctx = multiprocessing.get_context(startMethod)
+        for w in range(workers):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=run_shard_worker, daemon=True,
+                               args=(child, self.shm.name, shards, capacity, list(range(shards))[w::workers]))
+            proc.start()
+            self.workers.append((proc, parent))
+        for _, pipe in self.workers:
+            pipe.recv()  # attached
+
+    def __len__(self):
+        return int(self.arrays["counts"].sum())
+
+    def look_of(self, bullet):
+        look = bullet_look(bullet)
+        index = self.lookIndex.get(look)
+        if index is None:
+            index = self.lookIndex[look] = len(self.looks)
+            self.looks.append(look)
+        return index
+
+    # ---------- SPAWNING ----------
+
+    def spawn(self, xs, ys, vxs, vys, width=6, height=6, look=0):
+        """
+        Add bullets; arguments are arrays (or scalars for one bullet).
+        They're dealt out over the shards, starting after the shard the last
+        spawn started on. Bullets that don't fit are dropped. Returns how
+        many were added.
+        """
+        xs = np.atleast_1d(np.asarray(xs, np.float64))
+        columns = [xs] + [np.broadcast_to(np.asarray(c, np.float64), xs.shape)
+                          for c in (ys, vxs, vys, width, height, look, 0)]
+        a = self.arrays
+        counts = a["counts"]
+        added = 0
+        order = [(self.nextShard + i) % self.shards for i in range(self.shards)]
+        self.nextShard = (self.nextShard + 1) % self.shards
+        for s, part in zip(order, np.array_split(np.arange(len(xs)), self.shards)):
+            n = int(counts[s])
+            k = min(len(part), self.capacity - n)
+            if k <= 0:
+                continue
+            rows = part[:k]
+            for field, column in zip(FIELDS, columns):
+                a[field][s, n:n + k] = column[rows]
+            counts[s] = n + k
+            added += k
+        return added
+
+    def add_bullets(self, bullets):
+        """Take over plain Bullet/EnemyBullet objects (see BulletSystem.take_plain)."""
+        if not bullets:
+            return 0
+        n = len(bullets)
+        column = np.fromiter
+        return self.spawn(column(map(getX, bullets), np.float64, n), column(map(getY, bullets), np.float64, n),
+                          column(map(getVX, bullets), np.float64, n), column(map(getVY, bullets), np.float64, n),
+                          [b.width for b in bullets], [b.height for b in bullets],
+                          [self.look_of(b) for b in bullets])
+
+    def clear(self):
+        self.arrays["counts"][:] = 0
+        self.nextShard = 0
+
+    # ---------- MOVE + COLLIDE ----------
+
+    def run(self, command):
+        """Run a phase ("move", "collide" or both, "step") on every shard."""
+        if self.workers:
+            for _, pipe in self.workers:
+                pipe.send(command)
+            for _, pipe in self.workers:
+                pipe.recv()
+        else:
+            a = self.arrays
+            for s in range(self.shards):
+                run_shard(a, s, command)
+
+    def move(self):
+        """Move every bullet once and cull the ones that left the playfield."""
+        self.run("move")
+
+    def collide(self, cx, cy, radius, grazeRadius=0.0):
+        """
+        Test every bullet against the circle at (cx, cy). Returns (hits,
+        grazes, first): how many bullets touch it, how many came within
+        grazeRadius of it for the first time (each bullet grazes once, and
+        not on a tick it hits), and (shard, row, x, y) of the first bullet
+        that hit, or None. Hit bullets stay; see remove().
+        """
+        self.arrays["params"][0:4] = (cx, cy, radius, grazeRadius)
+        self.run("collide")
+        return self.results()
+
+    def step(self, cx, cy, radius, grazeRadius=0.0):
+        """move() and collide() in one round trip to the workers."""
+        self.arrays["params"][0:4] = (cx, cy, radius, grazeRadius)
+        self.run("step")
+        return self.results()
+
+    def results(self):
+        results = self.arrays["hits"]
+        hits = int(results[:, 0].sum())
+        grazes = int(results[:, 1].sum())
+        if not hits:
+            return 0, grazes, None
+        s = int(np.argmax(results[:, 0] > 0))
+        _, _, row, x, y = results[s].tolist()
+        return hits, grazes, (s, int(row), x, y)
+
+    def remove(self, shard, row):
+        """Take one bullet out, e.g. the first hit from collide(). Rows after it move up."""
+        a = self.arrays
+        n = int(a["counts"][shard])
+        for field in FIELDS:
+            column = a[field][shard]
+            column[row:n - 1] = column[row + 1:n]
+        a["counts"][shard] = n - 1
+
+    def cap(self, maxBullets):
+        """Drop the oldest bullets of each shard, in proportion, down to maxBullets in all."""
+        a = self.arrays
+        counts = a["counts"]
+        total = int(counts.sum())
+        if total <= maxBullets:
+            return
+        excess = left = total - maxBullets
+        for s, n in enumerate(counts.tolist()):
+            drop = min(n, -(-excess * n // total), left)
+            left -= drop
+            if drop:
+                for field in FIELDS:
+                    column = a[field][s]
+                    column[:n - drop] = column[drop:n]
+                counts[s] = n - drop
+
+    # ---------- CANCELLING ----------
+
+    def cancel_in_radius(self, cx, cy, radius):
+        """Same as BulletSystem.cancel_in_radius; the cancelled bullets come back as EnemyBullets."""
+        a = self.arrays
+        counts = a["counts"]
+        xs = []
+        ys = []
+        for s, n in enumerate(counts.tolist()):
+            if not n:
+                continue
+            x = a["x"][s, :n]
+            y = a["y"][s, :n]
+            dx = x + a["width"][s, :n] / 2 - cx
+            dy = y + a["height"][s, :n] / 2 - cy
+            inside = dx * dx + dy * dy <= radius * radius
+            if inside.any():
+                xs += x[inside].tolist()
+                ys += y[inside].tolist()
+                keep = ~inside
+                m = int(np.count_nonzero(keep))
+                for field in FIELDS:
+                    column = a[field][s]
+                    column[:m] = column[:n][keep]
+                counts[s] = m
+        return list(map(EnemyBullet, xs, ys, repeat(0.0), repeat(0.0)))
+
+    def cancel_all(self):
+        a = self.arrays
+        xs = []
+        ys = []
+        for s, n in enumerate(a["counts"].tolist()):
+            xs += a["x"][s, :n].tolist()
+            ys += a["y"][s, :n].tolist()
+        a["counts"][:] = 0
+        return list(map(EnemyBullet, xs, ys, repeat(0.0), repeat(0.0)))
+
+    # ---------- DRAW ----------
+
+    def views(self):
+        """
+        (x, y, look) views of each shard's live bullets, valid until the
+        next move. Drop them before close(); the block can't close under them.
+        """
+        a = self.arrays
+        views = []
+        for s, n in enumerate(a["counts"].tolist()):
+            if n:
+                views.append((a["x"][s, :n], a["y"][s, :n], a["look"][s, :n]))
+        return views
+
+    def draw(self, screen, scale=1.0, renderer=None, atlas=None, simple=False):
+        """
+        Draw every bullet. A renderer with draw_arrays (SurfarrayBulletRenderer)
+        writes them straight from the arrays; otherwise each look is one
+        blits call of its atlas sprite (a filled rect without an atlas, a
+        SIMPLE_SIZE square with simple). Overlapping bullets of different
+        looks may stack in another order than BulletSystem would draw them.
+        """
+        views = self.views()
+        drawArrays = getattr(renderer, "draw_arrays", None)
+        if drawArrays is not None and drawArrays(screen, views, self.looks, scale, simple):
+            return
+
+        blits = []
+        for x, y, look in views:
+            if scale != 1.0:
+                x = x * scale
+                y = y * scale
+            first = look[0]
+            if (look == first).all():
+                groups = [(int(first), x, y)]
+            else:
+                groups = [(int(k), x[look == k], y[look == k]) for k in np.unique(look)]
+            for k, gx, gy in groups:
+                blits += zip(repeat(self.sprite(k, scale, simple, atlas, screen)), zip(gx.tolist(), gy.tolist()))
+        screen.blits(blits, False)
+
+    def sprite(self, look, scale, simple, atlas, screen):
+        key = (look, scale, simple, atlas is not None)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            name, width, height, color = self.looks[look]
+            if simple:
+                size = max(1, int(SIMPLE_SIZE * scale))
+                sprite = pygame.Surface((size, size)).convert(screen)
+                sprite.fill(color)
+            elif atlas is not None:
+                sprite = atlas.get(name, width, height, color, scale=scale)
+            else:
+                sprite = pygame.Surface((max(1, int(width * scale)), max(1, int(height * scale)))).convert(screen)
+                sprite.fill(color)
+            self.sprites[key] = sprite
+        return sprite
+
+    # ---------- SAVE-STATES ----------
+
+    def get_state(self):
+        """Copy of the live rows and spawn position, plain arrays (picklable)."""
+        a = self.arrays
+        counts = a["counts"].copy()
+        live = [(s, n) for s, n in enumerate(counts.tolist()) if n]
+        return {
+            "counts": counts,
+            "nextShard": self.nextShard,
+            "looks": list(self.looks),
+            # each field's live rows, shard after shard
+            "columns": {field: np.concatenate([a[field][s, :n] for s, n in live] or [np.empty(0)])
+                        for field in FIELDS},
+        }
+
+    def set_state(self, state):
+        a = self.arrays
+        counts = state["counts"]
+        if len(counts) != self.shards:
+            raise ValueError(f"save-state has {len(counts)} bullet shards, this session {self.shards}")
+        start = 0
+        for s, n in enumerate(counts.tolist()):
+            for field, column in state["columns"].items():
+                a[field][s, :n] = column[start:start + n]
+            start += n
+        a["counts"][:] = counts
+        self.nextShard = state["nextShard"]
+        self.looks = list(state["looks"])
+        self.lookIndex = {look: i for i, look in enumerate(self.looks)}
+
+    def close(self):
+        for proc, pipe in self.workers:
+            pipe.send("close")
+            proc.join()
+        self.workers = []
+        if self.shm is not None:
+            self.arrays = None  # views of the block have to go before it can close
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+def run_shard(a, s, command):
+    if command != "collide":
+        move_shard(a, s)
+    if command != "move":
+        collide_shard(a, s)
+
+
+def move_shard(a, s):
+    W, H, margin = a["params"][4:].tolist()
+    n = int(a["counts"][s])
+    if not n:
+        return
+
+    x = a["x"][s, :n]
+    y = a["y"][s, :n]
+    x += a["vx"][s, :n]
+    y += a["vy"][s, :n]
+
+    # Same cull as BulletSystem.updateBullets
+    keep = (x >= -margin) & (x <= W + margin) & (y >= -margin) & (y <= H + margin)
+    m = int(np.count_nonzero(keep))
+    if m < n:
+        # Compact the shard: the live rows move to the front, in order
+        for field in FIELDS:
+            column = a[field][s]
+            column[:m] = column[:n][keep]
+        a["counts"][s] = m
+
+
+def collide_shard(a, s):
+    cx, cy, radius, grazeRadius = a["params"][:4].tolist()
+    n = int(a["counts"][s])
+    result = a["hits"][s]
+    result[:] = 0
+    if not n:
+        return
+
+    # Same tests as collision_system.bullet_hits
+    x = a["x"][s, :n]
+    y = a["y"][s, :n]
+    dx = cx - np.maximum(x, np.minimum(cx, x + a["width"][s, :n]))
+    dy = cy - np.maximum(y, np.minimum(cy, y + a["height"][s, :n]))
+    d2 = dx * dx + dy * dy
+    hit = d2 <= radius * radius
+
+    grazed = a["grazed"][s, :n]
+    graze = ~hit & (grazed == 0) & (d2 <= grazeRadius * grazeRadius)
+    grazes = int(np.count_nonzero(graze))
+    if grazes:
+        grazed[graze] = 1
+        result[1] = grazes
+
+    hits = int(np.count_nonzero(hit))
+    if hits:
+        i = int(np.argmax(hit))
+        result[0] = hits
+        result[2:] = (i, x[i], y[i])
+
+
+def run_shard_worker(pipe, name, shards, capacity, rows):
+    # A forked worker inherits pygame's handlers: SIGTERM has to kill it again
+    # (multiprocessing terminates daemon workers that way at exit), and
+    # Ctrl+C is for the game to handle
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Attaching registers the block with the parent's resource tracker again,
+    # which is harmless: the parent unlinks it once on close
+    shm = shared_memory.SharedMemory(name=name)
+    a = carve(shard_layout(shards, capacity), shm.buf)
+    pipe.send(True)
+    while True:
+        command = pipe.recv()
+        if command == "close":
+            break
+        for s in rows:
+            run_shard(a, s, command)
+        pipe.send(True)
+    del a
+    shm.close()
@@ -0,0 +1,18 @@
+# sim_clock.py
+# Simulation time. Gameplay code reads the time from here instead of
+# pygame.time.get_ticks(), so it only moves while the game is being stepped
+# (not while paused) and a restored save-state replays exactly the same way.
+
+FRAME_MS = 1000 / 60
+
+tick = 0
+
+
+def set_tick(newTick):
+    global tick
+    tick = newTick
+
+
+def get_ticks():
+    """Milliseconds of simulated time, like pygame.time.get_ticks()."""
+    return int(tick * FRAME_MS)
@@ -0,0 +1,95 @@
+# spike_profiler.py
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from collections import deque
+
+from resource_manager import cache_dir
+
+log = logging.getLogger(__name__)
+
+SPIKE_DIR = os.path.join(cache_dir(), "spikes")
+
+
+class SpikeProfiler:
+    """
+    Catches the profile of rare long frames from normal play.
+
+    Every frame runs under its own cProfile slice, and the last few slices are
+    kept in a rolling buffer. When a frame's work time goes over budgetMs, that
+    frame and the ones just before it are written out: a text report (frame
+    times, entity counts, Rumia's pattern, top functions) plus a .prof file
+    for pstats/snakeviz. Spikes closer together than cooldown seconds only
+    write the first one.
+
+    cProfile makes every frame a bit slower while this is on, so set the
+    budget against frame times measured with it running.
+    """
+
+    def __init__(self, budgetMs=25.0, history=8, cooldown=2.0, outDir=SPIKE_DIR, top=30):
+        self.budgetMs = budgetMs
+        self.cooldown = cooldown
+        self.outDir = outDir
+        self.top = top
+
+        self.frames = deque(maxlen=history)  # (tick, ms, profile), oldest first
+        self.profile = None
+        self.start = 0.0
+        self.lastDump = -cooldown
+        self.dumps = 0
+
+    def begin(self):
+        """Call at the start of a frame."""
+        if self.profile is not None:
+            self.profile.disable()  # last frame never got to end()
+        self.profile = cProfile.Profile()
+        self.start = time.perf_counter()
+        self.profile.enable()
+
+    def end(self, tick, describe=None):
+        """
+        Call once the frame's work is done. describe() returns a dict of
+        context for the report and is only called when the frame spiked.
+        Returns the frame's work time in ms.
+        """
+        if self.profile is None:
+            return 0.0
+        self.profile.disable()
+        ms = (time.perf_counter() - self.start) * 1000
+        self.frames.append((tick, ms, self.profile))
+        self.profile = None
+
+        now = time.perf_counter()
+        if ms > self.budgetMs and now - self.lastDump >= self.cooldown:
+            self.lastDump = now
+            self.dump(describe() if describe else {})
+        return ms
+
+    def dump(self, info):
+        tick, ms, profile = self.frames[-1]
+        os.makedirs(self.outDir, exist_ok=True)
+        base = os.path.join(self.outDir, time.strftime("spike-%Y%m%d-%H%M%S") + f"-t{tick}")
+
+        out = io.StringIO()
+        out.write(f"Frame spike at tick {tick}: {ms:.2f} ms (budget {self.budgetMs:.2f} ms)\n")
+        out.write("Frames before it: " + ", ".join(f"{t}:{m:.1f}" for t, m, _ in list(self.frames)[:-1]) + "\n\n")
+        for key, value in info.items():
+            out.write(f"{key:<16} {value}\n")
+
+        out.write(f"\n---------- spike frame (tick {tick}) ----------\n")
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(self.top)
+
+        history = pstats.Stats(self.frames[0][2], stream=out)
+        for _, _, p in list(self.frames)[1:]:
+            history.add(p)
+        out.write(f"\n---------- last {len(self.frames)} frames together ----------\n")
+        history.sort_stats("tottime").print_stats(self.top)
+        history.dump_stats(base + ".prof")
+
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        self.dumps += 1
+        log.warning("frame spike %.1f ms at tick %d, profile written to %s.txt", ms, tick, base)
@@ -0,0 +1,229 @@
+# sprite_atlas.py
+from itertools import repeat
+from operator import attrgetter
+
+import pygame
+
+from bullet_system import EnemyBullet, ANGLE_STEPS
+
+getX = attrgetter("x")
+getY = attrgetter("y")
+getLook = attrgetter("width", "height", "color")
+getShape = attrgetter("shape")
+
+COLORKEY = (255, 0, 255)
+
+
+class SpriteAtlas:
+    """
+    Pre-rendered sprites for everything drawn in bulk.
+
+    A kind is registered once with a function that draws it at a given size
+    (plus any arguments, e.g. colour). The first time a (kind, args, scale)
+    sprite is asked for, it is drawn, converted to the display format and
+    kept. Opaque sprites are plain converted surfaces; sprites with
+    transparent corners use a colour key with RLE, so blitting skips the
+    transparent runs cheaply.
+
+    Drawing goes through SpriteLayer: one blits call for a whole layer.
+    """
+
+    def __init__(self):
+        self.kinds = {}    # kind -> (make, colorkey)
+        self.sprites = {}  # (kind, args, scale) -> Surface
+        self.frames = {}   # (kind, args, scale) -> rotation frames
+
+    def register(self, kind, make, colorkey=False):
+        """make(surface, *args) draws the sprite onto a surface already sized for it."""
+        self.kinds[kind] = (make, colorkey)
+
+    def get(self, kind, width, height, *args, scale=1.0):
+        key = (kind, width, height, args, scale)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            make, colorkey = self.kinds[kind]
+            size = (max(1, int(width * scale)), max(1, int(height * scale)))
+            sprite = pygame.Surface(size)
+            if colorkey:
+                sprite.fill(COLORKEY)
+            make(sprite, *args)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            if colorkey:
+                sprite.set_colorkey(COLORKEY, pygame.RLEACCEL)
+            self.sprites[key] = sprite
+        return sprite
+
+    def rotations(self, kind, width, height, *args, scale=1.0):
+        """
+        ANGLE_STEPS copies of a sprite drawn pointing right, turned to each
+        bullet_system.angle_index. Each frame is (surface, half width, half
+        height), so frame i is blitted centred with one subtraction.
+        Rotating is slow, so it's done once per sprite, never per bullet.
+        """
+        key = (kind, width, height, args, scale)
+        frames = self.frames.get(key)
+        if frames is None:
+            base = self.get(kind, width, height, *args, scale=scale)
+            frames = []
+            for i in range(ANGLE_STEPS):
+                # Screen y points down, so a clockwise index is a negative rotation
+                frame = pygame.transform.rotate(base, -360 * i / ANGLE_STEPS)
+                if frame.get_colorkey() is None and base.get_colorkey() is not None:
+                    frame.set_colorkey(base.get_colorkey(), pygame.RLEACCEL)
+                frames.append((frame, frame.get_width() / 2, frame.get_height() / 2))
+            self.frames[key] = frames
+        return frames
+
+
+class SpriteLayer:
+    """
+    Blit list for one layer, drawn with a single Surface.blits (or fblits
+    on pygame-ce) call. Add sprites grouped by type so the blits run through
+    the same source surface back to back.
+    """
+
+    def __init__(self):
+        self.blits = []
+
+    def add(self, sprite, x, y):
+        self.blits.append((sprite, (x, y)))
+
+    def add_many(self, sprite, positions):
+        self.blits.extend(zip(repeat(sprite), positions))
+
+    def draw(self, screen):
+        if not self.blits:
+            return
+        fblits = getattr(screen, "fblits", None)
+        if fblits is not None:
+            fblits(self.blits)
+        else:
+            screen.blits(self.blits, doreturn=False)
+        self.blits.clear()
+
+
+# ---------- SPRITES ----------
+
+def make_round_bullet(surface, color):
+    w, h = surface.get_size()
+    rect = surface.get_rect()
+    pygame.draw.ellipse(surface, color, rect)
+    if w >= 4 and h >= 4:
+        # Light core so bullets read against each other
+        core = tuple(min(255, c + 150) for c in color)
+        pygame.draw.ellipse(surface, core, rect.inflate(-w // 2, -h // 2))
+
+
+def make_shot(surface, color):
+    w, h = surface.get_size()
+    surface.fill(color)
+    if w >= 3:
+        core = tuple(min(255, c + 100) for c in color)
+        surface.fill(core, (w // 3, 0, max(1, w - 2 * (w // 3)), h))
+
+
+def make_block(surface, color, edge):
+    surface.fill(edge)
+    w, h = surface.get_size()
+    if w > 4 and h > 4:
+        surface.fill(color, (2, 2, w - 4, h - 4))
+
+
+def make_orb(surface, color):
+    pygame.draw.ellipse(surface, color, surface.get_rect())
+
+
+# Direction-facing bullet shapes, drawn pointing right (+x)
+
+def make_rice(surface, color):
+    make_round_bullet(surface, color)
+
+
+def make_kunai(surface, color):
+    w, h = surface.get_size()
+    core = tuple(min(255, c + 150) for c in color)
+    pygame.draw.polygon(surface, color, [(w - 1, h // 2), (w // 3, 0), (0, h // 2), (w // 3, h - 1)])
+    pygame.draw.line(surface, core, (1, h // 2), (w - 2, h // 2))
+
+
+def make_arrow(surface, color):
+    w, h = surface.get_size()
+    pygame.draw.polygon(surface, color, [(w - 1, h // 2), (0, 0), (w // 3, h // 2), (0, h - 1)])
+
+
+# Sprite size of each shape; bullets keep their own (smaller) hitbox and
+# the sprite is centred on it
+SHAPES = {
+    "rice": (14, 7),
+    "kunai": (16, 8),
+    "arrow": (12, 10),
+}
+
+
+atlas = SpriteAtlas()
+atlas.register("enemyBullet", make_round_bullet, colorkey=True)
+atlas.register("shot", make_shot)
+atlas.register("block", make_block)
+atlas.register("orb", make_orb, colorkey=True)
+atlas.register("rice", make_rice, colorkey=True)
+atlas.register("kunai", make_kunai, colorkey=True)
+atlas.register("arrow", make_arrow, colorkey=True)
+
+
+class AtlasBulletRenderer:
+    """
+    Bullet renderer (see BulletSystem.drawBullets) that blits atlas sprites:
+    enemy bullets as round bullets, others as shots, all in one blits call.
+    Bullets with a shape (see SHAPES) blit the pre-rotated frame for their
+    facing, centred on their hitbox.
+    """
+
+    def __init__(self, atlas=atlas):
+        self.atlas = atlas
+        self.layer = SpriteLayer()
+
+    def draw(self, screen, bullets, scale=1.0, simple=False):
+        if simple:
+            return False  # BulletSystem draws the simple look itself
+        if not bullets:
+            return True
+
+        # Group by look; plain enemy bullets all look the same
+        first = bullets[0]
+        if (type(first) is EnemyBullet and first.shape is None
+                and list(map(type, bullets)).count(EnemyBullet) == len(bullets)
+                and list(map(getShape, bullets)).count(None) == len(bullets)):
+            groups = {(EnemyBullet, None) + getLook(first): bullets}
+        else:
+            groups = {}
+            for b in bullets:
+                key = (type(b), b.shape, b.width, b.height, b.color)
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = []
+                group.append(b)
+
+        layer = self.layer
+        for (kind, shape, width, height, color), group in groups.items():
+            if shape is not None:
+                self.add_shaped(shape, width, height, color, group, scale)
+                continue
+            name = "enemyBullet" if kind is EnemyBullet else "shot"
+            sprite = self.atlas.get(name, width, height, color, scale=scale)
+            if scale == 1.0:
+                layer.add_many(sprite, zip(map(getX, group), map(getY, group)))
+            else:
+                layer.add_many(sprite, zip(map(scale.__mul__, map(getX, group)),
+                                           map(scale.__mul__, map(getY, group))))
+        layer.draw(screen)
+        return True
+
+    def add_shaped(self, shape, width, height, color, group, scale):
+        frames = self.atlas.rotations(shape, *SHAPES[shape], color, scale=scale)
+        cx = width / 2
+        cy = height / 2
+        blits = self.layer.blits
+        for b in group:
+            frame, ox, oy = frames[b.facing]
+            blits.append((frame, ((b.x + cx) * scale - ox, (b.y + cy) * scale - oy)))
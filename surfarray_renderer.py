@@ -0,0 +1,175 @@
+# surfarray_renderer.py
+# Optional bullet renderer that writes straight into the surface's pixels.
+# Needs numpy; the game falls back to the normal rect drawing without it.
+from array import array
+from operator import attrgetter
+
+import numpy as np
+import pygame
+
+from bullet_system import EnemyBullet, SIMPLE_SIZE
+
+getX = attrgetter("x")
+getY = attrgetter("y")
+getLook = attrgetter("width", "height", "color")
+
+
+class SurfarrayBulletRenderer:
+    """
+    Draws a whole bullet list with a few NumPy operations instead of one
+    pygame call per bullet.
+
+    Each distinct bullet look (width, height, colour) gets a stamp, a filled
+    rect like Bullet.draw, with its colour mapped to the surface format.
+    Bullets are grouped by look and each group is written into the
+    surface's pixels (surfarray.pixels2d, no copy) in one of two ways:
+      - few bullets: every stamp pixel's index is computed and assigned in
+        one scatter
+      - many bullets: bullet corners are marked in a mask the size of the
+        surface, the mask is grown by the stamp size (a shifted OR per row
+        and column of the stamp), and the grown mask is filled in one go.
+        This costs the same for 10k bullets as for 100k.
+
+    Bullets cover the same pixels as with pygame.draw; where bullets of
+    different looks overlap, the one on top may differ.
+
+    With simple, every bullet is a SIMPLE_SIZE square of its colour, like
+    BulletSystem's own simple look.
+
+    Only 32-bit surfaces can be written this way. draw() returns False for
+    anything else and the caller draws the usual way.
+    """
+
+    def __init__(self):
+        self.stamps = {}  # (width, height, scale, pitch) -> (w, h, pixel offsets)
+        self.drawn = 0
+
+    def stamp(self, width, height, scale, pitch):
+        key = (width, height, scale, pitch)
+        stamp = self.stamps.get(key)
+        if stamp is None:
+            w = max(1, int(width * scale))  # truncated, like Surface.fill
+            h = max(1, int(height * scale))
+            dy, dx = np.mgrid[0:h, 0:w]
+            stamp = self.stamps[key] = (w, h, (dy * pitch + dx).ravel())
+        return stamp
+
+    def draw(self, screen, bullets, scale=1.0, simple=False):
+        if screen.get_bytesize() != 4:
+            return False
+        self.drawn = len(bullets)
+        if not bullets:
+            return True
+
+        # Enemy bullets all look the same, so the usual case is one group
+        first = bullets[0]
+        if type(first) is EnemyBullet and list(map(type, bullets)).count(EnemyBullet) == len(bullets):
+            palette = [getLook(first)]
+            kinds = None
+        else:
+            looks = list(map(getLook, bullets))
+            palette = list(dict.fromkeys(looks))
+            kinds = None
+            if len(palette) > 1:
+                index = {look: i for i, look in enumerate(palette)}
+                kinds = np.frombuffer(array("H", map(index.__getitem__, looks)), np.uint16)
+        if simple:
+            palette = [(SIMPLE_SIZE, SIMPLE_SIZE, color) for _, _, color in palette]
+
+        xs = np.frombuffer(array("d", map(getX, bullets)))
+        ys = np.frombuffer(array("d", map(getY, bullets)))
+        if scale != 1.0:
+            xs = xs * scale
+            ys = ys * scale
+        xs = xs.astype(np.intp)  # truncates like int() in Bullet.draw
+        ys = ys.astype(np.intp)
+
+        W, H = screen.get_size()
+        pixels = pygame.surfarray.pixels2d(screen).T  # (H, W) view, locks the surface
+        try:
+            flat = pixels.reshape(-1) if pixels.flags.c_contiguous else None
+            for k, (width, height, color) in enumerate(palette):
+                if kinds is None:
+                    bx, by = xs, ys
+                else:
+                    sel = kinds == k
+                    bx, by = xs[sel], ys[sel]
+                self.fill_group(screen, pixels, flat, bx, by, width, height, color, scale)
+        finally:
+            del pixels, flat  # unlock before anything else blits to the surface
+        return True
+
+    def draw_arrays(self, screen, views, looks, scale=1.0, simple=False):
+        """
+        Draw bullets that are already arrays, e.g. ShardedBulletStore.views():
+        a list of (x, y, look) arrays, look indexing looks, a list of
+        (name, width, height, colour).
+        """
+        if screen.get_bytesize() != 4:
+            return False
+        self.drawn = sum(len(v[0]) for v in views)
+
+        pixels = pygame.surfarray.pixels2d(screen).T
+        try:
+            flat = pixels.reshape(-1) if pixels.flags.c_contiguous else None
+            for x, y, look in views:
+                if scale != 1.0:
+                    x = x * scale
+                    y = y * scale
+                bx = x.astype(np.intp)
+                by = y.astype(np.intp)
+                first = look[0]
+                if (look == first).all():
+                    groups = [(int(first), None)]
+                else:
+                    groups = [(int(k), look == k) for k in np.unique(look)]
+                for k, sel in groups:
+                    _, width, height, color = looks[k]
+                    if simple:
+                        width = height = SIMPLE_SIZE
+                    if sel is None:
+                        self.fill_group(screen, pixels, flat, bx, by, width, height, color, scale)
+                    else:
+                        self.fill_group(screen, pixels, flat, bx[sel], by[sel], width, height, color, scale)
+        finally:
+            del pixels, flat
+        return True
+
+    def fill_group(self, screen, pixels, flat, bx, by, width, height, color, scale):
+        """Write one look's stamps at the (already truncated) positions bx, by."""
+        H, W = pixels.shape
+        w, h, offsets = self.stamp(width, height, scale, W)
+        mapped = screen.map_rgb(color)
+
+        if flat is None or len(bx) * w * h > W * H // 2:
+            pixels[self.coverage(bx, by, w, h, W, H)] = mapped
+            return
+
+        inside = (bx >= 0) & (by >= 0) & (bx <= W - w) & (by <= H - h)
+        starts = by[inside] * W + bx[inside]
+        flat[(starts[:, None] + offsets).ravel()] = mapped
+
+        # Partly off-surface (only ever a few): keep the pixels on it
+        edge = ~inside & (bx > -w) & (by > -h) & (bx < W) & (by < H)
+        if edge.any():
+            dy, dx = np.divmod(offsets, W)
+            px = (bx[edge][:, None] + dx).ravel()
+            py = (by[edge][:, None] + dy).ravel()
+            on = (px >= 0) & (py >= 0) & (px < W) & (py < H)
+            pixels[py[on], px[on]] = mapped
+
+    def coverage(self, bx, by, w, h, W, H):
+        """(H, W) bool mask of the pixels covered by w x h rects at bx, by."""
+        # Corners go in a mask padded by the stamp size, so rects that
+        # start above or left of the surface still mark their visible part
+        visible = (bx > -w) & (by > -h) & (bx < W) & (by < H)
+        corners = np.zeros((H + h - 1, W + w - 1), np.bool_)
+        corners[by[visible] + h - 1, bx[visible] + w - 1] = True
+
+        rows = corners[:, w - 1:].copy()
+        for dx in range(1, w):
+            rows |= corners[:, w - 1 - dx:W + w - 1 - dx]
+        covered = rows[h - 1:].copy()
+        for dy in range(1, h):
+            covered |= rows[h - 1 - dy:H + h - 1 - dy]
+        return covered